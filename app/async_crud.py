@@ -0,0 +1,97 @@
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from datetime import datetime
+from typing import List, Optional, Tuple
+from app import models, schemas, services
+from app.crud import (
+    _cancel_vote_stmt,
+    _hashtag_stats_list,
+    _shorts_by_hashtag_query,
+    _shorts_by_user_query,
+    _vote_stmt,
+    _votes_list,
+)
+
+# app/crud.py의 읽기/투표 경로를 AsyncSession(asyncpg)으로 옮긴 버전 (API 엔드포인트용)
+# 쿼리/응답 형식은 동기 버전과 같고, 영상 등록/갱신과 스케줄러는 동기 버전을 그대로 사용
+
+async def get_shorts_by_video_id(db: AsyncSession, video_id: str) -> models.Shorts | None:
+    return (await db.execute(
+        select(models.Shorts).where(models.Shorts.video_id == video_id).limit(1)
+    )).scalars().first()
+
+async def get_generations(db: AsyncSession) -> Tuple[int, int]:
+    """현재 (조회수, 투표) 데이터 세대 번호를 한 번에 조회 (한 번도 올리지 않은 시퀀스는 0)"""
+    row = (await db.execute(text(
+        f"SELECT (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {models.views_generation_seq.name}),"
+        f" (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {models.votes_generation_seq.name})"
+    ))).one()
+    return row[0], row[1]
+
+async def bump_votes_generation(db: AsyncSession) -> int:
+    """투표 데이터가 바뀌었음을 알림 (반드시 변경을 commit한 뒤에 호출)"""
+    return (await db.execute(select(models.votes_generation_seq.next_value()))).scalar()
+
+async def get_stats_for_hashtags(db: AsyncSession, tags: List[str]) -> List[schemas.HashtagStat]:
+    # GET /shorts/compare
+    if not tags:
+        return []
+
+    clean_tags = [tag.strip().lstrip('#') for tag in tags]
+    canonical_tags = {services.normalize_hashtag(tag) for tag in clean_tags}
+
+    rows = (await db.execute(
+        select(models.HashtagStats).where(models.HashtagStats.hashtag.in_(canonical_tags))
+    )).scalars().all()
+    return _hashtag_stats_list(clean_tags, rows)
+
+async def get_shorts_by_hashtag(db: AsyncSession, tag: str, limit: int = 100, after: Optional[Tuple[int, int]] = None) -> list[models.Shorts]:
+    """해시태그로 쇼츠 목록 조회 - #filmchain과 영화별 해시태그 둘 다 포함하는 영상만 반환 (after: (view_count, id) 커서)"""
+    return (await db.execute(_shorts_by_hashtag_query(tag, limit, after))).scalars().all()
+
+async def get_shorts_by_user(db: AsyncSession, user_id: int, limit: Optional[int] = None, after: Optional[Tuple[datetime, int]] = None) -> list[models.Shorts]:
+    """사용자가 등록한 영상 (최신순, after: (created_at, id) 커서)"""
+    return (await db.execute(_shorts_by_user_query(user_id, limit, after))).scalars().all()
+
+async def get_votes_for_hashtags(db: AsyncSession, tags: list[str]) -> list[schemas.HashtagVoteResponse]:
+    """여러 해시태그의 투표수 조회"""
+    clean_tags = [t.strip().lstrip('#') for t in tags]
+    rows = (await db.execute(
+        select(models.HashtagVote).where(models.HashtagVote.hashtag.in_(clean_tags))
+    )).scalars().all()
+    return _votes_list(clean_tags, rows)
+
+async def get_vote_count(db: AsyncSession, tag: str) -> Optional[int]:
+    """DB에 저장된 투표수 (행이 없으면 None), 읽기만 하므로 트랜잭션을 바로 끝냄"""
+    count = (await db.execute(
+        select(models.HashtagVote.vote_count).where(models.HashtagVote.hashtag == tag)
+    )).first()
+    await db.rollback()
+    if count is None:
+        return None
+    return count.vote_count or 0
+
+async def vote_hashtag(db: AsyncSession, tag: str) -> schemas.HashtagVoteResponse:
+    """특정 해시태그 투표 +1 (INSERT ... ON CONFLICT DO UPDATE 한 문장으로 원자적으로 증가)"""
+    clean_tag = tag.strip().lstrip('#')
+    if not clean_tag:
+        raise HTTPException(status_code=400, detail="해시태그가 비어 있습니다.")
+    row = (await db.execute(_vote_stmt(clean_tag))).one()
+    await db.commit()
+    await bump_votes_generation(db)
+    return schemas.HashtagVoteResponse(hashtag=row.hashtag, vote_count=row.vote_count)
+
+async def cancel_vote(db: AsyncSession, tag: str) -> schemas.HashtagVoteResponse:
+    """특정 해시태그 투표 -1 (취소) - 한 문장의 UPDATE로 원자적으로 감소"""
+    clean_tag = tag.strip().lstrip('#')
+    row = (await db.execute(_cancel_vote_stmt(clean_tag))).first()
+
+    if row is None:
+        # DB에 없는 경우 (예: 잘못된 태그)
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="해시태그를 찾을 수 없습니다.")
+
+    await db.commit()
+    await bump_votes_generation(db)
+    return schemas.HashtagVoteResponse(hashtag=row.hashtag, vote_count=row.vote_count)
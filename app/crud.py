@@ -1,14 +1,184 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from sqlalchemy import func, select, delete, literal, text, tuple_, update, values, column, Integer, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import HTTPException, status
-from typing import List, Optional
-from app import models, schemas
+from datetime import datetime, timezone
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app import models, schemas, services
+from scheduler import refresh_policy, rollup_history
 from scheduler.youtube_client import fetch_video_stats
+from scheduler.youtube_quota import YouTubeUnavailable
+from app.video_lookup import YOUTUBE_BATCH_SIZE, video_lookup
 
 def get_shorts_by_video_id(db: Session, video_id: str) -> models.Shorts | None:
     return db.query(models.Shorts).filter(models.Shorts.video_id == video_id).first()
 
+def bump_views_generation(db: Session) -> int:
+    """조회수 데이터가 바뀌었음을 알림 (반드시 변경을 commit한 뒤에 호출)"""
+    return db.execute(select(models.views_generation_seq.next_value())).scalar()
+
+def bump_votes_generation(db: Session) -> int:
+    """투표 데이터가 바뀌었음을 알림 (반드시 변경을 commit한 뒤에 호출)"""
+    return db.execute(select(models.votes_generation_seq.next_value())).scalar()
+
+def sync_shorts_hashtags(
+    db: Session, shorts_id: int, old_hashtags: Optional[str], new_hashtags: Optional[str], view_count: Optional[int] = 0,
+) -> None:
+    """
+    shorts_hashtags 연결 테이블을 Shorts.hashtags 변경 내용에 맞춰 갱신 (commit은 호출자가 담당)
+    변경된 태그만 삭제/추가하므로 해시태그가 그대로면 쿼리를 보내지 않음
+    추가하는 행에는 view_count(영상의 현재 조회수)를 기록 (남은 행은 sync_hashtag_view_counts로 갱신)
+    """
+    old_tags = services.split_hashtags(old_hashtags)
+    new_tags = services.split_hashtags(new_hashtags)
+
+    removed = old_tags - new_tags
+    added = new_tags - old_tags
+    if removed:
+        db.execute(
+            delete(models.ShortsHashtag)
+            .where(models.ShortsHashtag.shorts_id == shorts_id)
+            .where(models.ShortsHashtag.hashtag.in_(removed))
+        )
+    if added:
+        db.execute(
+            pg_insert(models.ShortsHashtag)
+            .values([{"shorts_id": shorts_id, "hashtag": tag, "view_count": view_count or 0} for tag in sorted(added)])
+            .on_conflict_do_nothing()
+        )
+
+def sync_hashtag_view_counts(db: Session, shorts_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    shorts_hashtags.view_count를 shorts 테이블의 조회수로 맞춤 (commit은 호출자가 담당), 바뀐 행 수를 반환
+    shorts_ids를 주면 그 영상들만, 없으면 전체 (컬럼을 새로 추가한 DB의 백필)
+    """
+    stmt = update(models.ShortsHashtag)\
+        .where(models.ShortsHashtag.shorts_id == models.Shorts.id)\
+        .where(models.ShortsHashtag.view_count.is_distinct_from(func.coalesce(models.Shorts.view_count, 0)))\
+        .values(view_count=func.coalesce(models.Shorts.view_count, 0))
+    if shorts_ids is not None:
+        shorts_ids = list(shorts_ids)
+        if not shorts_ids:
+            return 0
+        stmt = stmt.where(models.Shorts.id.in_(shorts_ids))
+    return db.execute(stmt).rowcount
+
+def add_hashtag_view_count_column(conn) -> None:
+    """
+    기존 DB의 shorts_hashtags에 view_count 컬럼과 해시태그별 목록 인덱스를 추가 (commit은 호출자가 담당)
+    컬럼을 이번에 추가한 경우 영상의 조회수를 복사한 뒤 인덱스를 만듦
+    """
+    added = conn.execute(text(
+        "SELECT 1 FROM information_schema.columns WHERE table_name = 'shorts_hashtags' AND column_name = 'view_count'"
+    )).first() is None
+    conn.execute(text("ALTER TABLE shorts_hashtags ADD COLUMN IF NOT EXISTS view_count BIGINT NOT NULL DEFAULT 0"))
+    if added:
+        sync_hashtag_view_counts(conn)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_shorts_hashtags_tag_views ON shorts_hashtags (hashtag, view_count, shorts_id)"))
+
+def backfill_shorts_hashtags(db: Session, batch_size: int = 1000) -> int:
+    """
+    기존 Shorts.hashtags 문자열로 shorts_hashtags 연결 테이블을 채움 (여러 번 실행해도 안전)
+    id 순서로 batch_size개씩 읽어 배치마다 commit, 추가 시도한 (영상, 태그) 쌍의 수를 반환
+    """
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.Shorts.id, models.Shorts.hashtags, models.Shorts.view_count)
+            .where(models.Shorts.id > last_id)
+            .order_by(models.Shorts.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        values = [
+            {"shorts_id": row.id, "hashtag": tag, "view_count": row.view_count or 0}
+            for row in rows
+            for tag in sorted(services.split_hashtags(row.hashtags))
+        ]
+        if values:
+            db.execute(pg_insert(models.ShortsHashtag).values(values).on_conflict_do_nothing())
+            total += len(values)
+        db.commit()
+    return total
+
+def needs_hashtag_backfill(db: Session) -> bool:
+    """해시태그가 있는 영상이 있는데 연결 테이블이 비어 있으면 True"""
+    if db.query(models.ShortsHashtag.shorts_id).first() is not None:
+        return False
+    return db.query(models.Shorts.id).filter(models.Shorts.hashtags.isnot(None)).first() is not None
+
+def _hashtag_contribution(hashtags: Optional[str], view_count: Optional[int], like_count: Optional[int]) -> Dict[str, List[int]]:
+    """영상 한 개가 hashtag_stats에 기여하는 값 {태그: [조회수, 좋아요, 영상 수]} (#filmchain이 없으면 기여 없음)"""
+    tags = services.split_hashtags(hashtags)
+    if services.FILMCHAIN_TAG not in tags:
+        return {}
+    return {tag: [view_count or 0, like_count or 0, 1] for tag in tags}
+
+def hashtag_stats_delta(
+    old_hashtags: Optional[str], old_views: Optional[int], old_likes: Optional[int],
+    new_hashtags: Optional[str], new_views: Optional[int], new_likes: Optional[int],
+    deltas: Optional[Dict[str, List[int]]] = None,
+) -> Dict[str, List[int]]:
+    """
+    영상 한 개의 변경(old → new)에 따른 해시태그별 증감분을 계산
+    deltas를 넘기면 그 dict에 누적하므로 배치 단위로 모아서 한 번에 반영할 수 있음
+    삭제는 new_hashtags=None, 신규 등록은 old_hashtags=None으로 표현
+    """
+    if deltas is None:
+        deltas = {}
+    old = _hashtag_contribution(old_hashtags, old_views, old_likes)
+    new = _hashtag_contribution(new_hashtags, new_views, new_likes)
+    for tag in old.keys() | new.keys():
+        before = old.get(tag, [0, 0, 0])
+        after = new.get(tag, [0, 0, 0])
+        diff = [a - b for a, b in zip(after, before)]
+        if any(diff):
+            acc = deltas.setdefault(tag, [0, 0, 0])
+            for i, value in enumerate(diff):
+                acc[i] += value
+    return deltas
+
+def apply_hashtag_stats_deltas(db: Session, deltas: Dict[str, List[int]]) -> None:
+    """해시태그별 증감분을 hashtag_stats에 원자적으로 반영 (commit은 호출자가 담당)"""
+    values = [
+        {"hashtag": tag, "total_views": views, "total_likes": likes, "shorts_count": count}
+        for tag, (views, likes, count) in sorted(deltas.items())
+        if views or likes or count
+    ]
+    if not values:
+        return
+    stmt = pg_insert(models.HashtagStats).values(values)
+    # 태그 순으로 정렬해 넣어서 동시에 갱신하는 트랜잭션끼리 같은 순서로 행 잠금을 잡도록 함
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[models.HashtagStats.hashtag],
+            set_={
+                "total_views": models.HashtagStats.total_views + stmt.excluded.total_views,
+                "total_likes": models.HashtagStats.total_likes + stmt.excluded.total_likes,
+                "shorts_count": models.HashtagStats.shorts_count + stmt.excluded.shorts_count,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+def needs_hashtag_stats_rebuild(db: Session) -> bool:
+    """집계 대상 영상(#filmchain)이 있는데 hashtag_stats가 비어 있으면 True"""
+    if db.query(models.HashtagStats.hashtag).first() is not None:
+        return False
+    return db.query(models.ShortsHashtag.shorts_id)\
+        .filter(models.ShortsHashtag.hashtag == services.FILMCHAIN_TAG)\
+        .first() is not None
+
+def _shorts_ids_with_tag(clean_tag: str):
+    """정규형 해시태그를 가진 영상 id 서브쿼리 (shorts_hashtags PK 인덱스 사용)"""
+    return select(models.ShortsHashtag.shorts_id).where(models.ShortsHashtag.hashtag == clean_tag)
+
 def create_shorts(db: Session, video_id: str, url: str, hashtags: Optional[str] = None, fetch_views: bool = True, user_id: Optional[int] = None) -> models.Shorts:
     # POST /shorts/
     db_shorts_exists = get_shorts_by_video_id(db=db, video_id=video_id)
@@ -17,110 +187,195 @@ def create_shorts(db: Session, video_id: str, url: str, hashtags: Optional[str]
             status_code=status.HTTP_409_CONFLICT,
             detail="이미 등록된 영상입니다."
         )
-    
-    # 초기값으로 등록 (해시태그 포함, YouTube API에서 실제 해시태그를 가져옴)
-    db_shorts = models.Shorts(video_id=video_id, url=url, view_count=0, hashtags=hashtags, user_id=user_id)
 
+    # 초기값 (YouTube 조회를 하지 않는 경우 요청의 해시태그로 등록)
+    fields = {"view_count": 0, "like_count": 0, "title": None, "hashtags": hashtags}
+
+    # 저장하기 전에 YouTube에서 조회수, 좋아요 수를 가져오고 해시태그를 검증 (거절된 영상은 DB에 쓰지 않음)
+    if fetch_views:
+        # YouTube 응답을 기다리는 동안 DB 연결을 잡고 있지 않도록 읽기 트랜잭션을 끝냄
+        db.rollback()
+        fields = validate_shorts(video_id, hashtags)
+
+    return insert_shorts(db, video_id=video_id, url=url, user_id=user_id, **fields)
+
+def validate_shorts(video_id: str, hashtags: Optional[str]) -> Dict:
+    """
+    등록할 영상을 YouTube에서 조회해 해시태그를 검증하고, 저장할 값(조회수, 좋아요 수, 제목, 해시태그)을 반환
+    같은 영상의 동시 조회는 한 번의 호출을 함께 쓰고, 최근 결과는 잠시 캐시됨 (video_lookup)
+    """
+    try:
+        data = video_lookup.get(video_id)
+    except YouTubeUnavailable as e:
+        # 할당량 소진/일시적 장애 - 영상 문제가 아니므로 잠시 뒤 다시 시도하도록 안내
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"지금은 YouTube에서 영상 정보를 가져올 수 없습니다: {e} 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except Exception as e:
+        # YouTube API 호출 실패 시 에러
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"영상 정보를 가져올 수 없습니다: {str(e)}. URL을 확인해주세요."
+        )
+    reason = _rejection_reason(data, hashtags)
+    if reason:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=reason)
+    return _shorts_values(data)
+
+def _rejection_reason(data: Optional[Dict], hashtags: Optional[str]) -> Optional[str]:
+    if data is None:
+        # YouTube API에서 영상 정보를 가져오지 못한 경우
+        return "유효한 YouTube 영상을 찾을 수 없습니다. URL을 확인해주세요."
+    # YouTube API에서 가져온 해시태그를 그대로 사용 (실제 영상에 달린 해시태그)
+    return services.check_required_hashtags(data.get("hashtags"), hashtags)
+
+def _shorts_values(data: Dict) -> Dict:
+    return {
+        "view_count": int(data.get("view_count", 0)),
+        "like_count": int(data.get("like_count", 0)),
+        # YouTube API에서 가져온 제목 저장
+        "title": data.get("title"),
+        "hashtags": data.get("hashtags"),
+    }
+
+def insert_shorts(
+    db: Session, video_id: str, url: str, view_count: int, like_count: int,
+    title: Optional[str], hashtags: Optional[str], user_id: Optional[int] = None,
+) -> models.Shorts:
+    """검증이 끝난 영상을 한 트랜잭션으로 저장 (해시태그 인덱스, 집계, 시계열 첫 값 포함)"""
+    db_shorts = models.Shorts(
+        video_id=video_id, url=url, view_count=view_count, like_count=like_count,
+        title=title, hashtags=hashtags, user_id=user_id,
+    )
     try:
         db.add(db_shorts)
+        db.flush()
+        sync_shorts_hashtags(db, db_shorts.id, None, hashtags, view_count)
+        deltas = hashtag_stats_delta(None, 0, 0, hashtags, view_count, like_count)
+        apply_hashtag_stats_deltas(db, deltas)
+        # 등록 시점의 조회수를 시계열의 첫 값으로 기록
+        record_stats_history(
+            db,
+            [{"shorts_id": db_shorts.id, "view_count": view_count, "like_count": like_count}],
+            deltas.keys(),
+            datetime.now(timezone.utc),
+        )
         db.commit()
-        db.refresh(db_shorts)
-        
-        # 등록 후 즉시 조회수, 좋아요 수 조회 및 해시태그 검증
-        if fetch_views:
-            try:
-                stats_map = fetch_video_stats([video_id])
-                if video_id in stats_map:
-                    data = stats_map[video_id]
-                    db_shorts.view_count = int(data.get("view_count", 0))
-                    db_shorts.like_count = int(data.get("like_count", 0))
-                    # YouTube API에서 가져온 제목 저장
-                    title = data.get("title")
-                    if title is not None:
-                        db_shorts.title = title
-                    # YouTube API에서 가져온 해시태그를 그대로 사용 (실제 영상에 달린 해시태그)
-                    youtube_hashtags = data.get("hashtags")
-                    if youtube_hashtags is not None:
-                        # YouTube API에서 가져온 해시태그를 그대로 사용
-                        db_shorts.hashtags = youtube_hashtags
-                        
-                        # 해시태그 검증: #filmchain과 영화별 해시태그가 모두 있는지 확인
-                        hashtag_set = set(youtube_hashtags.split())
-                        has_filmchain = "#filmchain" in hashtag_set or "filmchain" in hashtag_set
-                        
-                        # 영화별 해시태그 확인 (요청으로 받은 해시태그와 비교)
-                        if hashtags:
-                            requested_tags = [t.strip().lstrip('#').lower() for t in hashtags.split()]
-                            missing_tags = []
-                            
-                            if not has_filmchain:
-                                missing_tags.append("#filmchain")
-
-                            for req_tag in requested_tags:
-                                if req_tag == 'filmchain': continue 
-                                
-                                found = False
-                                for tag in hashtag_set:
-                                    tag_clean = tag.strip().lstrip('#').lower()
-                                    if tag_clean == req_tag:
-                                        found = True
-                                        break
-                                if not found:
-                                    missing_tags.append(f"#{req_tag}")
-
-                            if missing_tags:
-                                db.delete(db_shorts)
-                                db.commit()
-                                raise HTTPException(
-                                    status_code=status.HTTP_400_BAD_REQUEST,
-                                    detail=f"영상에 필수 해시태그가 없습니다: {', '.join(missing_tags)}. YouTube 영상에 {', '.join(missing_tags)} 해시태그를 추가해주세요."
-                                )
-                        else:
-                            # 영화별 해시태그가 요청에 없으면 #filmchain만 확인
-                            if not has_filmchain:
-                                db.delete(db_shorts)
-                                db.commit()
-                                raise HTTPException(
-                                    status_code=status.HTTP_400_BAD_REQUEST,
-                                    detail="영상에 #filmchain 해시태그가 없습니다. YouTube 영상에 #filmchain 해시태그를 추가해주세요."
-                                )
-                    else:
-                        # YouTube 해시태그가 없으면 에러
-                        db.delete(db_shorts)
-                        db.commit()
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="영상에 해시태그가 없습니다. YouTube 영상에 #filmchain과 영화별 해시태그를 추가해주세요."
-                        )
-                    db.commit()
-                    db.refresh(db_shorts)
-                else:
-                    # YouTube API에서 영상 정보를 가져오지 못한 경우
-                    db.delete(db_shorts)
-                    db.commit()
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="유효한 YouTube 영상을 찾을 수 없습니다. URL을 확인해주세요."
-                    )
-            except HTTPException:
-                # HTTPException은 그대로 전달
-                raise
-            except Exception as e:
-                # YouTube API 호출 실패 시 에러
-                db.delete(db_shorts)
-                db.commit()
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"영상 정보를 가져올 수 없습니다: {str(e)}. URL을 확인해주세요."
-                )
-        
-        return db_shorts
     except IntegrityError:
+        # 검증하는 동안 같은 영상이 먼저 등록된 경우
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="이미 등록된 영상입니다.."
         )
+    bump_views_generation(db)
+    db.refresh(db_shorts)
+    return db_shorts
+
+def create_shorts_bulk(db: Session, urls: List[str], hashtags: Optional[str] = None, user_id: Optional[int] = None) -> schemas.ShortsBulkResponse:
+    """
+    POST /shorts/bulk - 여러 URL을 한 번에 등록하고 URL별 결과를 반환
+    요청 안의 중복 제거 → 이미 등록된 video_id를 한 번의 쿼리로 확인 → YouTube에서 50개씩 조회/검증
+    → 통과한 영상만 한 트랜잭션으로 bulk INSERT
+    """
+    results = [schemas.ShortsBulkResult(url=url, status="pending") for url in urls]
+    first_by_video: Dict[str, schemas.ShortsBulkResult] = {}
+    for result in results:
+        try:
+            result.video_id = services.parse_video_id(url=result.url)
+        except HTTPException as e:
+            result.status, result.detail = "invalid_url", e.detail
+            continue
+        if result.video_id in first_by_video:
+            result.status, result.detail = "duplicate", "요청 안에서 중복된 영상입니다."
+        else:
+            first_by_video[result.video_id] = result
+
+    if first_by_video:
+        existing = set(db.scalars(
+            select(models.Shorts.video_id).where(models.Shorts.video_id.in_(first_by_video.keys()))
+        ))
+        for video_id in existing:
+            first_by_video[video_id].status = "exists"
+            first_by_video[video_id].detail = "이미 등록된 영상입니다."
+    # YouTube 응답을 기다리는 동안 DB 연결을 잡고 있지 않도록 읽기 트랜잭션을 끝냄
+    db.rollback()
+
+    pending = [vid for vid, result in first_by_video.items() if result.status == "pending"]
+    rows = []
+    for i in range(0, len(pending), YOUTUBE_BATCH_SIZE):
+        batch = pending[i : i + YOUTUBE_BATCH_SIZE]
+        try:
+            stats_map = video_lookup.get_many(batch)
+        except Exception as e:
+            # 실패한 배치만 오류로 처리하고 나머지 배치는 계속 진행
+            for video_id in batch:
+                first_by_video[video_id].status = "error"
+                first_by_video[video_id].detail = f"영상 정보를 가져올 수 없습니다: {str(e)}"
+            continue
+        for video_id in batch:
+            result = first_by_video[video_id]
+            reason = _rejection_reason(stats_map.get(video_id), hashtags)
+            if reason:
+                result.status, result.detail = "rejected", reason
+                continue
+            rows.append({"video_id": video_id, "url": result.url, "user_id": user_id, **_shorts_values(stats_map[video_id])})
+
+    if rows:
+        inserted = insert_shorts_bulk(db, rows)
+        for row in rows:
+            result = first_by_video[row["video_id"]]
+            db_shorts = inserted.get(row["video_id"])
+            if db_shorts is None:
+                # 검증하는 동안 다른 요청이 먼저 등록한 경우
+                result.status, result.detail = "exists", "이미 등록된 영상입니다."
+            else:
+                result.status, result.shorts = "created", db_shorts
+
+    return schemas.ShortsBulkResponse(
+        created=sum(1 for result in results if result.status == "created"),
+        results=results,
+    )
+
+def insert_shorts_bulk(db: Session, rows: List[Dict]) -> Dict[str, schemas.Shorts]:
+    """
+    검증이 끝난 영상 여러 개를 한 트랜잭션으로 저장하고 {video_id: 저장된 영상}을 반환
+    이미 있는 video_id는 건너뜀 (ON CONFLICT DO NOTHING)
+    """
+    inserted = db.execute(
+        pg_insert(models.Shorts)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[models.Shorts.video_id])
+        .returning(models.Shorts)
+    ).scalars().all()
+    if not inserted:
+        db.rollback()
+        return {}
+
+    pairs = [
+        {"shorts_id": shorts.id, "hashtag": tag, "view_count": shorts.view_count or 0}
+        for shorts in inserted
+        for tag in sorted(services.split_hashtags(shorts.hashtags))
+    ]
+    if pairs:
+        db.execute(pg_insert(models.ShortsHashtag).values(pairs).on_conflict_do_nothing())
+    deltas: Dict[str, List[int]] = {}
+    for shorts in inserted:
+        hashtag_stats_delta(None, 0, 0, shorts.hashtags, shorts.view_count, shorts.like_count, deltas=deltas)
+    apply_hashtag_stats_deltas(db, deltas)
+    record_stats_history(
+        db,
+        [{"shorts_id": s.id, "view_count": s.view_count, "like_count": s.like_count} for s in inserted],
+        deltas.keys(),
+        datetime.now(timezone.utc),
+    )
+    result = {shorts.video_id: schemas.Shorts.model_validate(shorts) for shorts in inserted}
+    db.commit()
+    bump_views_generation(db)
+    return result
+
 def get_shorts_by_views(db: Session, limit: int = 100) -> list[models.Shorts]:
     # GET /shorts
     return db.query(models.Shorts)\
@@ -141,18 +396,53 @@ def update_shorts_views(db: Session, video_id: str) -> models.Shorts:
         stats_map = fetch_video_stats([video_id])
         if video_id in stats_map:
             data = stats_map[video_id]
-            db_shorts.view_count = int(data.get("view_count", db_shorts.view_count or 0))
-            db_shorts.like_count = int(data.get("like_count", db_shorts.like_count or 0))
-            # YouTube API에서 가져온 제목 업데이트
+            # 조회하는 동안 다른 요청/스케줄러가 먼저 반영했을 수 있으므로 행을 잠그고 최신 값을 기준으로 증감분을 계산
+            # (잠그지 않으면 둘 다 같은 이전 값으로 증감분을 반영해 hashtag_stats가 어긋남)
+            db_shorts = db.query(models.Shorts)\
+                .filter(models.Shorts.id == db_shorts.id)\
+                .with_for_update()\
+                .populate_existing()\
+                .one()
+            view_count = int(data.get("view_count", db_shorts.view_count or 0))
+            like_count = int(data.get("like_count", db_shorts.like_count or 0))
+            # YouTube API에서 가져온 제목/해시태그 (None이면 기존 값 유지)
             title = data.get("title")
-            if title is not None:
-                db_shorts.title = title
+            if title is None:
+                title = db_shorts.title
             hashtags = data.get("hashtags")
-            if hashtags is not None:
-                # YouTube API에서 가져온 해시태그를 그대로 사용
+            if hashtags is None:
+                hashtags = db_shorts.hashtags
+
+            # 바뀐 값이 있을 때만 기록
+            if (view_count, like_count, title, hashtags) != (db_shorts.view_count, db_shorts.like_count, db_shorts.title, db_shorts.hashtags):
+                if hashtags != db_shorts.hashtags:
+                    sync_shorts_hashtags(db, db_shorts.id, db_shorts.hashtags, hashtags, view_count)
+                deltas = hashtag_stats_delta(
+                    db_shorts.hashtags, db_shorts.view_count, db_shorts.like_count,
+                    hashtags, view_count, like_count,
+                )
+                apply_hashtag_stats_deltas(db, deltas)
+                if (view_count, like_count) != (db_shorts.view_count, db_shorts.like_count):
+                    record_stats_history(
+                        db,
+                        [{"shorts_id": db_shorts.id, "view_count": view_count, "like_count": like_count}],
+                        deltas.keys(),
+                        datetime.now(timezone.utc),
+                    )
+                db_shorts.view_count = view_count
+                db_shorts.like_count = like_count
+                db_shorts.title = title
                 db_shorts.hashtags = hashtags
-            db.commit()
-            db.refresh(db_shorts)
+                db.flush()
+                sync_hashtag_view_counts(db, [db_shorts.id])
+                db.commit()
+                bump_views_generation(db)
+                db.refresh(db_shorts)
+        return db_shorts
+    except YouTubeUnavailable as e:
+        # 할당량 소진/일시적 장애 - 저장된 조회수를 그대로 반환 (스케줄러가 나중에 갱신)
+        print(f"조회수 즉시 갱신 생략 ({video_id}): {e}")
+        db.rollback()
         return db_shorts
     except Exception as e:
         db.rollback()
@@ -163,62 +453,173 @@ def update_shorts_views(db: Session, video_id: str) -> models.Shorts:
 
 def get_stats_for_hashtags(db: Session, tags: List[str]) -> List[schemas.HashtagStat]:
     # GET /shorts/compare
-    # #filmchain과 영화별 해시태그 둘 다 포함하는 영상만 집계
-    stats_list =[]
-
+    # #filmchain과 영화별 해시태그 둘 다 포함하는 영상만 집계 (hashtag_stats 집계 테이블을 PK로 한 번에 조회)
     if not tags:
         return []
-    
-    for tag in tags:
-        clean_tag = tag.strip().lstrip('#')
-        # #filmchain과 영화별 해시태그 둘 다 포함하는지 확인
-        movie_tag_pattern = f"%#{clean_tag}%"
-        filmchain_pattern = "%#filmchain%"
-        total_views_query = db.query(func.sum(models.Shorts.view_count))\
-            .filter(models.Shorts.hashtags.ilike(movie_tag_pattern))\
-            .filter(models.Shorts.hashtags.ilike(filmchain_pattern))
-            
-        total_views = total_views_query.scalar()
-
-        if total_views is None:
-            total_views = 0
-
-        stats_list.append(schemas.HashtagStat(hashtag=clean_tag, total_views=total_views))
-    
-    return stats_list
 
-def get_shorts_by_hashtag(db: Session, tag: str, limit: int = 100) -> list[models.Shorts]:
-    """해시태그로 쇼츠 목록 조회 - #filmchain과 영화별 해시태그 둘 다 포함하는 영상만 반환"""
-    clean_tag = tag.strip().lstrip('#')
-    movie_tag_pattern = f"%#{clean_tag}%"
-    filmchain_pattern = "%#filmchain%"
-    return db.query(models.Shorts)\
-        .filter(models.Shorts.hashtags.ilike(movie_tag_pattern))\
-        .filter(models.Shorts.hashtags.ilike(filmchain_pattern))\
-        .order_by(models.Shorts.view_count.desc())\
-        .limit(limit)\
+    clean_tags = [tag.strip().lstrip('#') for tag in tags]
+    canonical_tags = {services.normalize_hashtag(tag) for tag in clean_tags}
+
+    rows = db.query(models.HashtagStats)\
+        .filter(models.HashtagStats.hashtag.in_(canonical_tags))\
         .all()
+    return _hashtag_stats_list(clean_tags, rows)
+
+def _hashtag_stats_list(clean_tags: List[str], rows) -> List[schemas.HashtagStat]:
+    """요청한 태그 순서대로 집계 행을 응답으로 변환 (동기/비동기 CRUD 공용)"""
+    rows_map = {row.hashtag: row for row in rows}
+
+    stats_list = []
+    for clean_tag in clean_tags:
+        row = rows_map.get(services.normalize_hashtag(clean_tag))
+        if row:
+            stats_list.append(schemas.HashtagStat(
+                hashtag=clean_tag,
+                total_views=row.total_views,
+                total_likes=row.total_likes,
+                shorts_count=row.shorts_count,
+            ))
+        else:
+            stats_list.append(schemas.HashtagStat(hashtag=clean_tag, total_views=0))
+
+    return stats_list
 
-def vote_hashtag(db: Session, tag: str) -> models.HashtagVote:
-    """특정 해시태그 투표 +1"""
+def compute_hashtag_stats(db: Session, tags: Optional[List[str]] = None) -> Dict[str, List[int]]:
+    """
+    shorts 테이블에서 해시태그별 집계를 직접 계산 {태그: [조회수, 좋아요, 영상 수]}
+    hashtag_stats 검증/재생성용 (tags를 주지 않으면 전체 태그를 계산)
+    """
+    query = db.query(
+            models.ShortsHashtag.hashtag,
+            func.coalesce(func.sum(models.Shorts.view_count), 0),
+            func.coalesce(func.sum(models.Shorts.like_count), 0),
+            func.count(models.Shorts.id),
+        )\
+        .join(models.Shorts, models.Shorts.id == models.ShortsHashtag.shorts_id)\
+        .filter(models.Shorts.id.in_(_shorts_ids_with_tag(services.FILMCHAIN_TAG)))
+    if tags is not None:
+        query = query.filter(models.ShortsHashtag.hashtag.in_({services.normalize_hashtag(t) for t in tags}))
+    rows = query.group_by(models.ShortsHashtag.hashtag).all()
+    return {hashtag: [int(views), int(likes), int(count)] for hashtag, views, likes, count in rows}
+
+def verify_hashtag_stats(db: Session) -> Dict[str, tuple]:
+    """hashtag_stats와 실제 계산값이 다른 태그를 {태그: (저장값, 계산값)}으로 반환"""
+    expected = compute_hashtag_stats(db)
+    stored = {
+        row.hashtag: [row.total_views, row.total_likes, row.shorts_count]
+        for row in db.query(models.HashtagStats).all()
+    }
+    mismatches = {}
+    for tag in expected.keys() | stored.keys():
+        want = expected.get(tag, [0, 0, 0])
+        have = stored.get(tag, [0, 0, 0])
+        if want != have:
+            mismatches[tag] = (have, want)
+    return mismatches
+
+def rebuild_hashtag_stats(db: Session) -> int:
+    """hashtag_stats를 shorts 테이블 기준으로 다시 만듦 (한 트랜잭션), 집계된 태그 수를 반환"""
+    expected = compute_hashtag_stats(db)
+    db.execute(delete(models.HashtagStats))
+    if expected:
+        db.execute(pg_insert(models.HashtagStats).values([
+            {"hashtag": tag, "total_views": views, "total_likes": likes, "shorts_count": count}
+            for tag, (views, likes, count) in sorted(expected.items())
+        ]))
+    db.commit()
+    return len(expected)
+
+def get_shorts_by_hashtag(db: Session, tag: str, limit: int = 100, after: Optional[Tuple[int, int]] = None) -> list[models.Shorts]:
+    """
+    해시태그로 쇼츠 목록 조회 - #filmchain과 영화별 해시태그 둘 다 포함하는 영상만 반환
+    after=(view_count, id)를 주면 그 다음 영상부터 (keyset 페이지네이션)
+    """
+    return db.execute(_shorts_by_hashtag_query(tag, limit, after)).scalars().all()
+
+def _shorts_by_hashtag_query(tag: str, limit: int, after: Optional[Tuple[int, int]]):
+    """(view_count desc, id desc) 순서의 해시태그별 목록 쿼리 (동기/비동기 CRUD 공용)"""
+    clean_tag = services.normalize_hashtag(tag)
+    tagged = models.ShortsHashtag
+    # shorts_hashtags의 (hashtag, view_count, shorts_id) 인덱스를 태그 범위 안에서만 역순으로 읽고,
+    # #filmchain 여부는 읽은 행마다 PK로 확인 (태그가 드물어도 흔해도 limit개 근처에서 멈춤)
+    query = select(models.Shorts)\
+        .join(tagged, tagged.shorts_id == models.Shorts.id)\
+        .where(tagged.hashtag == clean_tag)\
+        .order_by(tagged.view_count.desc(), tagged.shorts_id.desc())\
+        .limit(limit)
+    if clean_tag != services.FILMCHAIN_TAG:
+        filmchain = aliased(models.ShortsHashtag)
+        query = query.where(
+            select(filmchain.shorts_id)
+            .where(filmchain.hashtag == services.FILMCHAIN_TAG)
+            .where(filmchain.shorts_id == tagged.shorts_id)
+            .exists()
+        )
+    if after is not None:
+        query = query.where(tuple_(tagged.view_count, tagged.shorts_id) < after)
+    return query
+
+def vote_hashtag(db: Session, tag: str) -> schemas.HashtagVoteResponse:
+    """특정 해시태그 투표 +1 (INSERT ... ON CONFLICT DO UPDATE 한 문장으로 원자적으로 증가)"""
     clean_tag = tag.strip().lstrip('#')
     if not clean_tag:
         raise HTTPException(status_code=400, detail="해시태그가 비어 있습니다.")
-    db_vote = (
-        db.query(models.HashtagVote)
-        .filter(models.HashtagVote.hashtag == clean_tag)
-        .first()
-    )
+    row = db.execute(_vote_stmt(clean_tag)).one()
+    db.commit()
+    bump_votes_generation(db)
+    return schemas.HashtagVoteResponse(hashtag=row.hashtag, vote_count=row.vote_count)
 
-    if db_vote is None:
-        db_vote = models.HashtagVote(hashtag=clean_tag, vote_count=1)
-        db.add(db_vote)
-    else:
-        db_vote.vote_count = (db_vote.vote_count or 0) + 1
+def _vote_stmt(clean_tag: str):
+    """투표 +1 upsert 문 (동기/비동기 CRUD 공용)"""
+    stmt = pg_insert(models.HashtagVote).values(hashtag=clean_tag, vote_count=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.HashtagVote.hashtag],
+        set_={
+            "vote_count": func.coalesce(models.HashtagVote.vote_count, 0) + 1,
+            "updated_at": func.now(),
+        },
+    ).returning(models.HashtagVote.hashtag, models.HashtagVote.vote_count)
 
-    db.commit()
-    db.refresh(db_vote)
-    return db_vote
+def apply_vote_deltas(db: Session, deltas: Dict[str, int]) -> Dict[str, int]:
+    """
+    해시태그별 투표 증감분을 한 번에 반영하고 반영 후 투표수를 반환 (commit은 호출자가 담당)
+    증가분은 upsert, 감소분은 기존 행만 0 아래로 내려가지 않게 UPDATE
+    """
+    result: Dict[str, int] = {}
+    increments = sorted((tag, delta) for tag, delta in deltas.items() if delta > 0)
+    decrements = sorted((tag, delta) for tag, delta in deltas.items() if delta < 0)
+
+    if increments:
+        stmt = pg_insert(models.HashtagVote).values(
+            [{"hashtag": tag, "vote_count": delta} for tag, delta in increments]
+        )
+        rows = db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[models.HashtagVote.hashtag],
+                set_={
+                    "vote_count": func.coalesce(models.HashtagVote.vote_count, 0) + stmt.excluded.vote_count,
+                    "updated_at": func.now(),
+                },
+            )
+            .returning(models.HashtagVote.hashtag, models.HashtagVote.vote_count)
+        ).all()
+        result.update({row.hashtag: row.vote_count for row in rows})
+
+    if decrements:
+        delta_values = values(column("hashtag", String), column("delta", Integer), name="deltas")\
+            .data(decrements)
+        rows = db.execute(
+            update(models.HashtagVote)
+            .where(models.HashtagVote.hashtag == delta_values.c.hashtag)
+            .values(
+                vote_count=func.greatest(func.coalesce(models.HashtagVote.vote_count, 0) + delta_values.c.delta, 0),
+                updated_at=func.now(),
+            )
+            .returning(models.HashtagVote.hashtag, models.HashtagVote.vote_count)
+        ).all()
+        result.update({row.hashtag: row.vote_count for row in rows})
+
+    return result
 
 
 def get_votes_for_hashtags(db: Session, tags: list[str]) -> list[schemas.HashtagVoteResponse]:
@@ -233,6 +634,10 @@ def get_votes_for_hashtags(db: Session, tags: list[str]) -> list[schemas.Hashtag
         .all()
     )
 
+    return _votes_list(clean_tags, rows)
+
+def _votes_list(clean_tags: list[str], rows) -> list[schemas.HashtagVoteResponse]:
+    """요청한 태그 순서대로 투표 행을 응답으로 변환 (동기/비동기 CRUD 공용)"""
     # 3) 빠른 접근을 위해 dict화
     rows_map = {row.hashtag: row for row in rows}
 
@@ -257,24 +662,201 @@ def get_votes_for_hashtags(db: Session, tags: list[str]) -> list[schemas.Hashtag
             )
     return result
 
-def cancel_vote(db: Session, tag: str) -> models.HashtagVote:
-    """특정 해시태그 투표 -1 (취소)"""
+def cancel_vote(db: Session, tag: str) -> schemas.HashtagVoteResponse:
+    """특정 해시태그 투표 -1 (취소) - 한 문장의 UPDATE로 원자적으로 감소"""
     clean_tag = tag.strip().lstrip('#')
-    db_vote = db.query(models.HashtagVote).filter(
-        models.HashtagVote.hashtag == clean_tag
-    ).first()
+    row = db.execute(_cancel_vote_stmt(clean_tag)).first()
 
-    if db_vote is None:
+    if row is None:
         # DB에 없는 경우 (예: 잘못된 태그)
+        db.rollback()
         raise HTTPException(status_code=404, detail="해시태그를 찾을 수 없습니다.")
 
-    # 최소 0 이하로는 떨어지지 않게 방어
-    db_vote.vote_count = max(0, db_vote.vote_count - 1)
+    db.commit()
+    bump_votes_generation(db)
+    return schemas.HashtagVoteResponse(hashtag=row.hashtag, vote_count=row.vote_count)
+
+def _cancel_vote_stmt(clean_tag: str):
+    """투표 -1 UPDATE 문 (동기/비동기 CRUD 공용)"""
+    return update(models.HashtagVote)\
+        .where(models.HashtagVote.hashtag == clean_tag)\
+        .values(
+            # 최소 0 이하로는 떨어지지 않게 방어
+            vote_count=func.greatest(func.coalesce(models.HashtagVote.vote_count, 0) - 1, 0),
+            updated_at=func.now(),
+        )\
+        .returning(models.HashtagVote.hashtag, models.HashtagVote.vote_count)
+
 
+def get_shorts_by_user(db: Session, user_id: int, limit: Optional[int] = None, after: Optional[Tuple[datetime, int]] = None) -> list[models.Shorts]:
+    """사용자가 등록한 영상 (최신순), after=(created_at, id)를 주면 그 다음 영상부터 (keyset 페이지네이션)"""
+    return db.execute(_shorts_by_user_query(user_id, limit, after)).scalars().all()
+
+def _shorts_by_user_query(user_id: int, limit: Optional[int], after: Optional[Tuple[datetime, int]]):
+    """(created_at desc, id desc) 순서의 사용자별 목록 쿼리 (동기/비동기 CRUD 공용)"""
+    query = select(models.Shorts)\
+        .where(models.Shorts.user_id == user_id)\
+        .order_by(models.Shorts.created_at.desc(), models.Shorts.id.desc())
+    if after is not None:
+        query = query.where(tuple_(models.Shorts.created_at, models.Shorts.id) < after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def ensure_refresh_states(db: Session, due_at: datetime) -> int:
+    """갱신 스케줄 상태가 없는 영상(새로 등록된 영상 등)에 hot 우선순위, due_at 갱신 예정으로 상태를 추가"""
+    missing = select(
+            models.Shorts.id,
+            literal(refresh_policy.PRIORITY_HOT),
+            literal(due_at),
+        )\
+        .where(~select(models.ShortsRefreshState.shorts_id)
+               .where(models.ShortsRefreshState.shorts_id == models.Shorts.id)
+               .exists())
+    result = db.execute(
+        pg_insert(models.ShortsRefreshState)
+        .from_select(["shorts_id", "priority", "next_due_at"], missing)
+        .on_conflict_do_nothing()
+    )
     db.commit()
-    db.refresh(db_vote)
-    return db_vote
+    return result.rowcount or 0
+
+def get_battle_hashtags(db: Session, since: datetime) -> Set[str]:
+    """since 이후에 투표가 있었던 해시태그(정규형) 집합 - 진행 중인 대결"""
+    rows = db.query(models.HashtagVote.hashtag)\
+        .filter(models.HashtagVote.updated_at >= since)\
+        .all()
+    return {services.normalize_hashtag(row.hashtag) for row in rows}
+
+def get_refresh_queue_stats(db: Session) -> List[schemas.RefreshTierStat]:
+    """우선순위별 영상 수, 갱신 대기 수, 워커가 임대 중인 수, 가장 오래 밀린 시간(초)"""
+    now = datetime.now(timezone.utc)
+    is_due = models.ShortsRefreshState.next_due_at <= now
+    is_leased = models.ShortsRefreshState.lease_expires_at > now
+    rows = db.query(
+            models.ShortsRefreshState.priority,
+            func.count(),
+            func.count().filter(is_due),
+            func.count().filter(is_leased),
+            func.min(models.ShortsRefreshState.next_due_at),
+        )\
+        .group_by(models.ShortsRefreshState.priority)\
+        .all()
+    rows_map = {priority: (total, due, leased, oldest_due) for priority, total, due, leased, oldest_due in rows}
+
+    result = []
+    for priority, tier in refresh_policy.TIER_NAMES.items():
+        total, due, leased, oldest_due = rows_map.get(priority, (0, 0, 0, None))
+        lag = max((now - oldest_due).total_seconds(), 0.0) if due and oldest_due else 0.0
+        result.append(schemas.RefreshTierStat(
+            tier=tier,
+            total=total,
+            due=due,
+            leased=leased,
+            max_lag_seconds=lag,
+            refresh_interval_seconds=refresh_policy.REFRESH_INTERVALS[priority],
+        ))
+    return result
+
+
+def record_shorts_samples(db: Session, samples: List[Dict], ts: datetime) -> None:
+    """
+    영상 조회수/좋아요 수 원본 시계열 기록 (commit은 호출자가 담당)
+    samples: [{"shorts_id": int, "view_count": int, "like_count": int}, ...] - 값이 바뀐 영상만 넘길 것
+    """
+    if not samples:
+        return
+    stmt = pg_insert(models.ShortsStatsHistory).values([
+        {**sample, "resolution": rollup_history.RESOLUTION_RAW, "ts": ts} for sample in samples
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["shorts_id", "resolution", "ts"],
+        set_={"view_count": stmt.excluded.view_count, "like_count": stmt.excluded.like_count},
+    ))
+
+def record_hashtag_samples(db: Session, tags: Iterable[str], ts: datetime) -> None:
+    """해시태그(정규형)들의 현재 hashtag_stats 값을 원본 시계열로 기록 (commit은 호출자가 담당)"""
+    tags = sorted(set(tags))
+    if not tags:
+        return
+    current = select(
+            models.HashtagStats.hashtag,
+            literal(rollup_history.RESOLUTION_RAW),
+            literal(ts),
+            models.HashtagStats.total_views,
+            models.HashtagStats.total_likes,
+        )\
+        .where(models.HashtagStats.hashtag.in_(tags))
+    stmt = pg_insert(models.HashtagStatsHistory)\
+        .from_select(["hashtag", "resolution", "ts", "view_count", "like_count"], current)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["hashtag", "resolution", "ts"],
+        set_={"view_count": stmt.excluded.view_count, "like_count": stmt.excluded.like_count},
+    ))
+
+def record_stats_history(db: Session, samples: List[Dict], tags: Iterable[str], ts: datetime) -> None:
+    """값이 바뀐 영상들(samples)과 집계가 바뀐 해시태그들(tags)의 시계열을 함께 기록"""
+    record_shorts_samples(db, samples, ts)
+    record_hashtag_samples(db, tags, ts)
 
+def _stats_baseline(db: Session, model, key_column, key, start: datetime, resolution: int) -> Optional[tuple]:
+    """구간 시작 시각에 유효했던 값 (start 이전의 마지막 점) - 고른 해상도에 없으면 더 촘촘한 해상도에서 찾음"""
+    for candidate in range(resolution, rollup_history.RESOLUTION_RAW - 1, -1):
+        row = db.query(model.view_count, model.like_count)\
+            .filter(key_column == key)\
+            .filter(model.resolution == candidate)\
+            .filter(model.ts <= start)\
+            .order_by(model.ts.desc())\
+            .first()
+        if row is not None:
+            return row
+    return None
 
-def get_shorts_by_user(db: Session, user_id: int) -> list[models.Shorts]:
-    return db.query(models.Shorts).filter(models.Shorts.user_id == user_id).order_by(models.Shorts.created_at.desc()).all()
+def _stats_series(db: Session, model, key_column, key, start: datetime, end: datetime, current: Optional[tuple]) -> schemas.StatsSeries:
+    """
+    구간에 맞는 해상도 하나만 읽어 시계열을 만들고, 구간이 현재를 포함하면 현재 값을 마지막 점으로 붙임
+    값이 바뀔 때만 기록하므로 start 시점의 값(이전 마지막 점)을 첫 점으로 두고 증가량을 계산
+    """
+    now = datetime.now(timezone.utc)
+    resolution = rollup_history.choose_resolution(start, now)
+    rows = db.query(model.ts, model.view_count, model.like_count)\
+        .filter(key_column == key)\
+        .filter(model.resolution == resolution)\
+        .filter(model.ts >= start)\
+        .filter(model.ts <= end)\
+        .order_by(model.ts)\
+        .all()
+    points = [schemas.StatsPoint(ts=ts, view_count=views, like_count=likes) for ts, views, likes in rows]
+    if not points or points[0].ts > start:
+        baseline = _stats_baseline(db, model, key_column, key, start, resolution)
+        if baseline is not None:
+            points.insert(0, schemas.StatsPoint(ts=start, view_count=baseline[0], like_count=baseline[1]))
+    if current is not None and end >= now:
+        points.append(schemas.StatsPoint(ts=now, view_count=current[0] or 0, like_count=current[1] or 0))
+
+    gained_views = points[-1].view_count - points[0].view_count if points else 0
+    gained_likes = points[-1].like_count - points[0].like_count if points else 0
+    return schemas.StatsSeries(
+        resolution=rollup_history.RESOLUTION_NAMES[resolution],
+        points=points,
+        gained_views=gained_views,
+        gained_likes=gained_likes,
+    )
+
+def get_shorts_history(db: Session, db_shorts: models.Shorts, start: datetime, end: datetime) -> schemas.StatsSeries:
+    """영상 하나의 조회수/좋아요 수 시계열"""
+    return _stats_series(
+        db, models.ShortsStatsHistory, models.ShortsStatsHistory.shorts_id, db_shorts.id,
+        start, end, (db_shorts.view_count, db_shorts.like_count),
+    )
+
+def get_hashtag_history(db: Session, tag: str, start: datetime, end: datetime) -> schemas.StatsSeries:
+    """해시태그 하나의 합계 조회수/좋아요 수 시계열"""
+    clean_tag = services.normalize_hashtag(tag)
+    row = db.query(models.HashtagStats).filter(models.HashtagStats.hashtag == clean_tag).first()
+    current = (row.total_views, row.total_likes) if row else None
+    return _stats_series(
+        db, models.HashtagStatsHistory, models.HashtagStatsHistory.hashtag, clean_tag,
+        start, end, current,
+    )
@@ -1,8 +1,19 @@
 import os
-from sqlalchemy import create_engine
+import shlex
+import ssl
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from app import metrics
+from app.metrics import Counter, Family, Gauge, Histogram
 
 load_dotenv()
 
@@ -22,7 +33,94 @@ if not SQLALCHEMY_DATABASE_URL:
     
     SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# 커넥션 풀 설정 (프로세스마다 풀이 하나씩 생기므로 API 워커 수 + 스케줄러를 합쳐 DB max_connections 안에 맞출 것)
+# 프로세스당 최대 연결 수 = DB_POOL_SIZE + DB_MAX_OVERFLOW (비동기 엔진을 쓰는 API 워커는 엔진별로 각각)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# 이 시간(초)보다 오래된 연결은 다시 맺음 (DB/방화벽의 유휴 연결 종료 대비)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# 연결을 꺼낼 때 살아 있는지 확인 (유휴 후 끊긴 연결로 인한 오류 방지)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# 풀이 가득 찼을 때 연결을 기다리는 최대 시간(초)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# 1이면 PgBouncer transaction pooling 뒤에서도 안전하게 동작 (서버 측 prepared statement를 재사용하지 않음)
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
+
+_pool_wait_seconds = metrics.histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection", ["engine"])
+_pool_timeouts = metrics.counter("db_pool_timeouts_total", "Pool checkouts that timed out", ["engine"])
+_query_seconds = metrics.histogram("db_query_duration_seconds", "SQL statement execution time", ["engine"])
+
+
+class _TimedPoolMixin:
+    """풀에서 연결을 꺼내기까지 걸린 시간(대기 시간)과 타임아웃 횟수를 기록"""
+
+    wait_seconds: Histogram
+    timeouts: Counter
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts.inc()
+            raise
+        finally:
+            self.wait_seconds.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    wait_seconds = _pool_wait_seconds.labels("sync")
+    timeouts = _pool_timeouts.labels("sync")
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    wait_seconds = _pool_wait_seconds.labels("async")
+    timeouts = _pool_timeouts.labels("async")
+
+
+# 현재 요청에서 실행한 SQL 문 [개수, 시간(초)] - app.observability 미들웨어가 요청마다 새 값을 설정
+request_queries: ContextVar[Optional[List[float]]] = ContextVar("request_queries", default=None)
+
+
+def _instrument(sync_engine, name: str) -> None:
+    """엔진의 모든 SQL 문 실행 시간을 기록하고, 요청 안에서 실행된 것은 요청별로도 합산"""
+    histogram = _query_seconds.labels(name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        histogram.observe(elapsed)
+        queries = request_queries.get()
+        if queries is not None:
+            queries[0] += 1
+            queries[1] += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # 실패한 문은 after_cursor_execute가 호출되지 않으므로 여기서 시작 시각을 버림 (연결을 재사용해도 쌓이지 않게)
+        conn = context.connection
+        if conn is not None and not conn.invalidated and context.execution_context is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def _pool_options() -> Dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+# psycopg2는 서버 측 prepared statement를 쓰지 않으므로 PgBouncer 모드에서도 추가 설정이 필요 없음
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=TimedQueuePool, **_pool_options())
+_instrument(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -32,4 +130,135 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# asyncpg.connect()가 그대로 받는 URL 쿼리 파라미터
+_ASYNCPG_QUERY_KEYS = {"host", "port", "passfile", "target_session_attrs", "krbsrvname", "gsslib", "prepared_statement_cache_size"}
+
+def _asyncpg_url(database_url: str) -> Tuple[URL, Dict]:
+    """
+    psycopg2(libpq)용 DATABASE_URL을 asyncpg용 URL과 connect_args로 변환
+    asyncpg는 모르는 쿼리 파라미터를 받으면 연결하지 못하므로 libpq 파라미터는 옮기거나 버림
+    - sslmode, sslrootcert, sslcert, sslkey → ssl
+    - connect_timeout → timeout
+    - application_name, options(-c 이름=값) → server_settings
+    """
+    url = make_url(database_url).set(drivername="postgresql+asyncpg")
+    query = dict(url.query)
+    connect_args: Dict = {}
+    server_settings: Dict[str, str] = {}
+
+    sslmode = query.pop("sslmode", None)
+    rootcert, cert, key = query.pop("sslrootcert", None), query.pop("sslcert", None), query.pop("sslkey", None)
+    if sslmode == "disable":
+        connect_args["ssl"] = False
+    elif rootcert or cert:
+        # 인증서 파일을 지정한 경우 libpq와 같은 규칙으로 검증 (require + 루트 인증서 = verify-ca)
+        context = ssl.create_default_context(cafile=rootcert)
+        if cert:
+            context.load_cert_chain(cert, key)
+        context.check_hostname = sslmode == "verify-full"
+        if not rootcert and sslmode not in ("verify-ca", "verify-full"):
+            context.verify_mode = ssl.CERT_NONE
+        connect_args["ssl"] = context
+    elif sslmode:
+        # asyncpg도 libpq와 같은 이름의 모드(prefer, require, verify-ca, verify-full 등)를 받음
+        connect_args["ssl"] = sslmode
+
+    timeout = query.pop("connect_timeout", None)
+    if timeout:
+        connect_args["timeout"] = float(timeout)
+    application_name = query.pop("application_name", None)
+    if application_name:
+        server_settings["application_name"] = application_name
+    options = iter(shlex.split(query.pop("options", "") or ""))
+    for option in options:
+        if option == "-c":
+            setting = next(options, "")
+        elif option.startswith("-c"):
+            setting = option[2:]
+        else:
+            continue
+        name, _, value = setting.partition("=")
+        if name and value:
+            server_settings[name] = value
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+
+    dropped = sorted(name for name in query if name not in _ASYNCPG_QUERY_KEYS)
+    if dropped:
+        print(f"비동기 DB 연결: asyncpg가 지원하지 않는 파라미터를 무시합니다 - {', '.join(dropped)}")
+    url = url.set(query={name: value for name, value in query.items() if name in _ASYNCPG_QUERY_KEYS})
+    return url, connect_args
+
+# 비동기 엔진/세션 (FastAPI 엔드포인트용, asyncpg 드라이버)
+# 스케줄러 등 동기 코드는 위의 engine/SessionLocal을 그대로 사용
+ASYNC_DATABASE_URL, ASYNC_CONNECT_ARGS = _asyncpg_url(SQLALCHEMY_DATABASE_URL)
+
+_async_engine = None
+
+def get_async_engine():
+    """워커 프로세스에서 처음 필요할 때 비동기 엔진을 생성 (스케줄러는 asyncpg 연결을 만들지 않음)"""
+    global _async_engine
+    if _async_engine is None:
+        connect_args = dict(ASYNC_CONNECT_ARGS)
+        if DB_PGBOUNCER:
+            # asyncpg는 기본적으로 연결별 prepared statement를 캐시함
+            # transaction pooling에서는 다음 트랜잭션이 다른 서버 연결로 갈 수 있으므로 캐시를 끄고 이름이 겹치지 않게 함
+            connect_args.update({
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            })
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool, connect_args=connect_args, **_pool_options()
+        )
+        _instrument(_async_engine.sync_engine, "async")
+    return _async_engine
+
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+def _pool_stats(pool) -> Dict:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "timeouts": int(type(pool).timeouts.value),
+        "wait_seconds": type(pool).wait_seconds.snapshot(),
+    }
+
+def pool_stats() -> Dict:
+    """이 프로세스의 커넥션 풀 상태 (사용 중 연결 수, overflow, 대기 시간 히스토그램)"""
+    stats = {"sync": _pool_stats(engine.pool)}
+    if _async_engine is not None:
+        stats["async"] = _pool_stats(_async_engine.pool)
+    return stats
+
+def _pool_metrics() -> List[Family]:
+    # /metrics 출력 시점의 풀 상태 (대기 시간/타임아웃은 위의 db_pool_* 지표)
+    families = {
+        key: Family(f"db_pool_{key}", help, "gauge", ("engine",), Gauge)
+        for key, help in (
+            ("size", "Configured pool size"),
+            ("checked_out", "Connections currently in use"),
+            ("checked_in", "Idle connections in the pool"),
+            ("overflow", "Connections open beyond pool_size"),
+        )
+    }
+    for name, stats in pool_stats().items():
+        for key, family in families.items():
+            family.labels(name).set(stats[key])
+    return list(families.values())
+
+metrics.add_collector(_pool_metrics)
+
+async def dispose_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
\ No newline at end of file
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app import crud, models, services
+from app.database import SessionLocal
+
+# 서버 측 커서에서 한 번에 가져오는 행 수 (메모리 사용량과 응답 조각 크기를 결정)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+NDJSON = "ndjson"
+CSV = "csv"
+MEDIA_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv; charset=utf-8"}
+
+# 응답 필드 (schemas.Shorts와 같은 필드)
+EXPORT_FIELDS = ("id", "video_id", "url", "title", "hashtags", "view_count", "like_count", "created_at")
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # 시간대가 없으면 UTC로 간주
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def check_range(start: Optional[datetime], end: Optional[datetime]) -> tuple[Optional[datetime], Optional[datetime]]:
+    """등록 시각 구간 검사 (응답을 보내기 시작한 뒤에는 상태 코드를 바꿀 수 없으므로 미리 확인)"""
+    start, end = _aware(start), _aware(end)
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="시작 시각이 끝 시각보다 늦습니다.")
+    return start, end
+
+
+def _export_query(tag: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    """id 순서의 내보내기 쿼리 (해시태그, 등록 시각 [start, end) 구간으로 선택적으로 필터)"""
+    query = select(*(getattr(models.Shorts, field) for field in EXPORT_FIELDS)).order_by(models.Shorts.id)
+    if tag:
+        query = query.where(models.Shorts.id.in_(crud._shorts_ids_with_tag(services.normalize_hashtag(tag))))
+    if start is not None:
+        query = query.where(models.Shorts.created_at >= start)
+    if end is not None:
+        query = query.where(models.Shorts.created_at < end)
+    return query
+
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(
+            {field: value.isoformat() if isinstance(value, datetime) else value for field, value in zip(EXPORT_FIELDS, row)},
+            ensure_ascii=False,
+        ) + "\n"
+        for row in rows
+    )
+
+
+def _csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+def iter_export(
+    fmt: str,
+    tag: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    쇼츠 목록을 NDJSON/CSV 텍스트 조각으로 내보냄
+    - 서버 측 커서(stream_results)로 batch_size개씩 읽어 바로 내보내므로 테이블 크기와 관계없이 메모리 사용량이 일정
+    - 하나의 쿼리(스냅샷)로 읽으므로 내보내는 도중 바뀐 값이 섞이지 않음
+    - 요청 의존성과 별개로 자체 세션을 열고, 다 읽거나 클라이언트가 끊으면(GeneratorExit) 닫음
+    """
+    chunk = _ndjson_chunk if fmt == NDJSON else _csv_chunk
+    if fmt == CSV:
+        # 헤더는 DB 조회 전에 바로 보냄
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            _export_query(tag, start, end).execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for rows in result.partitions():
+            yield chunk(rows)
+    finally:
+        db.close()
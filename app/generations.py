@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+
+from app import async_crud
+from app.database import AsyncSessionLocal, get_async_engine
+
+# 조회수/투표 데이터 세대 번호를 DB에서 다시 읽는 간격(초)
+GENERATION_POLL_SECONDS = float(os.getenv("GENERATION_POLL_SECONDS", "1.0"))
+
+VIEWS = "views"
+VOTES = "votes"
+
+
+class GenerationTracker:
+    """
+    API 워커 프로세스가 알고 있는 (조회수, 투표) 데이터 세대 번호
+    - 백그라운드 작업이 poll_seconds마다 DB의 두 시퀀스를 한 번에 읽어 갱신 (요청 처리 중에는 DB를 조회하지 않음)
+    - 백그라운드 작업이 멈췄거나 invalidate() 된 경우에만 요청 시점에 다시 읽음
+    - 워커 캐시(상위 N개)와 HTTP ETag가 이 값을 기준으로 무효화됨
+    - 값이 바뀌면 add_listener()로 등록한 함수를 종류(VIEWS/VOTES)와 함께 호출 (다른 워커/스케줄러의 변경도 여기서 알게 됨)
+    """
+
+    def __init__(self, poll_seconds: float = GENERATION_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.views: Optional[int] = None
+        self.votes: Optional[int] = None
+        self._polled_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """세대 번호가 바뀔 때 이벤트 루프에서 호출할 함수 등록 (처음 읽은 값은 변경으로 보지 않음)"""
+        self._listeners.append(listener)
+
+    async def poll(self) -> None:
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            views, votes = await async_crud.get_generations(db)
+        changed = [
+            kind for kind, old, new in ((VIEWS, self.views, views), (VOTES, self.votes, votes))
+            if old is not None and old != new
+        ]
+        self.views, self.votes = views, votes
+        self._polled_at = time.monotonic()
+        for kind in changed:
+            for listener in self._listeners:
+                listener(kind)
+
+    async def current(self) -> Tuple[int, int]:
+        # 백그라운드 갱신이 두 주기 이상 밀렸으면 직접 읽음
+        if time.monotonic() - self._polled_at > self.poll_seconds * 2:
+            await self.poll()
+        return self.views, self.votes
+
+    def invalidate(self) -> None:
+        """이 워커에서 데이터를 바꾼 직후 호출 - 다음 요청이 최신 세대 번호를 읽도록 함"""
+        self._polled_at = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"세대 번호 갱신 실패: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+generation_tracker = GenerationTracker()
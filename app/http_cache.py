@@ -0,0 +1,80 @@
+import os
+import threading
+from typing import Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.generations import generation_tracker
+from app.votes import vote_buffer
+
+# 조회수 기반 응답을 브라우저/CDN이 다시 확인하지 않고 쓸 수 있는 시간(초)
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "5"))
+# max-age가 지난 뒤에도 백그라운드에서 다시 확인하는 동안 이전 응답을 쓸 수 있는 시간(초)
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "30"))
+
+VIEWS = "views"
+VOTES = "votes"
+
+_CACHE_CONTROL = {
+    VIEWS: f"public, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}",
+    # 투표수는 바로 보여야 하므로 매번 재검증 (바뀌지 않았으면 304)
+    VOTES: "public, no-cache",
+}
+
+_lock = threading.Lock()
+_counts: Dict[str, Dict[str, int]] = {kind: {"requests": 0, "not_modified": 0, "errors": 0} for kind in _CACHE_CONTROL}
+
+
+def _etag(kind: str, views: int, votes: int) -> str:
+    if kind == VIEWS:
+        return f'W/"v{views}"'
+    if vote_buffer is not None:
+        # write-behind 모드에서는 워커마다 아직 반영 안 된 증감분이 응답에 포함되므로 워커/버퍼 상태를 구분
+        return f'W/"n{votes}-{os.getpid()}.{vote_buffer.version}"'
+    return f'W/"n{votes}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 약한 비교 (W/ 접두사 무시)
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
+
+
+def conditional(kind: str):
+    """
+    라우트 의존성 - 데이터 세대 번호로 ETag/Cache-Control을 붙이고,
+    If-None-Match가 현재 ETag와 같으면 DB 조회 없이 304로 응답
+    세대 번호를 읽지 못하면(DB 오류) ETag 없이 캐시하지 않는 응답으로 처리
+    """
+
+    async def dependency(request: Request, response: Response) -> None:
+        try:
+            views, votes = await generation_tracker.current()
+        except Exception:
+            with _lock:
+                _counts[kind]["errors"] += 1
+            return
+        etag = _etag(kind, views, votes)
+        headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL[kind]}
+        not_modified = _matches(request.headers.get("if-none-match"), etag)
+        with _lock:
+            _counts[kind]["requests"] += 1
+            if not_modified:
+                _counts[kind]["not_modified"] += 1
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(dependency)
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        return {
+            kind: {**counts, "hit_ratio": counts["not_modified"] / counts["requests"] if counts["requests"] else 0.0}
+            for kind, counts in _counts.items()
+        }
@@ -0,0 +1,98 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas, services
+from app.generations import generation_tracker
+
+# 해시태그별로 보관하는 상위 영상 수 (/shorts/by-hashtag 의 최대 limit)
+TOP_N = 100
+# 캐시에 보관할 최대 해시태그 수 (초과하면 가장 오래 안 쓴 태그부터 제거)
+MAX_TAGS = int(os.getenv("LEADERBOARD_MAX_TAGS", "256"))
+# 캐시 전체에 보관할 최대 영상 수 (메모리 상한)
+MAX_ROWS = int(os.getenv("LEADERBOARD_MAX_ROWS", "20000"))
+
+
+class LeaderboardCache:
+    """
+    API 워커 프로세스 안의 해시태그별 조회수 상위 N개 캐시 (/shorts/by-hashtag)
+    - 값은 (view_count desc, id desc) 순으로 정렬된 상위 TOP_N개 영상 스냅샷
+    - LRU 방식으로 MAX_TAGS개 태그, MAX_ROWS개 영상까지만 보관
+    - 스케줄러/등록/갱신이 조회수 세대 번호를 올리면 (generation_tracker가 알게 된 시점에) 전체를 비우고 요청이 올 때 다시 채움
+    """
+
+    def __init__(self, max_tags: int = MAX_TAGS, max_rows: int = MAX_ROWS):
+        self.max_tags = max_tags
+        self.max_rows = max_rows
+        self._entries: "OrderedDict[str, List[schemas.Shorts]]" = OrderedDict()
+        self._rows = 0
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def _check_generation(self) -> None:
+        generation, _ = await generation_tracker.current()
+        with self._lock:
+            if generation != self._generation:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._rows = 0
+                self._generation = generation
+
+    def _store(self, tag: str, rows: List[schemas.Shorts]) -> None:
+        # 호출자가 self._lock을 잡고 있어야 함
+        old = self._entries.pop(tag, None)
+        if old is not None:
+            self._rows -= len(old)
+        self._entries[tag] = rows
+        self._rows += len(rows)
+        while self._entries and (len(self._entries) > self.max_tags or self._rows > self.max_rows):
+            _, evicted = self._entries.popitem(last=False)
+            self._rows -= len(evicted)
+            self.evictions += 1
+
+    async def get(
+        self, db: AsyncSession, tag: str, limit: int, loader: Callable[[AsyncSession, str, int], Awaitable[list]],
+    ) -> List[schemas.Shorts]:
+        """캐시에 있으면 DB 조회 없이 상위 limit개를 반환, 없으면 loader로 상위 TOP_N개를 읽어 저장"""
+        await self._check_generation()
+        key = services.normalize_hashtag(tag)
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return rows[:limit]
+            self.misses += 1
+            generation = self._generation
+
+        rows = [schemas.Shorts.model_validate(r) for r in await loader(db, key, TOP_N)]
+        with self._lock:
+            # 읽는 동안 세대가 바뀌었으면 오래된 결과이므로 저장하지 않음
+            if generation == self._generation:
+                self._store(key, rows)
+        return rows[:limit]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "tags": len(self._entries),
+                "rows": self._rows,
+                "generation": self._generation,
+            }
+
+
+leaderboard_cache = LeaderboardCache()
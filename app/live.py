@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import async_crud
+from app.database import AsyncSessionLocal, get_async_engine
+from app.generations import VIEWS, VOTES, GenerationTracker, generation_tracker
+from app.votes import vote_buffer
+
+# 변경 알림을 받은 뒤 DB를 다시 읽기까지 기다리는 시간(초) - 이 동안 들어온 변경은 한 번의 조회로 합침
+LIVE_TICK_SECONDS = float(os.getenv("LIVE_TICK_SECONDS", "0.2"))
+# 구독자별 기본/최소 전송 간격(초) - 간격 안에 생긴 변경은 마지막 값만 보냄
+LIVE_INTERVAL_SECONDS = float(os.getenv("LIVE_INTERVAL_SECONDS", "1.0"))
+LIVE_MIN_INTERVAL_SECONDS = float(os.getenv("LIVE_MIN_INTERVAL_SECONDS", "0.5"))
+# 변경이 없을 때 연결 유지용 주석을 보내는 간격(초) (프록시 유휴 타임아웃 방지)
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+# 워커당 최대 구독자 수, 구독 하나의 최대 해시태그 수
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", "1000"))
+LIVE_MAX_TAGS = 20
+
+# SSE 이벤트 이름 (data는 각각 GET /shorts/votes, GET /shorts/compare 응답과 같은 형식)
+VOTES_EVENT = "votes"
+STATS_EVENT = "stats"
+
+
+class Subscriber:
+    """구독 하나 - 보내지 않은 이벤트는 이름별로 마지막 값만 보관 (느린 클라이언트가 있어도 메모리가 늘지 않음)"""
+
+    def __init__(self, tags: List[str], interval: float):
+        self.tags = tags
+        self.interval = interval
+        self._pending: Dict[str, list] = {}
+        self._sent: Dict[str, list] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, event: str, data: list) -> None:
+        # 마지막으로 보낸 값과 같으면 보내지 않음
+        if self._sent.get(event) == data:
+            self._pending.pop(event, None)
+            return
+        self._pending[event] = data
+        self._ready.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """보낼 이벤트가 생길 때까지 최대 timeout초 대기"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def take(self) -> Dict[str, list]:
+        events, self._pending = self._pending, {}
+        self._ready.clear()
+        self._sent.update(events)
+        return events
+
+
+class ChangeFeed(ABC):
+    """
+    LiveHub가 데이터 변경 알림을 주고받는 방식 (publish/subscribe)
+    - start(on_change): 이 워커와 다른 워커/스케줄러의 변경을 on_change(종류, 해시태그 목록 또는 None)로 전달
+      (이벤트 루프에서 호출할 것)
+    - publish(kind, tags): 이 워커에서 생긴 변경을 알림 (이벤트 루프에서 호출, 기다리지 않음)
+    Redis pub/sub, Postgres LISTEN/NOTIFY 등은 이 클래스를 구현해 LiveHub(feed=...)로 넘기면 됨
+    (start/publish를 구현하지 않은 하위 클래스는 생성할 때 TypeError)
+    """
+
+    @abstractmethod
+    def start(self, on_change: Callable[[str, Optional[List[str]]], None]) -> None:
+        ...
+
+    @abstractmethod
+    def publish(self, kind: str, tags: Optional[List[str]] = None) -> None:
+        ...
+
+    async def stop(self) -> None:
+        pass
+
+
+class GenerationFeed(ChangeFeed):
+    """
+    기본 방식 - 별도 메시지 브로커나 DB 연결 없이 세대 번호로 전달
+    이 워커의 변경은 바로 전달하고, 다른 워커/스케줄러의 변경은 generation_tracker가 세대 번호 변화를 알게 된 시점에
+    (해시태그 구분 없이) 전달
+    """
+
+    def __init__(self, tracker: GenerationTracker = generation_tracker):
+        self.tracker = tracker
+        self._on_change: Optional[Callable[[str, Optional[List[str]]], None]] = None
+        self._listening = False
+
+    def start(self, on_change: Callable[[str, Optional[List[str]]], None]) -> None:
+        if not self._listening:
+            self.tracker.add_listener(self._changed)
+            self._listening = True
+        self._on_change = on_change
+
+    def _changed(self, kind: str) -> None:
+        if self._on_change is not None:
+            self._on_change(kind, None)
+
+    def publish(self, kind: str, tags: Optional[List[str]] = None) -> None:
+        if self._on_change is not None:
+            self._on_change(kind, tags)
+
+    async def stop(self) -> None:
+        self._on_change = None
+
+
+def _format(event: str, data: list) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class LiveHub:
+    """
+    해시태그별 투표수/합계 조회수 변경을 SSE 구독자에게 전달 (API 워커 프로세스마다 하나)
+    - 변경 알림: notify()로 feed(ChangeFeed)에 알리고, feed가 전달한 변경(이 워커 + 다른 워커/스케줄러)을 모음
+      (기본값 GenerationFeed는 이 워커의 변경은 바로, 다른 곳의 변경은 세대 번호 변화로 전달)
+    - 알림이 오면 tick초 동안 모은 뒤, 영향을 받는 구독자의 해시태그 전체를 한 번의 조회로 읽어 나눠 줌
+      (DB 조회 수가 구독자 수가 아닌 변경 빈도에 비례)
+    - 구독자마다 interval초에 한 번까지만 보내고, 그 사이의 변경은 마지막 값으로 합침
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = LIVE_TICK_SECONDS,
+        max_subscribers: int = LIVE_MAX_SUBSCRIBERS,
+        feed: Optional[ChangeFeed] = None,
+    ):
+        self.tick = tick_seconds
+        self.max_subscribers = max_subscribers
+        self.feed = feed if feed is not None else GenerationFeed()
+        self._subscribers: Set[Subscriber] = set()
+        self._dirty_views = False
+        # 투표수가 바뀐 해시태그 (None이면 전체)
+        self._dirty_votes: Optional[Set[str]] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.events_sent = 0
+        self.rejected = 0
+
+    def notify(self, kind: str, tags: Optional[List[str]] = None) -> None:
+        """이 워커에서 생긴 데이터 변경을 feed에 알림 (이벤트 루프에서 호출), tags가 없으면 모든 해시태그가 바뀐 것으로 봄"""
+        self.feed.publish(kind, tags)
+
+    def _mark_dirty(self, kind: str, tags: Optional[List[str]] = None) -> None:
+        """feed가 전달한 변경을 다음 갱신 때 읽도록 모아 둠"""
+        if kind == VIEWS:
+            self._dirty_views = True
+        elif tags is None:
+            self._dirty_votes = None
+        elif self._dirty_votes is not None:
+            self._dirty_votes.update(tags)
+        if self._wake is not None:
+            self._wake.set()
+
+    async def snapshot(self, db: AsyncSession, tags: List[str]) -> Dict[str, list]:
+        """구독 시작 시 보낼 현재 값"""
+        return await self._read(db, tags, tags)
+
+    async def _read(self, db: AsyncSession, vote_tags: List[str], stat_tags: List[str]) -> Dict[str, list]:
+        events = {}
+        if vote_tags:
+            votes = await async_crud.get_votes_for_hashtags(db, vote_tags)
+            if vote_buffer is not None:
+                vote_buffer.with_pending(votes)
+            events[VOTES_EVENT] = [vote.model_dump() for vote in votes]
+        if stat_tags:
+            stats = await async_crud.get_stats_for_hashtags(db, stat_tags)
+            events[STATS_EVENT] = [stat.model_dump() for stat in stats]
+        return events
+
+    def subscribe(self, tags: List[str], interval: float, initial: Dict[str, list]) -> Subscriber:
+        if len(self._subscribers) >= self.max_subscribers:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="구독자가 많아 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": "5"},
+            )
+        subscriber = Subscriber(tags, interval)
+        for event, data in initial.items():
+            subscriber.offer(event, data)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def stream(self, subscriber: Subscriber):
+        """SSE 응답 본문 - 클라이언트가 끊으면 취소되고 구독을 해제"""
+        try:
+            while True:
+                if not await subscriber.wait(LIVE_KEEPALIVE_SECONDS):
+                    yield ": keepalive\n\n"
+                    continue
+                events = subscriber.take()
+                self.events_sent += len(events)
+                yield "".join(_format(event, data) for event, data in events.items())
+                # 구독자별 전송 간격 - 이 동안의 변경은 다음 전송에서 마지막 값으로 합쳐짐
+                await asyncio.sleep(subscriber.interval)
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def refresh(self) -> None:
+        """모아 둔 변경을 한 번에 읽어 해당 구독자에게 전달"""
+        dirty_views, dirty_votes = self._dirty_views, self._dirty_votes
+        self._dirty_views, self._dirty_votes = False, set()
+        vote_targets = [
+            sub for sub in self._subscribers
+            if dirty_votes is None or not dirty_votes.isdisjoint(sub.tags)
+        ]
+        stat_targets = list(self._subscribers) if dirty_views else []
+        if not vote_targets and not stat_targets:
+            return
+
+        def union(subscribers: List[Subscriber]) -> List[str]:
+            return list(dict.fromkeys(tag for sub in subscribers for tag in sub.tags))
+
+        try:
+            async with AsyncSessionLocal(bind=get_async_engine()) as db:
+                events = await self._read(db, union(vote_targets), union(stat_targets))
+        except Exception:
+            # 읽지 못한 변경은 다음 알림 때 함께 다시 읽음
+            if dirty_views:
+                self._mark_dirty(VIEWS)
+            if dirty_votes is None or dirty_votes:
+                self._mark_dirty(VOTES, None if dirty_votes is None else list(dirty_votes))
+            self._wake.clear()
+            raise
+        self.refreshes += 1
+
+        votes = {vote["hashtag"]: vote for vote in events.get(VOTES_EVENT, [])}
+        stats = {stat["hashtag"]: stat for stat in events.get(STATS_EVENT, [])}
+        for sub in vote_targets:
+            sub.offer(VOTES_EVENT, [votes[tag] for tag in sub.tags])
+        for sub in stat_targets:
+            sub.offer(STATS_EVENT, [stats[tag] for tag in sub.tags])
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self.tick)
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"실시간 구독 갱신 실패: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self.feed.start(self._mark_dirty)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.feed.stop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self._subscribers),
+            "refreshes": self.refreshes,
+            "events_sent": self.events_sent,
+            "rejected": self.rejected,
+        }
+
+
+live_hub = LiveHub()
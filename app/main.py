@@ -1,16 +1,35 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
 from typing import List
-from app import models, schemas, crud, services
-from .database import engine, SessionLocal
+from app import models, schemas, crud, services, async_crud, http_cache, pagination, export, live, generations, metrics
+from app.generations import generation_tracker
+from app.leaderboard import leaderboard_cache
+from app.live import live_hub
+from app.votes import vote_buffer
+from app.video_lookup import video_lookup
+from scheduler.youtube_quota import circuit_breaker, quota_ledger
+from app.observability import MetricsMiddleware, require_internal
+from .database import engine, SessionLocal, get_async_db, dispose_async_engine, pool_stats
 from app.user import router as user_router
 from app.user import models as user_models
+from app.user import schemas as user_schemas
+from app.user.cache import user_cache
+from app.user.passwords import password_hasher
 from app.user.dependencies import get_current_user, get_current_user_optional
 from typing import Optional
 
 models.Base.metadata.create_all(bind=engine, checkfirst=True)
 
+app = FastAPI(
+    title="쇼츠 조회수 확인 API",
+)
+
+app.include_router(user_router.router)
+
 @app.on_event("startup")
 def startup_event():
     from sqlalchemy import text
@@ -20,16 +39,44 @@ def startup_event():
             conn.execute(text("ALTER TABLE shorts ADD COLUMN IF NOT EXISTS like_count BIGINT DEFAULT 0"))
             # user_id 컬럼 확인 및 추가 (혹시 없는 경우를 대비)
             conn.execute(text("ALTER TABLE shorts ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id)"))
+            # 투표 시각 컬럼 (스케줄러가 진행 중인 대결의 영상을 우선 갱신할 때 사용)
+            conn.execute(text("ALTER TABLE hastag_votes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now()"))
+            # 스케줄러 워커별 갱신 대상 임대 컬럼
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS leased_by VARCHAR"))
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ"))
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS snippet_etag VARCHAR"))
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS snippet_refreshed_at TIMESTAMPTZ"))
+            # 목록 keyset 페이지네이션용 인덱스 (/shorts/me, /shorts/by-hashtag)
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_shorts_user_created_id ON shorts (user_id, created_at, id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_shorts_view_count_id ON shorts (view_count, id)"))
+            # 해시태그별 목록용 조회수 사본 컬럼과 (hashtag, view_count, shorts_id) 인덱스
+            crud.add_hashtag_view_count_column(conn)
             conn.commit()
             print("Startup: Database schema updated (columns added if missing).")
         except Exception as e:
             print(f"Startup: Database schema update failed: {e}")
+    if vote_buffer is not None:
+        vote_buffer.start()
 
-app = FastAPI(
-    title="쇼츠 조회수 확인 API",
-)
+@app.on_event("startup")
+async def start_generation_tracker():
+    # 조회수/투표 세대 번호를 백그라운드에서 주기적으로 읽음 (워커 캐시, ETag 기준)
+    generation_tracker.start()
+    # write-behind 모드: 다른 워커가 반영한 투표를 알게 되면 캐시한 DB 투표수를 다시 읽음
+    if vote_buffer is not None:
+        generation_tracker.add_listener(vote_buffer.on_generation_change)
+    # 세대 번호 변경을 실시간 구독자(/shorts/live)에게 전달
+    live_hub.start()
 
-app.include_router(user_router.router)
+@app.on_event("shutdown")
+async def shutdown_event():
+    # write-behind 모드: 아직 반영하지 않은 투표를 모두 DB에 반영한 뒤 종료
+    if vote_buffer is not None:
+        vote_buffer.stop()
+    password_hasher.shutdown()
+    await live_hub.stop()
+    await generation_tracker.stop()
+    await dispose_async_engine()
 
 # CORS 설정 추가 (프론트엔드 연동을 위해 필수)
 app.add_middleware(
@@ -38,8 +85,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 브라우저에서 다음 페이지 커서와 ETag를 읽을 수 있도록
+    expose_headers=[pagination.NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# 라우트별 응답 시간, 요청당 SQL 실행 수/시간 (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -47,11 +99,24 @@ def get_db():
     finally:
         db.close()
 
+def _history_range(start: Optional[datetime], end: Optional[datetime]) -> tuple[datetime, datetime]:
+    """시계열 조회 구간 기본값 채우기 (시간대가 없으면 UTC로 간주)"""
+    now = datetime.now(timezone.utc)
+    end = end or now
+    start = start or end - timedelta(hours=24)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start > end:
+        raise HTTPException(status_code=400, detail="시작 시각이 끝 시각보다 늦습니다.")
+    return start, end
+
 @app.post("/shorts", response_model=schemas.Shorts, status_code=status.HTTP_201_CREATED)
 def create_shorts_entry(
     shorts_request: schemas.ShortsCreateRequest,
     db: Session = Depends(get_db),
-    current_user: user_models.User = Depends(get_current_user)
+    current_user: user_schemas.UserResponse = Depends(get_current_user)
 ):
     # URL 파싱
     video_id = services.parse_video_id(url=shorts_request.url)
@@ -65,15 +130,46 @@ def create_shorts_entry(
         fetch_views=True,
         user_id=current_user.id
     )
+    generation_tracker.invalidate()
     return db_shorts
 
-@app.get("/shorts/me", response_model=List[schemas.Shorts])
-def get_my_shorts(
+@app.post("/shorts/bulk", response_model=schemas.ShortsBulkResponse)
+def create_shorts_bulk_entry(
+    bulk_request: schemas.ShortsBulkCreateRequest,
     db: Session = Depends(get_db),
-    current_user: user_models.User = Depends(get_current_user)
+    current_user: user_schemas.UserResponse = Depends(get_current_user)
+):
+    """
+    여러 쇼츠를 한 번에 등록 (최대 500개, YouTube 조회는 50개씩 묶어서 호출)
+    URL별 결과(status: created, exists, duplicate, rejected, invalid_url, error)를 요청 순서대로 반환
+    """
+    result = crud.create_shorts_bulk(
+        db=db,
+        urls=bulk_request.urls,
+        hashtags=bulk_request.hashtags,
+        user_id=current_user.id,
+    )
+    generation_tracker.invalidate()
+    return result
+
+@app.get("/shorts/me", response_model=List[schemas.Shorts])
+async def get_my_shorts(
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_schemas.UserResponse = Depends(get_current_user)
 ):
-    """내가 등록한 쇼츠 목록 조회"""
-    return crud.get_shorts_by_user(db=db, user_id=current_user.id)
+    """
+    내가 등록한 쇼츠 목록 조회 (최신순, limit개씩)
+    다음 페이지가 있으면 X-Next-Cursor 헤더의 값을 cursor로 넘겨서 이어서 조회
+    """
+    after = pagination.decode_cursor(cursor, datetime, int) if cursor else None
+    shorts_list = await async_crud.get_shorts_by_user(db=db, user_id=current_user.id, limit=limit, after=after)
+    if len(shorts_list) == limit:
+        last = shorts_list[-1]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last.created_at, last.id)
+    return shorts_list
 
 # 조회수 높은 순으로 쇼츠 목록 반환
 # @app.get("/shorts", response_model=List[schemas.Shorts])
@@ -81,59 +177,165 @@ def get_my_shorts(
 #     shorts_list = crud.get_shorts_by_views(db=db, limit=limit)
 #     return shorts_list
 
-@app.get("/shorts/compare", response_model=List[schemas.HashtagStat])
-def compare_hashtag_stats(
+@app.get("/shorts/compare", response_model=List[schemas.HashtagStat], dependencies=[http_cache.conditional(http_cache.VIEWS)])
+async def compare_hashtag_stats(
     tags: List[str] = Query(..., alias="tag"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     #호출 예시: GET http://localhost:3000/shorts/compare?tag=movie1&tag=movie2
     # 태그별 조회수 통계 반환
-    stats = crud.get_stats_for_hashtags(db=db, tags=tags)
+    stats = await async_crud.get_stats_for_hashtags(db=db, tags=tags)
     return stats
 
-@app.get("/shorts/by-hashtag", response_model=List[schemas.Shorts])
-def get_shorts_by_hashtag_endpoint(
+@app.get("/shorts/by-hashtag", response_model=List[schemas.Shorts], dependencies=[http_cache.conditional(http_cache.VIEWS)])
+async def get_shorts_by_hashtag_endpoint(
+    response: Response,
     tag: str = Query(..., description="해시태그"),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """해시태그별 쇼츠 목록 조회"""
+    """
+    해시태그별 쇼츠 목록 조회 (조회수 높은 순)
+    첫 페이지는 워커 메모리의 상위 N개 캐시에서 응답하고, 다음 페이지는 X-Next-Cursor 헤더의 값을 cursor로 넘겨 조회
+    """
     # 호출 예시: GET http://localhost:3000/shorts/by-hashtag?tag=귀멸의칼날
-    shorts_list = crud.get_shorts_by_hashtag(db=db, tag=tag, limit=limit)
+    if cursor:
+        after = pagination.decode_cursor(cursor, int, int)
+        shorts_list = await async_crud.get_shorts_by_hashtag(db=db, tag=tag, limit=limit, after=after)
+    else:
+        shorts_list = await leaderboard_cache.get(
+            db, tag, limit, lambda db, tag, n: async_crud.get_shorts_by_hashtag(db=db, tag=tag, limit=n)
+        )
+    if len(shorts_list) == limit:
+        last = shorts_list[-1]
+        response.headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last.view_count, last.id)
     return shorts_list
 
-@app.get("/shorts/votes", response_model=List[schemas.HashtagVoteResponse])
-def get_votes_endpoint(
-    tags: List[str] = Query(..., alias="tag"),
+@app.get("/shorts/by-hashtag/history", response_model=schemas.StatsSeries)
+def get_hashtag_history_endpoint(
+    tag: str = Query(..., description="해시태그"),
+    start: Optional[datetime] = Query(None, description="시작 시각 (기본: 24시간 전)"),
+    end: Optional[datetime] = Query(None, description="끝 시각 (기본: 현재)"),
     db: Session = Depends(get_db)
+):
+    """
+    해시태그별 합계 조회수/좋아요 수 시계열 (구간 길이에 맞는 해상도 하나만 조회)
+    호출 예시: GET http://localhost:3000/shorts/by-hashtag/history?tag=귀멸의칼날&start=2024-01-01T00:00:00Z
+    """
+    start, end = _history_range(start, end)
+    return crud.get_hashtag_history(db, tag, start, end)
+
+@app.get("/shorts/export")
+def export_shorts_endpoint(
+    format: str = Query(export.NDJSON, pattern=f"^({export.NDJSON}|{export.CSV})$", description="ndjson 또는 csv"),
+    tag: Optional[str] = Query(None, description="해시태그 (없으면 전체)"),
+    start: Optional[datetime] = Query(None, description="등록 시각 시작 (포함)"),
+    end: Optional[datetime] = Query(None, description="등록 시각 끝 (제외)"),
+):
+    """
+    쇼츠 목록 전체를 id 순으로 스트리밍 내보내기 (분석용)
+    호출 예시: GET http://localhost:3000/shorts/export?format=csv&tag=귀멸의칼날&start=2024-01-01T00:00:00Z
+    """
+    start, end = export.check_range(start, end)
+    return StreamingResponse(
+        export.iter_export(format, tag, start, end),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="shorts.{format}"'},
+    )
+
+@app.get("/shorts/live")
+async def live_updates_endpoint(
+    tags: List[str] = Query(..., alias="tag"),
+    interval: float = Query(live.LIVE_INTERVAL_SECONDS, ge=live.LIVE_MIN_INTERVAL_SECONDS, le=60, description="최소 전송 간격(초)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    해시태그별 투표수/합계 조회수 실시간 구독 (Server-Sent Events)
+    처음에 현재 값을 보내고, 이후 값이 바뀔 때마다 interval초에 한 번까지 votes/stats 이벤트로 전송
+    (data 형식은 GET /shorts/votes, GET /shorts/compare 응답과 같음)
+    호출 예시: GET http://localhost:3000/shorts/live?tag=연세대&tag=고려대
+    """
+    clean_tags = list(dict.fromkeys(t.strip().lstrip('#') for t in tags))
+    if not all(clean_tags) or len(clean_tags) > live.LIVE_MAX_TAGS:
+        raise HTTPException(status_code=400, detail=f"해시태그는 1~{live.LIVE_MAX_TAGS}개까지 구독할 수 있습니다.")
+    initial = await live_hub.snapshot(db, clean_tags)
+    # 스트림이 끝날 때까지 DB 연결을 잡고 있지 않도록 먼저 반환
+    await db.close()
+    subscriber = live_hub.subscribe(clean_tags, interval, initial)
+    return StreamingResponse(
+        live_hub.stream(subscriber),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 응답을 모아 두지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/shorts/votes", response_model=List[schemas.HashtagVoteResponse], dependencies=[http_cache.conditional(http_cache.VOTES)])
+async def get_votes_endpoint(
+    tags: List[str] = Query(..., alias="tag"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     여러 해시태그의 투표수 조회
     호출 예시: GET http://localhost:3000/shorts/votes?tag=연세대&tag=고려대
     """
-    return crud.get_votes_for_hashtags(db, tags)
+    votes = await async_crud.get_votes_for_hashtags(db, tags)
+    if vote_buffer is not None:
+        # 이 워커에서 아직 DB에 반영하지 않은 투표도 포함
+        vote_buffer.with_pending(votes)
+    return votes
 
 @app.delete("/shorts/vote", response_model=schemas.HashtagVoteResponse)
-def cancel_vote_endpoint(
+async def cancel_vote_endpoint(
     tag: str = Query(..., description="취소할 해시태그"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     특정 해시태그 투표 취소 (-1)
     호출 예시: DELETE http://localhost:3000/shorts/vote?tag=귀멸의칼날
     """
-    return crud.cancel_vote(db, tag)
+    clean = tag.strip().lstrip('#')
+    if vote_buffer is not None:
+        vote = await vote_buffer.add(db, clean, -1)
+    else:
+        vote = await async_crud.cancel_vote(db, tag)
+        # 이 워커의 다음 /shorts/votes 요청이 바뀐 ETag로 응답하도록
+        generation_tracker.invalidate()
+    live_hub.notify(generations.VOTES, [clean])
+    return vote
 
 
 @app.put("/shorts/{video_id}/refresh", response_model=schemas.Shorts)
 def refresh_shorts_views(video_id: str, db: Session = Depends(get_db)):
     """특정 영상의 조회수를 즉시 업데이트"""
-    return crud.update_shorts_views(db=db, video_id=video_id)
+    db_shorts = crud.update_shorts_views(db=db, video_id=video_id)
+    generation_tracker.invalidate()
+    return db_shorts
 
-@app.get("/shorts/{video_id}", response_model=schemas.Shorts)
-def get_shorts_by_video_id_endpoint(video_id: str, db: Session = Depends(get_db)):
-    """특정 영상 정보 조회"""
+@app.get("/shorts/{video_id}/history", response_model=schemas.StatsSeries)
+def get_shorts_history_endpoint(
+    video_id: str,
+    start: Optional[datetime] = Query(None, description="시작 시각 (기본: 24시간 전)"),
+    end: Optional[datetime] = Query(None, description="끝 시각 (기본: 현재)"),
+    db: Session = Depends(get_db)
+):
+    """
+    특정 영상의 조회수/좋아요 수 시계열 (gained_views: 구간 동안 늘어난 조회수)
+    호출 예시: GET http://localhost:3000/shorts/VIDEO_ID/history
+    """
     db_shorts = crud.get_shorts_by_video_id(db=db, video_id=video_id)
+    if not db_shorts:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="등록된 영상을 찾을 수 없습니다."
+        )
+    start, end = _history_range(start, end)
+    return crud.get_shorts_history(db, db_shorts, start, end)
+
+@app.get("/shorts/{video_id}", response_model=schemas.Shorts, dependencies=[http_cache.conditional(http_cache.VIEWS)])
+async def get_shorts_by_video_id_endpoint(video_id: str, db: AsyncSession = Depends(get_async_db)):
+    """특정 영상 정보 조회"""
+    db_shorts = await async_crud.get_shorts_by_video_id(db=db, video_id=video_id)
     if not db_shorts:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -141,6 +343,45 @@ def get_shorts_by_video_id_endpoint(video_id: str, db: Session = Depends(get_db)
         )
     return db_shorts
 
+@app.get("/scheduler/queue", response_model=List[schemas.RefreshTierStat])
+def get_refresh_queue(db: Session = Depends(get_db)):
+    """
+    조회수 갱신 대기열 상태 (우선순위별 영상 수, 대기 수, 최대 지연 시간)
+    호출 예시: GET http://localhost:3000/scheduler/queue
+    """
+    return crud.get_refresh_queue_stats(db)
+
+@app.get("/internal/stats", dependencies=[Depends(require_internal)], include_in_schema=False)
+def get_internal_stats():
+    """
+    이 API 워커 프로세스의 캐시/커넥션 풀 상태 (히트율, 사용 중 연결 수, 연결 대기 시간 등)
+    youtube: 이 프로세스의 차단기 상태와 오늘의 공용 YouTube 할당량 사용량
+    INTERNAL_API_TOKEN을 설정한 경우에만 제공 (Authorization: Bearer <INTERNAL_API_TOKEN>)
+    호출 예시: GET http://localhost:3000/internal/stats
+    """
+    return {
+        "leaderboard": leaderboard_cache.stats(),
+        "votes": vote_buffer.stats() if vote_buffer is not None else {"enabled": False},
+        "http_cache": http_cache.stats(),
+        "live": live_hub.stats(),
+        "users": user_cache.stats(),
+        "video_lookup": video_lookup.stats(),
+        "youtube": {"circuit": circuit_breaker.stats(), "quota": quota_ledger.usage()},
+        "passwords": password_hasher.stats(),
+        "pool": pool_stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_internal)], include_in_schema=False)
+def get_metrics():
+    """
+    이 API 워커 프로세스의 지표 (Prometheus 텍스트 형식)
+    라우트별 응답 시간, 요청당 SQL 수/시간, 커넥션 풀, YouTube 호출 수/지연 시간/예상 할당량
+    (gunicorn 워커마다 따로 집계되므로 워커별로 수집하거나 합산해서 볼 것)
+    INTERNAL_API_TOKEN을 설정한 경우에만 제공 (Prometheus scrape 설정의 bearer 토큰으로 지정)
+    호출 예시: GET http://localhost:3000/metrics
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/")
 def read_root():
     return {"message": "API 서버가 실행 중입니다."}
@@ -149,9 +390,9 @@ def read_root():
 
 
 @app.post("/shorts/vote", response_model=schemas.HashtagVoteResponse, status_code=status.HTTP_201_CREATED)
-def vote_hashtag_endpoint(
+async def vote_hashtag_endpoint(
     tag: str = Query(..., description="투표할 해시태그"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     
     """
@@ -163,7 +404,14 @@ def vote_hashtag_endpoint(
     if not clean:
         raise HTTPException(status_code=400, detail="해시태그가 비어 있습니다.")
 
-    return crud.vote_hashtag(db, clean)
-    return crud.vote_hashtag(db, tag)
+    if vote_buffer is not None:
+        vote = await vote_buffer.add(db, clean, 1)
+    else:
+        vote = await async_crud.vote_hashtag(db, clean)
+        # 이 워커의 다음 /shorts/votes 요청이 바뀐 ETag로 응답하도록
+        generation_tracker.invalidate()
+    # 이 워커의 실시간 구독자에게 바로 알림 (다른 워커는 세대 번호 변경으로 알게 됨)
+    live_hub.notify(generations.VOTES, [clean])
+    return vote
 
 
@@ -0,0 +1,172 @@
+import bisect
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 대기/지연 시간(초) 히스토그램의 기본 구간 경계
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 개수(요청당 쿼리 수 등) 히스토그램의 구간 경계
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    프로세스 안에서 값을 구간별로 세는 히스토그램 (스레드 안전)
+    snapshot()의 buckets는 Prometheus와 같이 le(이하) 기준 누적 개수
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = {}
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"buckets": cumulative, "count": count, "sum": total}
+
+
+class Counter:
+    """증가만 하는 값 (스레드 안전)"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """임의로 바뀌는 현재 값"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Family:
+    """
+    같은 이름/라벨 이름을 가진 지표 묶음 - labels(값...)로 라벨 조합별 지표를 꺼냄
+    라벨이 없으면 labels()가 지표 하나를 돌려줌
+    """
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Tuple[str, ...], factory: Callable):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = labelnames
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+_registry: Dict[str, Family] = {}
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def _register(name: str, help: str, kind: str, labelnames: Iterable[str], factory: Callable) -> Family:
+    # 같은 이름으로 다시 등록하면 기존 묶음을 돌려줌 (모듈 재로딩 대비)
+    if name not in _registry:
+        _registry[name] = Family(name, help, kind, tuple(labelnames), factory)
+    return _registry[name]
+
+
+def counter(name: str, help: str, labelnames: Iterable[str] = ()) -> Family:
+    return _register(name, help, "counter", labelnames, Counter)
+
+
+def gauge(name: str, help: str, labelnames: Iterable[str] = ()) -> Family:
+    return _register(name, help, "gauge", labelnames, Gauge)
+
+
+def histogram(name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Family:
+    return _register(name, help, "histogram", labelnames, lambda: Histogram(buckets))
+
+
+def add_collector(collector: Callable[[], Iterable[Family]]) -> None:
+    """출력할 때마다 호출해 현재 값으로 채운 지표 묶음을 돌려주는 함수 등록 (커넥션 풀 상태 등)"""
+    _collectors.append(collector)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _render_family(family: Family) -> List[str]:
+    lines = [f"# HELP {family.name} {family.help}", f"# TYPE {family.name} {family.kind}"]
+    for values, metric in sorted(family.items()):
+        if family.kind == "histogram":
+            snapshot = metric.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f"{family.name}_bucket{_labels(family.labelnames, values, ('le', bound))} {count}")
+            lines.append(f"{family.name}_sum{_labels(family.labelnames, values)} {_number(snapshot['sum'])}")
+            lines.append(f"{family.name}_count{_labels(family.labelnames, values)} {snapshot['count']}")
+        else:
+            lines.append(f"{family.name}{_labels(family.labelnames, values)} {_number(metric.value)}")
+    return lines
+
+
+def render() -> str:
+    """이 프로세스의 모든 지표를 Prometheus 텍스트 형식으로 출력"""
+    families = list(_registry.values())
+    for collector in _collectors:
+        families.extend(collector())
+    lines: List[str] = []
+    for family in families:
+        lines.extend(_render_family(family))
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str) -> None:
+    """
+    node_exporter textfile collector용 파일로 저장 (스케줄러처럼 스크레이프할 수 없는 프로세스용)
+    임시 파일에 쓴 뒤 rename하므로 읽는 쪽이 쓰다 만 파일을 보지 않음
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
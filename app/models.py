@@ -1,8 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, func, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, func, BigInteger, ForeignKey, Float, SmallInteger, Sequence
 from sqlalchemy.orm import relationship
-from sqlalchemy.schema import UniqueConstraint
+from sqlalchemy.schema import UniqueConstraint, Index
 from app.database import Base
 
+# 조회수 데이터 세대 번호 - 스케줄러/등록/갱신이 커밋한 뒤 nextval로 올리고, API 워커의 캐시는 값이 바뀌면 무효화
+# (시퀀스는 트랜잭션과 무관하게 바로 반영되고 행 잠금이 없어 쓰기 경합이 생기지 않음)
+views_generation_seq = Sequence("shorts_views_generation_seq", metadata=Base.metadata)
+# 투표 데이터 세대 번호 - 투표 반영을 커밋한 뒤 올림 (/shorts/votes 응답의 ETag에 사용)
+votes_generation_seq = Sequence("hashtag_votes_generation_seq", metadata=Base.metadata)
+
 class Shorts(Base):
     __tablename__ = "shorts"
     
@@ -26,9 +32,119 @@ class Shorts(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     owner = relationship("app.user.models.User", back_populates="shorts")
 
+    # 목록 keyset 페이지네이션용 - 깊은 페이지도 첫 페이지와 같은 비용으로 조회
+    # (기존 DB에는 main.py startup_event에서 CREATE INDEX IF NOT EXISTS로 추가)
+    __table_args__ = (
+        Index("ix_shorts_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_shorts_view_count_id", "view_count", "id"),
+    )
+
+class ShortsHashtag(Base):
+    """
+    영상 ↔ 해시태그(정규형) 연결 테이블
+    Shorts.hashtags 문자열과 항상 같은 내용을 유지하며, 해시태그 검색은 이 테이블의 인덱스를 사용
+    """
+    __tablename__ = "shorts_hashtags"
+
+    # PK 순서 (hashtag, shorts_id): 해시태그 → 영상 조회가 PK 인덱스를 그대로 사용
+    hashtag = Column(String, primary_key=True)
+    shorts_id = Column(Integer, ForeignKey("shorts.id", ondelete="CASCADE"), primary_key=True, index=True)
+    # Shorts.view_count 사본 - 영상 조회수를 바꾸는 곳에서 같은 트랜잭션으로 함께 갱신
+    view_count = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    # 해시태그별 조회수 순 목록 - 태그 범위만 역순으로 읽고 limit개에서 멈춤 (인기 태그도 전체 영상을 훑지 않음)
+    # (기존 DB에는 main.py startup_event에서 CREATE INDEX IF NOT EXISTS로 추가)
+    __table_args__ = (
+        Index("ix_shorts_hashtags_tag_views", "hashtag", "view_count", "shorts_id"),
+    )
+
+class HashtagStats(Base):
+    """
+    해시태그별 조회수/좋아요/영상 수 집계 (#filmchain 해시태그가 있는 영상만 집계)
+    영상이 변경될 때마다 증감분(delta)으로 갱신되며, /shorts/compare는 이 테이블만 조회
+    """
+    __tablename__ = "hashtag_stats"
+
+    hashtag = Column(String, primary_key=True)
+    total_views = Column(BigInteger, nullable=False, default=0)
+    total_likes = Column(BigInteger, nullable=False, default=0)
+    shorts_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ShortsRefreshState(Base):
+    """
+    영상별 조회수 갱신 스케줄 상태 (scheduler.refresh_policy 참고)
+    스케줄러는 next_due_at이 지난 영상을 우선순위 순으로, 시간당 할당량 안에서만 갱신
+    여러 스케줄러 워커는 FOR UPDATE SKIP LOCKED로 서로 다른 행을 임대(leased_by, lease_expires_at)해 나눠 갱신
+    """
+    __tablename__ = "shorts_refresh_state"
+    __table_args__ = (
+        # 갱신 대상 조회: 우선순위 → 예정 시각 순으로 인덱스를 그대로 읽음
+        Index("ix_shorts_refresh_state_queue", "priority", "next_due_at", "shorts_id"),
+    )
+
+    shorts_id = Column(Integer, ForeignKey("shorts.id", ondelete="CASCADE"), primary_key=True)
+    # 0: hot, 1: warm, 2: cold
+    priority = Column(SmallInteger, nullable=False, default=0)
+    next_due_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_refreshed_at = Column(DateTime(timezone=True), nullable=True)
+    # 최근 시간당 조회수 증가량 (지수이동평균)
+    view_velocity = Column(Float, nullable=True)
+    # 이 영상을 갱신 중인 스케줄러 워커와 임대 만료 시각 (만료되면 다른 워커가 가져감)
+    # (기존 DB에는 main.py startup_event / update_views에서 ALTER TABLE로 추가)
+    leased_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # 마지막으로 제목/태그(snippet)까지 조회한 시각과 그때의 제목/설명/태그 해시 - 평소에는 조회수만 갱신하고 스니펫은 느린 주기로 확인
+    # (기존 DB에는 main.py startup_event / update_views에서 ALTER TABLE로 추가)
+    snippet_etag = Column(String, nullable=True)
+    snippet_refreshed_at = Column(DateTime(timezone=True), nullable=True)
+
+class YouTubeQuotaUsage(Base):
+    """
+    YouTube Data API 일일 할당량 사용량과 공용 토큰 버킷 (API 워커와 스케줄러가 함께 사용, scheduler.youtube_quota 참고)
+    day는 할당량이 초기화되는 시간대(태평양 시간) 기준 날짜, 호출 전에 units_used를 올려 예약하므로 한도를 넘지 않음
+    """
+    __tablename__ = "youtube_quota_usage"
+
+    day = Column(Date, primary_key=True)
+    units_used = Column(BigInteger, nullable=False, default=0)
+    # 토큰 버킷 - 남은 토큰과 마지막으로 채운 시각 (남은 할당량을 남은 시간에 나눠 채움)
+    tokens = Column(Float, nullable=False, default=0)
+    refilled_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class ShortsStatsHistory(Base):
+    """
+    영상별 조회수/좋아요 수 시계열 (값이 바뀔 때만 기록)
+    resolution 0: 원본, 1: 시간 단위, 2: 일 단위 - scheduler.rollup_history가 원본을 시간/일 단위로 요약
+    """
+    __tablename__ = "shorts_stats_history"
+    __table_args__ = (
+        Index("ix_shorts_stats_history_resolution_ts", "resolution", "ts"),
+    )
+
+    shorts_id = Column(Integer, ForeignKey("shorts.id", ondelete="CASCADE"), primary_key=True)
+    resolution = Column(SmallInteger, primary_key=True)
+    ts = Column(DateTime(timezone=True), primary_key=True)
+    view_count = Column(BigInteger, nullable=False)
+    like_count = Column(BigInteger, nullable=False)
+
+class HashtagStatsHistory(Base):
+    """해시태그별 집계(hashtag_stats) 시계열 - ShortsStatsHistory와 같은 방식으로 기록/요약"""
+    __tablename__ = "hashtag_stats_history"
+    __table_args__ = (
+        Index("ix_hashtag_stats_history_resolution_ts", "resolution", "ts"),
+    )
+
+    hashtag = Column(String, primary_key=True)
+    resolution = Column(SmallInteger, primary_key=True)
+    ts = Column(DateTime(timezone=True), primary_key=True)
+    view_count = Column(BigInteger, nullable=False)
+    like_count = Column(BigInteger, nullable=False)
+
 class HashtagVote(Base):
     __tablename__ = "hastag_votes"
 
     id = Column(Integer, primary_key=True, index=True)
     hashtag = Column(String, unique=True, index=True, nullable=False)
-    vote_count = Column(Integer, default=0)
\ No newline at end of file
+    vote_count = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
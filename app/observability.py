@@ -0,0 +1,94 @@
+import os
+import secrets
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app import metrics
+from app.database import request_queries
+
+# 운영용 엔드포인트(/metrics, /internal/stats) 접근 토큰 - Authorization: Bearer <토큰>으로 호출
+# 설정하지 않으면 두 엔드포인트는 404 (스케줄러 데몬의 SCHEDULER_HEALTH_PORT /metrics도 같은 토큰 사용)
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+_internal_bearer = HTTPBearer(auto_error=False)
+
+_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Time until response headers were sent", ["method", "route", "status"],
+)
+_request_queries = metrics.histogram(
+    "http_request_db_queries", "SQL statements executed per request", ["method", "route"], metrics.COUNT_BUCKETS,
+)
+_request_query_seconds = metrics.histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request", ["method", "route"],
+)
+
+
+def internal_token_status(token: Optional[str]) -> Optional[int]:
+    """Bearer 토큰 검사 - 통과하면 None, 아니면 응답할 상태 코드 (토큰 미설정 404, 불일치 401)"""
+    if not INTERNAL_API_TOKEN:
+        return status.HTTP_404_NOT_FOUND
+    if token is None or not secrets.compare_digest(token.encode(), INTERNAL_API_TOKEN.encode()):
+        return status.HTTP_401_UNAUTHORIZED
+    return None
+
+
+def require_internal(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_internal_bearer)) -> None:
+    """운영용 엔드포인트 의존성 - INTERNAL_API_TOKEN과 같은 Bearer 토큰만 허용"""
+    error = internal_token_status(credentials.credentials if credentials else None)
+    if error == status.HTTP_404_NOT_FOUND:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if error is not None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _route(scope) -> str:
+    # 실제 경로 대신 라우트 템플릿(/shorts/{video_id})을 라벨로 사용 (라벨 종류가 무한히 늘지 않도록)
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """
+    라우트별 응답 시간과 요청당 SQL 실행 수/시간을 기록하는 ASGI 미들웨어
+    - 응답 시간은 응답 헤더를 보낸 시점까지 (스트리밍/SSE 응답의 본문 전송 시간은 포함하지 않음)
+    - SQL은 요청이 끝날 때까지 (스트리밍 본문을 만드는 중 실행한 쿼리 포함)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = [0, 0.0]
+        token = request_queries.set(queries)
+        started = time.perf_counter()
+        responded = False
+
+        async def send_with_metrics(message):
+            nonlocal responded
+            if message["type"] == "http.response.start" and not responded:
+                responded = True
+                _request_seconds.labels(scope["method"], _route(scope), message["status"]).observe(
+                    time.perf_counter() - started
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            request_queries.reset(token)
+            route = _route(scope)
+            if not responded:
+                _request_seconds.labels(scope["method"], route, 500).observe(time.perf_counter() - started)
+            _request_queries.labels(scope["method"], route).observe(queries[0])
+            _request_query_seconds.labels(scope["method"], route).observe(queries[1])
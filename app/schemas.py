@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -6,6 +6,11 @@ class ShortsCreateRequest(BaseModel):
     url: str
     hashtags: Optional[str] = None
 
+class ShortsBulkCreateRequest(BaseModel):
+    # 여러 영상을 한 번에 등록 (hashtags는 모든 영상에 공통으로 요구하는 영화별 해시태그)
+    urls: List[str] = Field(..., min_length=1, max_length=500)
+    hashtags: Optional[str] = None
+
 class ShortsBase(BaseModel):
     video_id: str
     url: str
@@ -21,9 +26,43 @@ class Shorts(ShortsBase):
     class Config:
         from_attributes = True
 
+class ShortsBulkResult(BaseModel):
+    url: str
+    video_id: Optional[str] = None
+    # created | exists(이미 등록됨) | duplicate(요청 안에서 중복) | rejected(검증 실패) | invalid_url | error(YouTube 조회 실패)
+    status: str
+    detail: Optional[str] = None
+    shorts: Optional[Shorts] = None
+
+class ShortsBulkResponse(BaseModel):
+    created: int
+    results: List[ShortsBulkResult]
+
 class HashtagStat(BaseModel):
     hashtag: str
     total_views: int
+    total_likes: int = 0
+    shorts_count: int = 0
+
+class StatsPoint(BaseModel):
+    ts: datetime
+    view_count: int
+    like_count: int
+
+class StatsSeries(BaseModel):
+    resolution: str
+    points: List[StatsPoint]
+    gained_views: int
+    gained_likes: int
+
+class RefreshTierStat(BaseModel):
+    tier: str
+    total: int
+    due: int
+    # 스케줄러 워커가 임대해 갱신 중인 영상 수
+    leased: int = 0
+    max_lag_seconds: float
+    refresh_interval_seconds: int
 
 class HashtagVoteBase(BaseModel):
     hashtag: str
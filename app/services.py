@@ -1,6 +1,11 @@
+import unicodedata
+from typing import Optional, Set
 from urllib.parse import urlparse, parse_qs
 from fastapi import HTTPException, status
 
+# 집계/검색 대상 영상이 반드시 가지고 있어야 하는 공통 해시태그 (정규형)
+FILMCHAIN_TAG = "filmchain"
+
 def parse_video_id(url: str) -> str:
     """
     주어진 유튜브 URL에서 video_id를 추출합니다.
@@ -33,4 +38,56 @@ def parse_video_id(url: str) -> str:
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
         detail="유효한 유튜브 URL이 아닙니다."
-    )
\ No newline at end of file
+    )
+
+
+def normalize_hashtag(tag: str) -> str:
+    """
+    해시태그를 비교용 정규형으로 변환합니다.
+    예: ' #FilmChain' -> 'filmchain'
+    """
+    return unicodedata.normalize("NFC", tag.strip().lstrip('#')).lower()
+
+
+def split_hashtags(hashtags: Optional[str]) -> Set[str]:
+    """공백으로 구분된 해시태그 문자열("#tag1 #tag2")을 정규형 집합으로 변환"""
+    if not hashtags:
+        return set()
+    tags = (normalize_hashtag(t) for t in hashtags.split())
+    return {t for t in tags if t}
+
+
+def check_required_hashtags(youtube_hashtags: Optional[str], requested_hashtags: Optional[str]) -> Optional[str]:
+    """
+    YouTube 영상의 해시태그에 #filmchain과 요청한 영화별 해시태그가 모두 있는지 확인
+    문제가 없으면 None, 있으면 등록을 거절하는 이유(응답 메시지)를 반환
+    """
+    if youtube_hashtags is None:
+        # YouTube 해시태그가 없으면 에러
+        return "영상에 해시태그가 없습니다. YouTube 영상에 #filmchain과 영화별 해시태그를 추가해주세요."
+
+    # 해시태그 검증: #filmchain과 영화별 해시태그가 모두 있는지 확인
+    hashtag_set = set(youtube_hashtags.split())
+    has_filmchain = "#filmchain" in hashtag_set or "filmchain" in hashtag_set
+
+    if not requested_hashtags:
+        # 영화별 해시태그가 요청에 없으면 #filmchain만 확인
+        if not has_filmchain:
+            return "영상에 #filmchain 해시태그가 없습니다. YouTube 영상에 #filmchain 해시태그를 추가해주세요."
+        return None
+
+    # 영화별 해시태그 확인 (요청으로 받은 해시태그와 비교)
+    requested_tags = [t.strip().lstrip('#').lower() for t in requested_hashtags.split()]
+    youtube_tags = {tag.strip().lstrip('#').lower() for tag in hashtag_set}
+    missing_tags = []
+    if not has_filmchain:
+        missing_tags.append("#filmchain")
+    for req_tag in requested_tags:
+        if req_tag == 'filmchain':
+            continue
+        if req_tag not in youtube_tags:
+            missing_tags.append(f"#{req_tag}")
+
+    if missing_tags:
+        return f"영상에 필수 해시태그가 없습니다: {', '.join(missing_tags)}. YouTube 영상에 {', '.join(missing_tags)} 해시태그를 추가해주세요."
+    return None
@@ -0,0 +1,34 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.user import models, schemas
+from app.user.cache import user_cache
+from app.user.passwords import password_hasher
+
+# app/user/crud.py의 AsyncSession 버전 (bcrypt 해시/검증은 해시 전용 프로세스 풀에서 실행)
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return (await db.execute(
+        select(models.User).where(models.User.email == email).limit(1)
+    )).scalars().first()
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    hashed_password = await password_hasher.hash(user.password) if user.password else None
+    db_user = models.User(
+        email=user.email,
+        username=user.username,
+        picture=user.picture,
+        provider=user.provider,
+        password_hash=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    # 같은 이메일로 캐시된 인증 정보가 남아 있지 않도록
+    user_cache.invalidate(db_user.email)
+    return db_user
+
+async def update_password_hash(db: AsyncSession, db_user: models.User, password_hash: str):
+    """로그인 시 bcrypt cost가 바뀐 해시를 새 해시로 교체"""
+    db_user.password_hash = password_hash
+    await db.commit()
+    user_cache.invalidate(db_user.email)
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.user import schemas
+
+# 토큰별 인증 결과를 보관하는 시간(초) - 다른 워커에서 바뀐 사용자 정보는 최대 이 시간만큼 늦게 반영됨
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+# 보관할 최대 토큰 수 (초과하면 가장 오래 안 쓴 토큰부터 제거)
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+
+class UserCache:
+    """
+    API 워커 프로세스 안의 인증 사용자 캐시 (토큰 → 검증된 subject + 사용자 스냅샷)
+    - 항목은 TTL과 토큰 만료 시각(exp) 중 빠른 시점에 만료되므로 만료된 토큰을 통과시키지 않음
+    - LRU 방식으로 max_entries개까지만 보관
+    - 사용자 정보가 바뀌면 invalidate(email)로 해당 사용자의 모든 토큰 항목을 제거
+      (users 행을 바꾸는 곳은 모두 commit 뒤에 호출할 것 - 가입, 비밀번호 해시 교체, 이후 추가될 비밀번호 변경/탈퇴/비활성화 등)
+    - invalidate는 호출한 워커에만 적용되므로 다른 워커에서는 ttl초(USER_CACHE_TTL_SECONDS)까지 이전 스냅샷으로 인증될 수 있음
+      (즉시 차단이 필요하면 TTL을 줄이거나 토큰 만료 시간을 짧게 설정)
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        # token → (만료 시각(monotonic), email, 스냅샷)
+        self._entries: "OrderedDict[str, Tuple[float, str, schemas.UserResponse]]" = OrderedDict()
+        # email → 해당 사용자의 토큰들 (무효화용)
+        self._tokens_by_email: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _remove(self, token: str) -> None:
+        # 호출자가 self._lock을 잡고 있어야 함
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_email.get(entry[1])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_email[entry[1]]
+
+    def get(self, token: str) -> Optional[schemas.UserResponse]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, token: str, email: str, user, expires_at: Optional[float] = None) -> schemas.UserResponse:
+        """검증된 토큰의 사용자를 저장하고 스냅샷을 반환 (expires_at: 토큰의 exp, Unix 시각)"""
+        snapshot = schemas.UserResponse.model_validate(user)
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return snapshot
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (time.monotonic() + ttl, email, snapshot)
+            self._tokens_by_email.setdefault(email, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return snapshot
+
+    def invalidate(self, email: str) -> None:
+        """사용자 정보가 바뀌었을 때 해당 사용자의 캐시 항목을 모두 제거"""
+        with self._lock:
+            tokens = self._tokens_by_email.pop(email, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            if tokens:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+            }
+
+
+user_cache = UserCache()
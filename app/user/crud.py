@@ -1,9 +1,7 @@
 from sqlalchemy.orm import Session
 from app.user import models, schemas
-
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.user.cache import user_cache
+from app.user.passwords import pwd_context
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -26,4 +24,6 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    # 같은 이메일로 캐시된 인증 정보가 남아 있지 않도록
+    user_cache.invalidate(db_user.email)
     return db_user
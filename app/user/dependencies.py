@@ -1,45 +1,45 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.user import crud, models, router
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.user import async_crud, router
+from app.user.cache import user_cache
+from app.user.schemas import UserResponse
 from typing import Optional
 
 security = HTTPBearer()
 security_optional = HTTPBearer(auto_error=False)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    token = credentials.credentials
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def _user_from_token(token: str, db: AsyncSession) -> Optional[UserResponse]:
+    """토큰을 검증하고 사용자 스냅샷을 반환 (캐시에 있으면 JWT 검증과 DB 조회를 생략), 실패하면 None"""
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, router.SECRET_KEY, algorithms=[router.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            return None
     except JWTError:
-        raise credentials_exception
-    
-    user = crud.get_user_by_email(db, email=email)
+        return None
+
+    user = await async_crud.get_user_by_email(db, email=email)
     if user is None:
-        raise credentials_exception
+        return None
+    return user_cache.put(token, email, user, expires_at=payload.get("exp"))
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
+    user = await _user_from_token(credentials.credentials, db)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
-def get_current_user_optional(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional), db: Session = Depends(get_db)):
+async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional), db: AsyncSession = Depends(get_async_db)):
     if not credentials:
         return None
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, router.SECRET_KEY, algorithms=[router.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
-        return None
-    
-    user = crud.get_user_by_email(db, email=email)
-    return user
+    return await _user_from_token(credentials.credentials, db)
@@ -0,0 +1,132 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# bcrypt cost (2^rounds회 반복) - 바꾸면 기존 사용자는 다음 로그인 때 새 cost로 다시 해시됨
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 비밀번호 해시/검증 전용 프로세스 수 (API 워커 프로세스마다)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# 처리 중 + 대기 중인 해시 작업의 최대 개수 (초과하면 바로 503으로 거절)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+# 지연 시간 백분위를 계산할 최근 작업 수
+_LATENCY_SAMPLES = 1000
+
+# min/max_rounds를 기본 cost로 고정해 cost가 다른 해시는 verify_and_update가 새 해시를 돌려주게 함
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+# 아래 두 함수는 해시 전용 프로세스에서 실행됨 (결과와 함께 계산 시간(초)을 반환)
+def _hash(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - started
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    return pwd_context.verify_and_update(password, hashed), time.perf_counter() - started
+
+
+def _percentiles(samples) -> Dict[str, float]:
+    if not samples:
+        return {"p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99)}
+
+
+class PasswordHasher:
+    """
+    bcrypt 해시/검증을 별도 프로세스 풀에서 실행 (요청 스레드와 이벤트 루프, GIL을 점유하지 않음)
+    - 처리 중 + 대기 중인 작업이 max_pending개를 넘으면 기다리지 않고 503으로 거절 (로그인 폭주가 다른 API를 막지 않도록)
+    - 작업별 계산 시간(bcrypt 자체)과 전체 대기 시간(대기열 포함)의 백분위를 기록
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._compute = {"hash": deque(maxlen=_LATENCY_SAMPLES), "verify": deque(maxlen=_LATENCY_SAMPLES)}
+        self._total = {"hash": deque(maxlen=_LATENCY_SAMPLES), "verify": deque(maxlen=_LATENCY_SAMPLES)}
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # gunicorn 워커가 fork된 뒤 처음 필요할 때 생성, 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def _run(self, kind: str, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="요청이 많아 잠시 후 다시 시도해주세요.",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        started = time.perf_counter()
+        try:
+            result, compute = await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self._compute[kind].append(compute)
+            self._total[kind].append(time.perf_counter() - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(일치 여부, cost가 바뀌어 다시 만든 해시 또는 None)"""
+        valid, new_hash = await self._run("verify", _verify_and_update, password, hashed)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "rounds": BCRYPT_ROUNDS,
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                **{
+                    kind: {"compute": _percentiles(self._compute[kind]), "total": _percentiles(self._total[kind])}
+                    for kind in ("hash", "verify")
+                },
+            }
+
+
+password_hasher = PasswordHasher()
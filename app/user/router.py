@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.user import crud, schemas, models
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
+from app.user import async_crud, crud, schemas, models
+from app.user.passwords import password_hasher
 from google_auth_oauthlib.flow import Flow
 from google.oauth2 import id_token
 from google.auth.transport import requests
@@ -113,8 +115,8 @@ def callback_google(code: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=f"Authentication failed: {str(e)}")
 
 @router.post("/signup", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
-def signup(user: schemas.UserSignup, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def signup(user: schemas.UserSignup, db: AsyncSession = Depends(get_async_db)):
+    db_user = await async_crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -124,11 +126,11 @@ def signup(user: schemas.UserSignup, db: Session = Depends(get_db)):
         password=user.password,
         provider="local"
     )
-    return crud.create_user(db=db, user=user_create)
+    return await async_crud.create_user(db=db, user=user_create)
 
 @router.post("/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, email=user_credentials.email)
+async def login(user_credentials: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await async_crud.get_user_by_email(db, email=user_credentials.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -136,12 +138,18 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not user.password_hash or not crud.verify_password(user_credentials.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user.password_hash:
+        valid, new_hash = await password_hasher.verify_and_update(user_credentials.password, user.password_hash)
+    if not valid:
          raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # BCRYPT_ROUNDS가 바뀐 경우 새 cost로 다시 저장
+        await async_crud.update_password_hash(db, user, new_hash)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
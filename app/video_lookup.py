@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from scheduler import youtube_client
+from scheduler.youtube_quota import YouTubeUnavailable
+
+# 등록 검증용 YouTube 조회 결과를 보관하는 시간(초)
+# 거절된 URL을 바로 다시 제출해도 할당량을 쓰지 않음 (영상에 해시태그를 추가한 경우 최대 이 시간 뒤에 반영)
+VALIDATION_CACHE_TTL_SECONDS = float(os.getenv("VALIDATION_CACHE_TTL_SECONDS", "30"))
+VALIDATION_CACHE_MAX_ENTRIES = int(os.getenv("VALIDATION_CACHE_MAX_ENTRIES", "5000"))
+# videos.list 한 번에 조회할 수 있는 최대 ID 수
+YOUTUBE_BATCH_SIZE = 50
+
+
+class VideoLookup:
+    """
+    등록(POST /shorts) 검증용 YouTube 영상 정보 조회
+    - 같은 video_id를 동시에 조회하면 진행 중인 한 번의 호출 결과를 함께 사용 (single-flight)
+    - 조회 결과(찾지 못한 영상 포함)를 ttl초 동안 캐시, 호출 오류는 캐시하지 않음
+    - YouTube를 호출할 수 없으면(YouTubeUnavailable) 만료된 캐시 값이라도 있으면 그 값을 사용
+    - 여러 ID는 50개씩 묶어 호출
+    """
+
+    def __init__(self, ttl_seconds: float = VALIDATION_CACHE_TTL_SECONDS, max_entries: int = VALIDATION_CACHE_MAX_ENTRIES):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        # video_id → (만료 시각(monotonic), 영상 정보 또는 None(찾지 못함))
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict]]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.stale = 0
+        self.calls = 0
+
+    def _store(self, video_id: str, data: Optional[Dict], now: float) -> None:
+        # 호출자가 self._lock을 잡고 있어야 함
+        self._entries.pop(video_id, None)
+        self._entries[video_id] = (now + self.ttl, data)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, video_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """{video_id: 영상 정보 또는 None(찾지 못함)}, YouTube 호출이 실패하면 예외를 그대로 전달"""
+        result: Dict[str, Optional[Dict]] = {}
+        waiting: Dict[str, Future] = {}
+        owned: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for video_id in dict.fromkeys(video_ids):
+                entry = self._entries.get(video_id)
+                if entry is not None and entry[0] > now:
+                    self.hits += 1
+                    result[video_id] = entry[1]
+                elif video_id in self._in_flight:
+                    self.shared += 1
+                    waiting[video_id] = self._in_flight[video_id]
+                else:
+                    self.misses += 1
+                    future = Future()
+                    self._in_flight[video_id] = future
+                    waiting[video_id] = future
+                    owned.append(video_id)
+
+        # 이 호출이 맡은 ID만 조회하고, 같은 ID를 기다리는 다른 요청에 결과를 전달
+        for i in range(0, len(owned), YOUTUBE_BATCH_SIZE):
+            batch = owned[i : i + YOUTUBE_BATCH_SIZE]
+            try:
+                with self._lock:
+                    self.calls += 1
+                stats_map = youtube_client.fetch_video_stats(batch)
+            except Exception as e:
+                with self._lock:
+                    for video_id in owned[i:]:
+                        entry = self._entries.get(video_id)
+                        if isinstance(e, YouTubeUnavailable) and entry is not None:
+                            self.stale += 1
+                            self._in_flight.pop(video_id).set_result(entry[1])
+                        else:
+                            self._in_flight.pop(video_id).set_exception(e)
+                break
+            now = time.monotonic()
+            with self._lock:
+                for video_id in batch:
+                    data = stats_map.get(video_id)
+                    self._store(video_id, data, now)
+                    self._in_flight.pop(video_id).set_result(data)
+
+        for video_id, future in waiting.items():
+            result[video_id] = future.result()
+        return result
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        return self.get_many([video_id])[video_id]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses + self.shared
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "stale": self.stale,
+                "hit_ratio": (self.hits + self.shared) / total if total else 0.0,
+                "calls": self.calls,
+                "entries": len(self._entries),
+            }
+
+
+video_lookup = VideoLookup()
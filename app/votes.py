@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import async_crud, crud, schemas
+from app.database import SessionLocal
+from app.generations import VOTES
+
+# 1이면 투표를 워커 메모리에 모았다가 VOTE_FLUSH_INTERVAL_MS마다 한 번에 DB에 반영 (write-behind)
+VOTE_WRITE_BEHIND = os.getenv("VOTE_WRITE_BEHIND", "0") == "1"
+VOTE_FLUSH_INTERVAL_MS = int(os.getenv("VOTE_FLUSH_INTERVAL_MS", "200"))
+# 반영 속도(flushed_per_second)를 계산하는 구간(초)
+_RATE_WINDOW_SECONDS = 60
+
+
+class VoteBuffer:
+    """
+    투표 증감분을 워커 메모리에 해시태그별로 모아 두고 주기적으로 한 번의 트랜잭션으로 반영
+    - 요청은 DB 커밋을 기다리지 않으므로 처리량이 커밋 지연이 아닌 요청 수에 비례
+    - 반영에 실패한 증감분은 다시 모아서 다음 주기에 재시도
+    - stop()은 남은 증감분을 모두 반영한 뒤 종료 (서버 종료 시 호출)
+    - DB 투표수는 태그별로 캐시하되, 투표 세대 번호가 바뀌면(다른 워커의 반영 포함) 버리고 다시 읽음
+      (on_generation_change를 generation_tracker에 등록, 다른 워커의 투표는 세대 번호 갱신 간격만큼 늦게 보일 수 있음)
+    """
+
+    def __init__(self, interval_ms: int = VOTE_FLUSH_INTERVAL_MS, session_factory=SessionLocal):
+        self.interval = interval_ms / 1000
+        self.session_factory = session_factory
+        self._pending: Dict[str, int] = {}
+        # 마지막으로 DB에서 확인한 투표수
+        self._persisted: Dict[str, int] = {}
+        # 반영 중인(커밋 전) 증감분 - 반영이 끝나 _persisted에 들어갈 때까지 현재 투표수에 포함
+        self._flushing: Dict[str, int] = {}
+        # _persisted를 바꾸거나 비울 때마다 올림 (DB를 읽는 사이 바뀌었으면 읽은 값을 캐시하지 않음)
+        self._epoch = 0
+        self._lock = threading.Lock()
+        # 동시에 두 번 반영하지 않도록 (주기 반영과 종료 시 반영)
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flushed_log = deque()
+        self.flushed_votes = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+        # 아직 반영 안 된 증감분이 바뀔 때마다 올림 (/shorts/votes ETag에 포함)
+        self.version = 0
+
+    def on_generation_change(self, kind: str) -> None:
+        """투표 세대 번호가 바뀌면 캐시한 DB 투표수를 버림 (다음 투표 때 다시 읽음)"""
+        if kind != VOTES:
+            return
+        with self._lock:
+            self._persisted.clear()
+            self._epoch += 1
+
+    async def _persisted_count(self, db: AsyncSession, tag: str) -> Optional[int]:
+        with self._lock:
+            if tag in self._persisted:
+                return self._persisted[tag]
+            epoch = self._epoch
+        count = await async_crud.get_vote_count(db, tag)
+        if count is None:
+            return None
+        with self._lock:
+            # 읽는 사이 반영이 끝났거나 진행 중이면 반영 전/후 어느 값인지 알 수 없으므로 캐시하지 않음
+            if self._epoch == epoch and not self._flushing:
+                self._persisted[tag] = count
+        return count
+
+    async def add(self, db: AsyncSession, tag: str, delta: int) -> schemas.HashtagVoteResponse:
+        """증감분을 모으고 (DB 값 + 반영 중/아직 반영 안 된 증감분)을 현재 투표수로 반환"""
+        read = await self._persisted_count(db, tag)
+        with self._lock:
+            # 읽은 뒤 반영이 끝났으면 그 결과를 사용
+            persisted = self._persisted.get(tag, read)
+            pending = self._pending.get(tag, 0)
+            unflushed = pending + self._flushing.get(tag, 0)
+            if delta < 0 and persisted is None and unflushed <= 0:
+                # DB에 없는 경우 (예: 잘못된 태그)
+                raise HTTPException(status_code=404, detail="해시태그를 찾을 수 없습니다.")
+            current = (persisted or 0) + unflushed
+            if delta < 0 and current <= 0:
+                # 최소 0 이하로는 떨어지지 않게 방어
+                return schemas.HashtagVoteResponse(hashtag=tag, vote_count=0)
+            self._pending[tag] = pending + delta
+            self.version += 1
+            return schemas.HashtagVoteResponse(hashtag=tag, vote_count=current + delta)
+
+    def pending_delta(self, tag: str) -> int:
+        with self._lock:
+            return self._pending.get(tag, 0)
+
+    def with_pending(self, votes: List[schemas.HashtagVoteResponse]) -> List[schemas.HashtagVoteResponse]:
+        """DB에서 읽은 투표수에 이 워커에서 아직 반영하지 않은 증감분을 더함"""
+        for vote in votes:
+            vote.vote_count = max(vote.vote_count + self.pending_delta(vote.hashtag), 0)
+        return votes
+
+    def flush(self) -> int:
+        """모아 둔 증감분을 한 트랜잭션으로 반영하고, 반영한 투표 수(증감분 절댓값의 합)를 반환"""
+        with self._flush_lock:
+            with self._lock:
+                deltas = {tag: delta for tag, delta in self._pending.items() if delta}
+                self._pending.clear()
+                self._flushing = deltas
+            if not deltas:
+                return 0
+
+            started = time.perf_counter()
+            db = self.session_factory()
+            try:
+                counts = crud.apply_vote_deltas(db, deltas)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self.failures += 1
+                # 반영하지 못한 증감분은 다시 모아서 다음 주기에 재시도
+                with self._lock:
+                    self._flushing = {}
+                    for tag, delta in deltas.items():
+                        self._pending[tag] = self._pending.get(tag, 0) + delta
+                print(f"투표 반영 실패 (다음 주기에 재시도): {e}")
+                return 0
+            else:
+                with self._lock:
+                    self._persisted.update(counts)
+                    self._flushing = {}
+                    self._epoch += 1
+                # 이미 커밋했으므로 세대 번호를 올리지 못해도 증감분을 다시 모으지 않음
+                try:
+                    crud.bump_votes_generation(db)
+                except Exception as e:
+                    print(f"투표 세대 번호 갱신 실패: {e}")
+            finally:
+                db.close()
+
+            flushed = sum(abs(delta) for delta in deltas.values())
+            now = time.monotonic()
+            with self._lock:
+                self.flushed_votes += flushed
+                self.flushes += 1
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+                self._flushed_log.append((now, flushed))
+                while self._flushed_log and now - self._flushed_log[0][0] > _RATE_WINDOW_SECONDS:
+                    self._flushed_log.popleft()
+            return flushed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """주기 반영을 멈추고 남은 증감분을 모두 반영"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            window = sum(count for _, count in self._flushed_log)
+            return {
+                "enabled": True,
+                "pending_tags": len(self._pending),
+                "pending_votes": sum(abs(delta) for delta in self._pending.values()),
+                "flushed_votes": self.flushed_votes,
+                "flushes": self.flushes,
+                "failures": self.failures,
+                "last_flush_ms": self.last_flush_ms,
+                "flushed_per_second": window / _RATE_WINDOW_SECONDS,
+            }
+
+
+vote_buffer: Optional[VoteBuffer] = VoteBuffer() if VOTE_WRITE_BEHIND else None
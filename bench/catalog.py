@@ -0,0 +1,73 @@
+import bisect
+import random
+import time
+from typing import Dict, List, Optional
+
+# 합성 카탈로그 - 시드 데이터와 가짜 YouTube 서버가 같은 규칙으로 영상 정보를 만들어
+# 스케줄러가 읽은 해시태그가 DB와 어긋나지 않음 (조회수만 시간에 따라 늘어남)
+
+VIDEO_ID_PREFIX = "bn"
+FILMCHAIN = "#filmchain"
+
+
+def video_id(n: int) -> str:
+    # YouTube ID와 같은 11자
+    return f"{VIDEO_ID_PREFIX}{n:09d}"
+
+
+def video_number(video_id: str) -> Optional[int]:
+    if len(video_id) != 11 or not video_id.startswith(VIDEO_ID_PREFIX) or not video_id[2:].isdigit():
+        return None
+    return int(video_id[2:])
+
+
+class Catalog:
+    """
+    n번째 영상의 영화 해시태그를 Zipf 분포로 정함 (소수의 인기 영화에 영상이 몰리는 실제 분포와 비슷하게)
+    - 영상의 약 growing_ratio 비율만 조회수가 계속 늘어남 (나머지는 스케줄러가 '변경 없음'으로 처리)
+    """
+
+    def __init__(self, movies: int = 200, zipf_s: float = 1.1, growing_ratio: float = 0.3, seed: int = 0):
+        self.movies = [f"movie{i:04d}" for i in range(movies)]
+        weights = [1 / (rank + 1) ** zipf_s for rank in range(movies)]
+        total = sum(weights)
+        self._cumulative: List[float] = []
+        running = 0.0
+        for weight in weights:
+            running += weight / total
+            self._cumulative.append(running)
+        self.growing_ratio = growing_ratio
+        self.seed = seed
+        self.started = time.time()
+
+    def _rng(self, n: int) -> random.Random:
+        return random.Random(n * 1_000_003 + self.seed)
+
+    def movie(self, n: int) -> str:
+        r = self._rng(n).random()
+        return self.movies[min(bisect.bisect_left(self._cumulative, r), len(self.movies) - 1)]
+
+    def pick_movie(self, rng: random.Random) -> str:
+        """부하 생성용 - 영상 수에 비례하는 확률로 영화 하나를 고름"""
+        return self.movies[min(bisect.bisect_left(self._cumulative, rng.random()), len(self.movies) - 1)]
+
+    def hashtags(self, n: int) -> str:
+        return f"{FILMCHAIN} #{self.movie(n)}"
+
+    def base_views(self, n: int) -> int:
+        # 롱테일 조회수 분포
+        return int(self._rng(n).paretovariate(1.2) * 100)
+
+    def video(self, n: int, now: Optional[float] = None) -> Dict:
+        """시드/가짜 YouTube 공용 영상 정보 (fetch_video_stats 반환 형식과 같은 키)"""
+        rng = self._rng(n)
+        views = self.base_views(n)
+        if rng.random() < self.growing_ratio:
+            # 카탈로그를 만든 뒤 흐른 시간만큼 조회수 증가
+            views += int(((now or time.time()) - self.started) * (1 + n % 7))
+        return {
+            "view_count": views,
+            "like_count": views // 20,
+            "title": f"bench short {n}",
+            "hashtags": self.hashtags(n),
+        }
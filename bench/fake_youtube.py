@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from bench.catalog import Catalog, video_number
+
+
+class FakeYouTube:
+    """
+    YouTube Data API videos.list를 흉내 내는 로컬 HTTP 서버
+    API 서버/스케줄러에 YOUTUBE_API_ENDPOINT=url, YOUTUBE_API_KEY=아무 값 으로 연결하면
+    googleapiclient 호출/응답 파싱 경로를 그대로 거침 (실제 키와 할당량이 필요 없음)
+    - 응답마다 latency_ms(± jitter_ms) 만큼 지연
+    - 카탈로그 규칙의 ID(bn + 9자리 숫자)는 모두 존재하는 영상으로 응답, 그 외 ID는 찾지 못함
+    - part에 요청한 부분(statistics/snippet)만 응답하고, 항목마다 내용에서 계산한 etag를 붙임
+    - record_requests면 받은 요청의 쿼리 파라미터를 requests에 남김 (테스트용)
+    - fail_next()로 다음 응답들을 YouTube 형식의 오류 응답으로 바꿀 수 있음 (재시도/할당량 처리 테스트용)
+    """
+
+    def __init__(self, catalog: Catalog, latency_ms: float = 50, jitter_ms: float = 10, port: int = 0, record_requests: bool = False):
+        self.catalog = catalog
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.calls = 0
+        # 응답 본문 바이트 수 합계 (조회 범위별 응답 크기 비교용)
+        self.bytes_sent = 0
+        self.record_requests = record_requests
+        self.requests: List[Dict[str, str]] = []
+        # 다음 요청들에 보낼 오류 응답 (HTTP 상태, error.errors[].reason)
+        self._errors = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/"
+
+    def _item(self, vid: str, now: float, parts: set) -> Optional[dict]:
+        n = video_number(vid)
+        if n is None:
+            return None
+        video = self.catalog.video(n, now)
+        item = {"id": vid}
+        if "statistics" in parts:
+            item["statistics"] = {"viewCount": str(video["view_count"]), "likeCount": str(video["like_count"])}
+        if "snippet" in parts:
+            item["snippet"] = {
+                "title": video["title"],
+                "description": "",
+                "tags": [tag.lstrip("#") for tag in video["hashtags"].split()],
+            }
+        item["etag"] = hashlib.sha1(json.dumps(item, sort_keys=True).encode()).hexdigest()[:27]
+        return item
+
+    def fail_next(self, status: int, reason: str = "backendError", count: int = 1) -> None:
+        """다음 count번의 요청에 status 오류로 응답 (예: 503 backendError, 403 quotaExceeded)"""
+        with self._lock:
+            self._errors.extend([(status, reason)] * count)
+
+    def reset(self) -> None:
+        """호출 수, 기록한 요청, 남은 오류 응답을 비움"""
+        with self._lock:
+            self.calls = 0
+            self.bytes_sent = 0
+            self.requests.clear()
+            self._errors.clear()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                with fake._lock:
+                    fake.calls += 1
+                    if fake.record_requests:
+                        fake.requests.append({key: values[0] for key, values in query.items()})
+                    error = fake._errors.popleft() if fake._errors else None
+                time.sleep(max(0.0, fake.latency + random.uniform(-fake.jitter, fake.jitter)))
+                if error is not None:
+                    status, reason = error
+                    body = json.dumps({"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}).encode()
+                else:
+                    status = 200
+                    now = time.time()
+                    ids = [vid for vid in query.get("id", [""])[0].split(",") if vid]
+                    parts = set(query.get("part", ["statistics,snippet"])[0].split(","))
+                    items = [item for item in (fake._item(vid, now, parts) for vid in ids) if item is not None]
+                    body = json.dumps({"kind": "youtube#videoListResponse", "items": items}).encode()
+                with fake._lock:
+                    fake.bytes_sent += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> "FakeYouTube":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 YouTube videos.list 서버 (벤치마크/로컬 개발용)")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--movies", type=int, default=200)
+    args = parser.parse_args()
+
+    fake = FakeYouTube(Catalog(movies=args.movies), args.latency_ms, args.jitter_ms, args.port)
+    print(f"가짜 YouTube 서버: {fake.url} (YOUTUBE_API_ENDPOINT로 설정)")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
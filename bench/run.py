@@ -0,0 +1,240 @@
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+from sqlalchemy import text
+
+from app.database import engine
+from bench.catalog import Catalog, video_id
+from bench.fake_youtube import FakeYouTube
+from bench.seed import BENCH_EMAIL, BENCH_PASSWORD, seed
+
+# (메서드, 경로, JSON 본문 또는 None)
+Request = Tuple[str, str, Optional[dict]]
+# 벤치마크 중에는 공용 YouTube 할당량/토큰 버킷에 막히지 않도록 (가짜 서버라 할당량이 없음)
+UNLIMITED_QUOTA_ENV = {"YOUTUBE_DAILY_QUOTA_UNITS": str(10 ** 12), "YOUTUBE_BUCKET_CAPACITY": str(10 ** 12)}
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load(base_url: str, make_request: Callable[[random.Random], Request], concurrency: int, seconds: float,
+         headers: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """
+    concurrency개 스레드가 각자 keep-alive 연결로 seconds초 동안 요청을 반복 (닫힌 루프 부하)
+    반환: 요청 수, 오류 수(4xx/5xx/연결 오류), 처리량(req/s), 지연 시간 백분위(ms)
+    """
+    target = urlparse(base_url)
+    deadline = time.perf_counter() + seconds
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        nonlocal errors
+        rng = random.Random(index)
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        local: List[float] = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(rng)
+            request_headers = {**(headers or {}), "Content-Type": "application/json"}
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=request_headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+            local.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(ordered, 0.50),
+        "p90_ms": _percentile(ordered, 0.90),
+        "p99_ms": _percentile(ordered, 0.99),
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+def _scenarios(catalog: Catalog, shorts: int) -> Dict[str, Callable[[random.Random], Request]]:
+    new_ids = itertools.count(shorts)
+
+    def compare(rng):
+        return "GET", "/shorts/compare?" + urlencode([("tag", catalog.pick_movie(rng)), ("tag", catalog.pick_movie(rng))]), None
+
+    def by_hashtag(rng):
+        return "GET", "/shorts/by-hashtag?" + urlencode({"tag": catalog.pick_movie(rng), "limit": 100}), None
+
+    def vote(rng):
+        return "POST", "/shorts/vote?" + urlencode({"tag": catalog.pick_movie(rng)}), None
+
+    def create(rng):
+        # 카탈로그 다음 번호의 새 영상 (가짜 YouTube가 #filmchain + 영화 해시태그로 응답)
+        return "POST", "/shorts", {"url": f"https://youtu.be/{video_id(next(new_ids))}"}
+
+    return {"compare": compare, "by_hashtag": by_hashtag, "vote": vote, "create": create}
+
+
+def _start_server(port: int, workers: int, fake_url: str) -> subprocess.Popen:
+    env = {**os.environ, **UNLIMITED_QUOTA_ENV, "YOUTUBE_API_KEY": "bench", "YOUTUBE_API_ENDPOINT": fake_url}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("API 서버가 시작되지 않았습니다.")
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"API 서버({base_url})가 응답하지 않습니다.")
+
+
+def _login(port: int) -> str:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("POST", "/auth/login", body=json.dumps({"email": BENCH_EMAIL, "password": BENCH_PASSWORD}),
+                 headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(f"벤치마크 사용자 로그인 실패: {body}")
+    return body["access_token"]
+
+
+def run_update_views(fake_url: str) -> Dict[str, float]:
+    """모든 영상을 갱신 대상으로 만든 뒤 update_views 1회 실행 (할당량 제한 없이) 시간을 잼"""
+    os.environ["YOUTUBE_API_KEY"] = "bench"
+    os.environ["YOUTUBE_API_ENDPOINT"] = fake_url
+    from scheduler.update_views import update_views
+    from scheduler.youtube_quota import quota_ledger
+
+    # 이 프로세스는 이미 할당량 설정을 읽었으므로 (bench.seed → app.crud) 공용 장부의 한도를 직접 풂
+    quota_ledger.daily_units = int(UNLIMITED_QUOTA_ENV["YOUTUBE_DAILY_QUOTA_UNITS"])
+    quota_ledger.capacity = float(UNLIMITED_QUOTA_ENV["YOUTUBE_BUCKET_CAPACITY"])
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE shorts_refresh_state SET next_due_at = now() - interval '1 second'"))
+    started = time.perf_counter()
+    result = update_views(budget_calls=10 ** 9)
+    return {**result, "wall_seconds": time.perf_counter() - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API/스케줄러 벤치마크 (가짜 YouTube 서버 사용, 결과는 JSON)")
+    parser.add_argument("--shorts", type=int, default=10000, help="시드할 영상 수 (10000 ~ 1000000)")
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--skip-seed", action="store_true", help="이미 시드한 DB를 그대로 사용 (같은 --shorts/--movies/--zipf)")
+    parser.add_argument("--youtube-latency-ms", type=float, default=50)
+    parser.add_argument("--youtube-jitter-ms", type=float, default=10)
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--workers", type=int, default=1, help="API 서버 워커 프로세스 수")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10, help="엔드포인트별 부하 시간")
+    parser.add_argument("--endpoints", default="compare,by_hashtag,vote,create")
+    parser.add_argument("--skip-scheduler", action="store_true")
+    parser.add_argument("--output", "-o", help="결과 JSON 파일 (없으면 표준 출력만)")
+    args = parser.parse_args()
+
+    catalog = Catalog(movies=args.movies, zipf_s=args.zipf)
+    result = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "shorts": args.shorts,
+            "movies": args.movies,
+            "zipf": args.zipf,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "youtube_latency_ms": args.youtube_latency_ms,
+        },
+    }
+    if not args.skip_seed:
+        result["seed"] = seed(args.shorts, catalog)
+    result["endpoints"] = {}
+
+    fake = FakeYouTube(catalog, args.youtube_latency_ms, args.youtube_jitter_ms).start()
+    server = _start_server(args.port, args.workers, fake.url)
+    try:
+        headers = {"Authorization": f"Bearer {_login(args.port)}"}
+        scenarios = _scenarios(catalog, args.shorts)
+        for name in args.endpoints.split(","):
+            print(f"벤치마크: {name} ({args.concurrency}개 동시 요청, {args.seconds:.0f}초)", flush=True)
+            result["endpoints"][name] = load(
+                f"http://127.0.0.1:{args.port}", scenarios[name], args.concurrency, args.seconds, headers,
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    if not args.skip_scheduler:
+        # 첫 실행은 제목/태그까지 조회(스니펫 갱신 주기), 두 번째 실행은 조회수만 조회하는 평소 경로
+        for name in ("update_views", "update_views_stats_only"):
+            calls_before, bytes_before = fake.calls, fake.bytes_sent
+            result[name] = run_update_views(fake.url)
+            result[name]["youtube_calls"] = fake.calls - calls_before
+            result[name]["youtube_bytes"] = fake.bytes_sent - bytes_before
+    fake.stop()
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
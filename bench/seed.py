@@ -0,0 +1,86 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from sqlalchemy import insert, text
+
+from app import crud, models
+from app.database import SessionLocal, engine
+from app.user.models import User
+from app.user.passwords import pwd_context
+from bench.catalog import Catalog, video_id
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+def seed(shorts: int, catalog: Catalog, reset: bool = True, batch_size: int = 10000) -> Dict[str, float]:
+    """
+    합성 카탈로그로 DB를 채움 (reset이면 모든 테이블을 지우고 다시 만듦 - 벤치마크 전용 DB에서만 사용)
+    영상 → shorts_hashtags 백필 → hashtag_stats 재생성 → 갱신 스케줄 상태 순서로, 운영 코드와 같은 경로를 사용
+    """
+    started = time.perf_counter()
+    if reset:
+        models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine, checkfirst=True)
+
+    now = datetime.now(timezone.utc)
+    rng = random.Random(catalog.seed)
+    db = SessionLocal()
+    try:
+        user = User(email=BENCH_EMAIL, username="bench", password_hash=pwd_context.hash(BENCH_PASSWORD))
+        db.add(user)
+        db.flush()
+
+        for start in range(0, shorts, batch_size):
+            rows = []
+            for n in range(start, min(start + batch_size, shorts)):
+                video = catalog.video(n, catalog.started)
+                rows.append({
+                    "video_id": video_id(n),
+                    "url": f"https://youtu.be/{video_id(n)}",
+                    "title": video["title"],
+                    "hashtags": video["hashtags"],
+                    "view_count": video["view_count"],
+                    "like_count": video["like_count"],
+                    # 등록 시각을 최근 30일에 흩어 hot/warm/cold 우선순위가 섞이게 함
+                    "created_at": now - timedelta(hours=rng.uniform(0, 24 * 30)),
+                    "user_id": user.id,
+                })
+            db.execute(insert(models.Shorts), rows)
+            db.commit()
+            print(f"시드: 영상 {min(start + batch_size, shorts)}/{shorts}개", flush=True)
+
+        pairs = crud.backfill_shorts_hashtags(db, batch_size=batch_size)
+        tags = crud.rebuild_hashtag_stats(db)
+        crud.ensure_refresh_states(db, due_at=now)
+        db.execute(insert(models.HashtagVote), [
+            {"hashtag": movie, "vote_count": rng.randint(0, 1000)} for movie in catalog.movies
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+
+    elapsed = time.perf_counter() - started
+    print(f"시드: 영상 {shorts}개, (영상, 해시태그) {pairs}쌍, 해시태그 {tags}개, {elapsed:.1f}초")
+    return {"shorts": shorts, "hashtag_pairs": pairs, "hashtags": tags, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 카탈로그로 DB 채우기 (DATABASE_URL의 모든 테이블을 지움)")
+    parser.add_argument("--shorts", type=int, default=10000)
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--no-reset", action="store_true", help="기존 테이블을 지우지 않고 추가")
+    args = parser.parse_args()
+    seed(args.shorts, Catalog(movies=args.movies, zipf_s=args.zipf), reset=not args.no_reset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import json
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from app import metrics, observability
+from scheduler import refresh_policy
+from scheduler.rollup_history import rollup_history
+from scheduler.update_views import WORKER_ID, prepare_schema, update_views
+
+# 주기 시작 시각 사이의 간격(초) - 여러 워커가 같은 시각에 몰리지 않도록 ± SCHEDULER_JITTER_SECONDS 만큼 흔듦
+INTERVAL_SECONDS = refresh_policy.SCHEDULER_INTERVAL_SECONDS
+JITTER_SECONDS = float(os.getenv("SCHEDULER_JITTER_SECONDS", str(INTERVAL_SECONDS * 0.1)))
+# 시작 직후 첫 주기 전 대기 시간(초) (DB가 준비될 때까지)
+STARTUP_DELAY_SECONDS = float(os.getenv("SCHEDULER_STARTUP_DELAY_SECONDS", "0"))
+# 상태 파일 (JSON, 주기마다 갱신) - 컨테이너 healthcheck나 운영자가 확인
+HEALTH_FILE = os.getenv("SCHEDULER_HEALTH_FILE", "/tmp/scheduler_health.json")
+# 0이 아니면 이 포트로 GET /health (상태 JSON), GET /metrics (Prometheus, INTERNAL_API_TOKEN Bearer 필요) 제공
+HEALTH_PORT = int(os.getenv("SCHEDULER_HEALTH_PORT", "0"))
+# 상태 서버를 열 주소 - 기본은 같은 호스트/컨테이너에서만 접근 (외부에서 수집하려면 0.0.0.0)
+HEALTH_HOST = os.getenv("SCHEDULER_HEALTH_HOST", "127.0.0.1")
+# 마지막 성공 후 이 시간(초)이 지나면 unhealthy
+HEALTH_MAX_AGE_SECONDS = float(os.getenv("SCHEDULER_HEALTH_MAX_AGE_SECONDS", str(INTERVAL_SECONDS * 3)))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SchedulerDaemon:
+    """
+    update_views / rollup_history를 한 프로세스에서 주기적으로 실행
+    - 임포트, DB 풀, 스키마 확인, YouTube 조회 스레드/클라이언트를 시작할 때 한 번만 준비
+    - 한 주기가 끝나야 다음 주기를 시작 (겹치지 않음), 주기가 간격보다 길어지면 밀린 주기는 건너뜀
+    - SIGTERM/SIGINT를 받으면 진행 중인 배치까지 반영하고 남은 임대를 푼 뒤 종료
+    """
+
+    def __init__(self, interval: float = INTERVAL_SECONDS, jitter: float = JITTER_SECONDS):
+        self.interval = interval
+        self.jitter = jitter
+        self.stop_event = threading.Event()
+        # 신호 처리기(request_stop)가 같은 스레드에서 상태를 바꿀 수 있으므로 재진입 가능한 잠금
+        self._lock = threading.RLock()
+        self._state: Dict = {
+            "status": "starting",
+            "pid": os.getpid(),
+            "worker_id": WORKER_ID,
+            "started_at": _now_iso(),
+            "cycles": 0,
+            "failures": 0,
+            "last_run": None,
+            "last_success_at": None,
+            "next_run_at": None,
+        }
+        self._started = time.time()
+        self._last_success = None
+
+    def health(self) -> Dict:
+        with self._lock:
+            state = dict(self._state)
+        # 첫 주기가 끝나기 전에는 시작 시각 기준
+        age = time.time() - (self._last_success or self._started)
+        state["healthy"] = state["status"] != "stopped" and age <= HEALTH_MAX_AGE_SECONDS
+        return state
+
+    def _update(self, **changes) -> None:
+        with self._lock:
+            self._state.update(changes)
+        self._write_health()
+
+    def _write_health(self) -> None:
+        if not HEALTH_FILE:
+            return
+        tmp = f"{HEALTH_FILE}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.health(), f, ensure_ascii=False)
+            os.replace(tmp, HEALTH_FILE)
+        except OSError as e:
+            print(f"스케줄러: 상태 파일 저장 실패 - {e}")
+
+    def run_cycle(self) -> None:
+        started = time.time()
+        self._update(status="running")
+        run: Dict = {"started_at": _now_iso()}
+        try:
+            run["update_views"] = update_views(prepare=False, stop=self.stop_event)
+            if not self.stop_event.is_set():
+                rollup_history(prepare=False)
+            run["ok"] = True
+            self._last_success = time.time()
+        except Exception as e:
+            # 다음 주기에 다시 시도 (데몬은 종료하지 않음)
+            run["ok"] = False
+            run["error"] = str(e)
+        run["finished_at"] = _now_iso()
+        run["seconds"] = time.time() - started
+        with self._lock:
+            self._state["cycles"] += 1
+            if not run["ok"]:
+                self._state["failures"] += 1
+            else:
+                self._state["last_success_at"] = run["finished_at"]
+            self._state["last_run"] = run
+        self._update(status="idle")
+
+    def _next_delay(self, cycle_started: float) -> float:
+        target = cycle_started + self.interval + random.uniform(-self.jitter, self.jitter)
+        delay = target - time.monotonic()
+        if delay < 0:
+            print(f"스케줄러: 주기가 간격({self.interval:.0f}초)보다 {-delay:.0f}초 길어져 바로 다음 주기를 시작합니다.")
+        return max(delay, 0.0)
+
+    def run(self) -> None:
+        prepare_schema()
+        self._update(status="idle")
+        if self.stop_event.wait(STARTUP_DELAY_SECONDS):
+            return self._shutdown()
+        while not self.stop_event.is_set():
+            cycle_started = time.monotonic()
+            self.run_cycle()
+            delay = self._next_delay(cycle_started)
+            self._update(next_run_at=datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat())
+            if self.stop_event.wait(delay):
+                break
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        print("스케줄러: 종료합니다.")
+        self._update(status="stopped", next_run_at=None)
+
+    def request_stop(self, signum=None, frame=None) -> None:
+        if not self.stop_event.is_set():
+            print("스케줄러: 종료 신호를 받았습니다. 진행 중인 배치를 마치고 종료합니다.")
+            self.stop_event.set()
+            self._update(status="stopping")
+
+
+def _bearer(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" and token.strip() else None
+
+
+def _serve_health(daemon: SchedulerDaemon, port: int, host: str = HEALTH_HOST) -> ThreadingHTTPServer:
+    """/health는 인증 없이, /metrics는 API 서버와 같은 INTERNAL_API_TOKEN으로 제공"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == "/health":
+                health = daemon.health()
+                body = json.dumps(health, ensure_ascii=False).encode()
+                status, content_type = (200 if health["healthy"] else 503), "application/json"
+            elif self.path == "/metrics":
+                error = observability.internal_token_status(_bearer(self.headers.get("Authorization")))
+                if error is None:
+                    body = metrics.render().encode()
+                    status, content_type = 200, "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    body, status, content_type = b"", error, "text/plain"
+            else:
+                body, status, content_type = b"", 404, "text/plain"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    daemon = SchedulerDaemon()
+    signal.signal(signal.SIGTERM, daemon.request_stop)
+    signal.signal(signal.SIGINT, daemon.request_stop)
+    server: Optional[ThreadingHTTPServer] = None
+    if HEALTH_PORT:
+        server = _serve_health(daemon, HEALTH_PORT)
+    print(
+        f"스케줄러: 데몬 시작 (워커 {WORKER_ID}, 간격 {daemon.interval:.0f}±{daemon.jitter:.0f}초"
+        + (f", 상태 http://{HEALTH_HOST}:{HEALTH_PORT}/health" if HEALTH_PORT else "") + ")"
+    )
+    try:
+        daemon.run()
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
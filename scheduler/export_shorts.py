@@ -0,0 +1,34 @@
+import argparse
+import sys
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from app import export
+
+
+def main():
+    parser = argparse.ArgumentParser(description="쇼츠 목록을 NDJSON/CSV로 내보내기 (GET /shorts/export와 같은 형식)")
+    parser.add_argument("--format", choices=[export.NDJSON, export.CSV], default=export.NDJSON)
+    parser.add_argument("--tag", help="해시태그 (없으면 전체)")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="등록 시각 시작 (포함, ISO 8601)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="등록 시각 끝 (제외, ISO 8601)")
+    parser.add_argument("--output", "-o", help="출력 파일 (없으면 표준 출력)")
+    parser.add_argument("--batch-size", type=int, default=export.EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    try:
+        start, end = export.check_range(args.start, args.end)
+    except HTTPException as e:
+        parser.error(e.detail)
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in export.iter_export(args.format, args.tag, start, end, args.batch_size):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
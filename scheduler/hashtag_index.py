@@ -0,0 +1,65 @@
+import argparse
+
+from app import crud
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.user.models import User
+
+
+def backfill():
+    """기존 Shorts.hashtags 문자열로 shorts_hashtags 연결 테이블을 채우고 조회수 사본을 맞춤"""
+    db = SessionLocal()
+    try:
+        total = crud.backfill_shorts_hashtags(db)
+        print(f"해시태그 인덱스: {total}개 (영상, 해시태그) 쌍 백필 완료.")
+        synced = crud.sync_hashtag_view_counts(db)
+        db.commit()
+        print(f"해시태그 인덱스: {synced}개 행의 조회수 갱신.")
+    finally:
+        db.close()
+
+
+def verify() -> bool:
+    """hashtag_stats 집계 테이블을 shorts 테이블에서 직접 계산한 값과 비교"""
+    db = SessionLocal()
+    try:
+        mismatches = crud.verify_hashtag_stats(db)
+    finally:
+        db.close()
+
+    for tag, (stored, expected) in sorted(mismatches.items()):
+        print(f"  #{tag}: 저장값(조회수, 좋아요, 영상 수)={stored} 계산값={expected}")
+    if mismatches:
+        print(f"해시태그 집계: {len(mismatches)}개 태그 불일치.")
+        return False
+    print("해시태그 집계: 모든 태그가 일치합니다.")
+    return True
+
+
+def rebuild():
+    """hashtag_stats 집계 테이블을 shorts 테이블 기준으로 다시 만듦"""
+    db = SessionLocal()
+    try:
+        total = crud.rebuild_hashtag_stats(db)
+        print(f"해시태그 집계: {total}개 태그 재생성 완료.")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="shorts_hashtags 인덱스 / hashtag_stats 집계 관리")
+    parser.add_argument("command", choices=["backfill", "verify", "rebuild"])
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+    if args.command == "backfill":
+        backfill()
+    elif args.command == "verify":
+        if not verify():
+            raise SystemExit(1)
+    elif args.command == "rebuild":
+        rebuild()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Set
+
+# 갱신 우선순위 (숫자가 작을수록 먼저 갱신)
+PRIORITY_HOT = 0
+PRIORITY_WARM = 1
+PRIORITY_COLD = 2
+
+TIER_NAMES = {PRIORITY_HOT: "hot", PRIORITY_WARM: "warm", PRIORITY_COLD: "cold"}
+
+# 우선순위별 갱신 주기(초)
+REFRESH_INTERVALS = {
+    PRIORITY_HOT: int(os.getenv("REFRESH_INTERVAL_HOT", "600")),
+    PRIORITY_WARM: int(os.getenv("REFRESH_INTERVAL_WARM", "3600")),
+    PRIORITY_COLD: int(os.getenv("REFRESH_INTERVAL_COLD", "86400")),
+}
+
+# 등록 후 이 시간(시간 단위) 이내의 영상은 hot, 이 기간의 WARM_AGE_FACTOR배 이내는 warm
+HOT_AGE_HOURS = float(os.getenv("REFRESH_HOT_AGE_HOURS", "48"))
+WARM_AGE_FACTOR = 7
+# 시간당 조회수 증가량 기준
+HOT_VELOCITY = float(os.getenv("REFRESH_HOT_VELOCITY", "100"))
+WARM_VELOCITY = float(os.getenv("REFRESH_WARM_VELOCITY", "5"))
+# 이 시간(시간 단위) 안에 투표가 있었던 해시태그는 '진행 중인 대결'로 보고 해당 영상을 hot으로 갱신
+BATTLE_WINDOW_HOURS = float(os.getenv("REFRESH_BATTLE_WINDOW_HOURS", "24"))
+# 제목/설명/태그(snippet)를 다시 조회하는 주기(초) - 그 사이에는 조회수(statistics)만 조회
+SNIPPET_REFRESH_SECONDS = int(os.getenv("REFRESH_SNIPPET_INTERVAL", "86400"))
+# 조회수 증가 속도의 지수이동평균 가중치 (최근 값 비중)
+VELOCITY_ALPHA = 0.5
+
+# 스케줄러가 갱신에 쓸 수 있는 시간당 YouTube API 할당량 (videos.list 1회 = 1 unit, 최대 50개 영상)
+# 0이면 따로 제한하지 않고 공용 일일 할당량/토큰 버킷(scheduler.youtube_quota)만으로 속도를 맞춤
+QUOTA_UNITS_PER_HOUR = int(os.getenv("YOUTUBE_REFRESH_UNITS_PER_HOUR", "0"))
+# 스케줄러 실행 간격(초) - 1회 실행에서 쓸 수 있는 할당량을 계산할 때 사용
+SCHEDULER_INTERVAL_SECONDS = int(os.getenv("SCHEDULER_INTERVAL_SECONDS", "600"))
+# 동시에 실행하는 스케줄러 워커 수 - 시간당 할당량을 워커 수로 나눠 씀
+SCHEDULER_WORKERS = max(1, int(os.getenv("SCHEDULER_WORKERS", "1")))
+
+
+def run_budget_calls(interval_seconds: int = SCHEDULER_INTERVAL_SECONDS, workers: int = SCHEDULER_WORKERS) -> Optional[int]:
+    """워커 하나가 1회 실행에서 호출할 수 있는 videos.list 횟수 (최소 1회), 시간당 할당량을 정하지 않았으면 None"""
+    if QUOTA_UNITS_PER_HOUR <= 0:
+        return None
+    return max(1, math.floor(QUOTA_UNITS_PER_HOUR * interval_seconds / 3600 / workers))
+
+
+def update_velocity(
+    old_velocity: Optional[float],
+    old_views: Optional[int],
+    new_views: int,
+    last_refreshed_at: Optional[datetime],
+    now: datetime,
+) -> Optional[float]:
+    """직전 갱신 이후 시간당 조회수 증가량을 지수이동평균으로 반영"""
+    if last_refreshed_at is None:
+        return old_velocity
+    hours = (now - last_refreshed_at).total_seconds() / 3600
+    if hours <= 0:
+        return old_velocity
+    current = max(new_views - (old_views or 0), 0) / hours
+    if old_velocity is None:
+        return current
+    return VELOCITY_ALPHA * current + (1 - VELOCITY_ALPHA) * old_velocity
+
+
+def classify(
+    created_at: Optional[datetime],
+    velocity: Optional[float],
+    tags: Iterable[str],
+    battle_tags: Set[str],
+    now: datetime,
+) -> int:
+    """
+    영상의 나이, 조회수 증가 속도, 대결(투표) 참여 여부로 갱신 우선순위를 결정
+    증가 속도를 아직 모르는 영상(첫 갱신)은 속도를 재기 위해 최소 warm으로 둠
+    """
+    age_hours = (now - created_at).total_seconds() / 3600 if created_at else None
+
+    if (age_hours is not None and age_hours < HOT_AGE_HOURS) or (velocity or 0.0) >= HOT_VELOCITY:
+        return PRIORITY_HOT
+    if battle_tags and not battle_tags.isdisjoint(tags):
+        return PRIORITY_HOT
+    if velocity is None or velocity >= WARM_VELOCITY:
+        return PRIORITY_WARM
+    if age_hours is not None and age_hours < HOT_AGE_HOURS * WARM_AGE_FACTOR:
+        return PRIORITY_WARM
+    return PRIORITY_COLD
+
+
+def snippet_due(snippet_refreshed_at: Optional[datetime], now: datetime) -> bool:
+    """제목/태그까지 조회할 차례인지 (한 번도 조회하지 않았거나 SNIPPET_REFRESH_SECONDS가 지남)"""
+    return snippet_refreshed_at is None or (now - snippet_refreshed_at).total_seconds() >= SNIPPET_REFRESH_SECONDS
+
+
+def next_due_at(priority: int, now: datetime) -> datetime:
+    return now + timedelta(seconds=REFRESH_INTERVALS[priority])
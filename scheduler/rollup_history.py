@@ -0,0 +1,101 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+from app.models import Base
+from app.user.models import User
+
+# 시계열 해상도 (shorts_stats_history / hashtag_stats_history 의 resolution 값)
+RESOLUTION_RAW = 0
+RESOLUTION_HOURLY = 1
+RESOLUTION_DAILY = 2
+
+RESOLUTION_NAMES = {RESOLUTION_RAW: "raw", RESOLUTION_HOURLY: "hourly", RESOLUTION_DAILY: "daily"}
+
+# 해상도별 보관 기간 - 원본은 48시간, 시간 단위는 30일, 일 단위는 계속 보관
+RAW_RETENTION = timedelta(hours=int(os.getenv("HISTORY_RAW_RETENTION_HOURS", "48")))
+HOURLY_RETENTION = timedelta(days=int(os.getenv("HISTORY_HOURLY_RETENTION_DAYS", "30")))
+# 시간/일 단위 구간을 자를 기준 시간대
+HISTORY_TIMEZONE = os.getenv("HISTORY_TIMEZONE", "Asia/Seoul")
+
+# (테이블, 대상 컬럼)
+_HISTORY_TABLES = (
+    ("shorts_stats_history", "shorts_id"),
+    ("hashtag_stats_history", "hashtag"),
+)
+
+# (원본 해상도, 요약 해상도, date_trunc 단위, 원본 보관 기간)
+_ROLLUP_STEPS = (
+    (RESOLUTION_RAW, RESOLUTION_HOURLY, "hour", RAW_RETENTION),
+    (RESOLUTION_HOURLY, RESOLUTION_DAILY, "day", HOURLY_RETENTION),
+)
+
+
+def choose_resolution(start: datetime, now: datetime) -> int:
+    """조회 구간 시작 시각에 맞는 가장 촘촘한 해상도 (해당 해상도의 보관 기간 안에 있어야 함)"""
+    if start >= now - RAW_RETENTION:
+        return RESOLUTION_RAW
+    if start >= now - HOURLY_RETENTION:
+        return RESOLUTION_HOURLY
+    return RESOLUTION_DAILY
+
+
+def _rollup_table(db: Session, table: str, key: str, source: int, target: int, unit: str, retention: timedelta) -> Dict[str, int]:
+    """
+    source 해상도의 완료된 구간(unit)을 target 해상도로 요약하고, 보관 기간이 지난 source 행을 삭제
+    조회수/좋아요 수는 누적값이므로 구간의 마지막 값을 대표값으로 사용
+    이미 요약한 마지막 구간부터 다시 계산하므로 여러 번 실행해도 결과가 같음
+    """
+    params = {"source": source, "target": target, "unit": unit, "tz": HISTORY_TIMEZONE}
+    rolled = db.execute(text(f"""
+        INSERT INTO {table} ({key}, resolution, ts, view_count, like_count)
+        SELECT DISTINCT ON ({key}, bucket) {key}, :target, bucket, view_count, like_count
+        FROM (
+            SELECT {key}, ts, view_count, like_count, date_trunc(:unit, ts, :tz) AS bucket
+            FROM {table}
+            WHERE resolution = :source
+              AND ts >= COALESCE((SELECT max(ts) FROM {table} WHERE resolution = :target), '-infinity')
+              AND ts < date_trunc(:unit, now(), :tz)
+        ) AS samples
+        ORDER BY {key}, bucket, ts DESC
+        ON CONFLICT ({key}, resolution, ts) DO UPDATE
+            SET view_count = EXCLUDED.view_count, like_count = EXCLUDED.like_count
+    """), params).rowcount
+
+    # 요약이 끝난 구간 중 보관 기간이 지난 원본만 삭제
+    deleted = db.execute(text(f"""
+        DELETE FROM {table}
+        WHERE resolution = :source
+          AND ts < LEAST(date_trunc(:unit, now(), :tz), now() - CAST(:retention AS interval))
+    """), {**params, "retention": f"{int(retention.total_seconds())} seconds"}).rowcount
+    db.commit()
+    return {"rolled": rolled or 0, "deleted": deleted or 0}
+
+
+def rollup_history(prepare: bool = True) -> None:
+    """shorts/hashtag 시계열을 원본 → 시간 단위 → 일 단위로 요약 (저장량이 시간에 비례해 늘지 않도록)"""
+    if prepare:
+        Base.metadata.create_all(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        for table, key in _HISTORY_TABLES:
+            for source, target, unit, retention in _ROLLUP_STEPS:
+                result = _rollup_table(db, table, key, source, target, unit, retention)
+                print(
+                    f"시계열 요약: {table} {RESOLUTION_NAMES[source]} → {RESOLUTION_NAMES[target]} "
+                    f"{result['rolled']}개 요약, {result['deleted']}개 삭제"
+                )
+    except Exception as e:
+        db.rollback()
+        print(f"시계열 요약: 작업 중 오류 발생 - {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rollup_history()
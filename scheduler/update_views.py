@@ -1,80 +1,500 @@
+import os
+import resource
+import socket
+import threading
 import time
-from typing import Iterable, List
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Set
 
+from sqlalchemy import cast, column, func, or_, select, update, values
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app import crud, metrics, services
 from app.database import SessionLocal, engine
-from app.models import Base, Shorts
+from app.models import Base, Shorts, ShortsRefreshState
 from app.user.models import User
-from scheduler.youtube_client import fetch_video_stats
+from scheduler import refresh_policy
+from scheduler.youtube_client import FETCH_CONCURRENCY, FULL_PART, STATISTICS_PART, StatsBatch, iter_video_stats
+from scheduler.youtube_quota import BACKGROUND, YouTubeUnavailable, quota_ledger
+
+# DB에서 한 번에 읽어오는 행 수 (메모리 사용량의 상한을 결정)
+CHUNK_SIZE = int(os.getenv("SCHEDULER_CHUNK_SIZE", "1000"))
+# YouTube videos.list 한 번에 조회할 수 있는 최대 ID 수
+YOUTUBE_BATCH_SIZE = 50
+# 이 워커가 갱신 대상 행을 임대하는 시간(초) - 워커가 죽으면 이 시간이 지난 뒤 다른 워커가 가져감
+LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "300"))
+# 임대한 행에 기록하는 워커 이름 (여러 노드/프로세스에서 실행할 때 구분용)
+WORKER_ID = os.getenv("SCHEDULER_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# 백필/집계 재생성 등 전체 테이블 작업을 한 워커만 하도록 잡는 advisory lock 키
+_MAINTENANCE_LOCK_ID = 0x66696C6D
+# 실행 중 조회수 세대 번호를 올리는 최소 간격(초) - API 워커의 리더보드 캐시/ETag가 배치마다 무효화되지 않도록 모아서 올림
+# (실행이 끝날 때는 간격과 관계없이 한 번 올림)
+GENERATION_BUMP_SECONDS = float(os.getenv("SCHEDULER_GENERATION_BUMP_SECONDS", "30"))
+# 실행이 끝날 때마다 지표를 Prometheus 텍스트 형식으로 저장할 파일 (node_exporter textfile collector용, 없으면 저장 안 함)
+SCHEDULER_METRICS_FILE = os.getenv("SCHEDULER_METRICS_FILE")
 
+_run_seconds = metrics.histogram(
+    "scheduler_run_duration_seconds", "update_views run time", buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+_runs = metrics.counter("scheduler_runs_total", "update_views runs", ["outcome"])
+_rows = metrics.counter("scheduler_rows_total", "Rows read by update_views", ["result"])
+_last_success = metrics.gauge("scheduler_last_success_timestamp_seconds", "Unix time of the last successful update_views run")
 
-def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
     for i in range(0, len(items), size):
         yield items[i : i + size]
 
 
-def update_views():
+def _lease_chunk(db: Session, limit: int, now: datetime, worker_id: str = WORKER_ID) -> List[Row]:
     """
-    DB에 저장된 모든 Shorts 레코드의 video_id를 모아
-    YouTube API로 조회수/좋아요 수/태그를 가져와 view_count, hashtags를 갱신
-    50개씩 배치로 호출하여 API 호출 한도를 고려
+    갱신 시각(next_due_at)이 now 이전이고 임대되지 않은(또는 임대가 만료된) 영상을 우선순위 → 예정 시각 순으로
+    최대 limit개 임대하고 commit (FOR UPDATE SKIP LOCKED라 동시에 실행 중인 다른 워커와 같은 행을 가져가지 않음)
+    갱신을 마친 행은 _apply_batch가 next_due_at을 미루면서 임대를 풀어 주므로, 같은 주기에 다시 임대되지 않음
     """
-    print("스케줄러: 'update_views' 작업 시작..")
+    state = ShortsRefreshState
+    picked = (
+        select(state.shorts_id)
+        .where(state.next_due_at <= now)
+        .where(or_(state.lease_expires_at.is_(None), state.lease_expires_at < func.now()))
+        .order_by(state.priority, state.next_due_at, state.shorts_id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("picked")
+    )
+    rows = db.execute(
+        update(state.__table__)
+        .where(state.shorts_id == picked.c.shorts_id)
+        .where(Shorts.id == state.shorts_id)
+        .values(leased_by=worker_id, lease_expires_at=func.now() + timedelta(seconds=LEASE_SECONDS))
+        .returning(
+            Shorts.id, Shorts.video_id, Shorts.view_count, Shorts.like_count, Shorts.title, Shorts.hashtags,
+            Shorts.created_at, state.priority, state.next_due_at, state.last_refreshed_at, state.view_velocity,
+            state.snippet_etag, state.snippet_refreshed_at,
+        )
+    ).all()
+    db.commit()
+    return sorted(rows, key=lambda r: (r.priority, r.next_due_at, r.id))
+
+
+def _iter_leased_chunks(db: Session, chunk_size: int, now: datetime, remaining_calls) -> Iterator[List[Row]]:
+    """남은 호출 수(remaining_calls())로 조회할 수 있는 만큼만 chunk_size개씩 임대해 읽음 (메모리 사용량 일정)"""
+    while True:
+        limit = min(chunk_size, remaining_calls() * YOUTUBE_BATCH_SIZE)
+        if limit <= 0:
+            return
+        rows = _lease_chunk(db, limit, now)
+        if not rows:
+            return
+        yield rows
+
+
+def _release_leases(db: Session, worker_id: str = WORKER_ID, shorts_ids: Optional[Sequence[int]] = None) -> int:
+    """이 워커가 임대했지만 갱신하지 못한 행(shorts_ids가 있으면 그 행만)을 바로 다른 워커가 가져갈 수 있게 풀어 줌"""
+    state = ShortsRefreshState
+    stmt = update(state).where(state.leased_by == worker_id)
+    if shorts_ids is not None:
+        stmt = stmt.where(state.shorts_id.in_(shorts_ids))
+    result = db.execute(stmt.values(leased_by=None, lease_expires_at=None))
+    db.commit()
+    return result.rowcount or 0
+
+
+@contextmanager
+def _maintenance_lock():
+    """전체 테이블 작업(백필, 집계 재생성, 스케줄 상태 추가)은 여러 워커 중 하나씩만 실행"""
+    with engine.connect() as conn:
+        conn.execute(select(func.pg_advisory_lock(_MAINTENANCE_LOCK_ID)))
+        try:
+            yield
+        finally:
+            conn.execute(select(func.pg_advisory_unlock(_MAINTENANCE_LOCK_ID)))
+            conn.commit()
+
+
+def _batch_values(name: str, columns: Dict[str, object], rows: List[Dict]):
+    """
+    여러 행을 VALUES 목록으로 만들어 UPDATE ... FROM VALUES 한 문장으로 조건부 갱신할 수 있게 함
+    (값 참조용으로 컬럼 타입으로 cast한 식을 함께 반환 - 모두 NULL인 열도 타입이 맞도록)
+    """
+    table = values(*[column(key, type_) for key, type_ in columns.items()], name=name)\
+        .data([tuple(row[key] for key in columns) for row in rows])
+    return table, {key: cast(table.c[key], type_) for key, type_ in columns.items()}
+
+
+def _apply_batch(
+    db: Session,
+    rows: Sequence[Row],
+    stats_map: Dict[str, Dict],
+    counts: Dict[str, int],
+    now: datetime,
+    battle_tags: Set[str],
+    snippet: bool = True,
+    worker_id: str = WORKER_ID,
+) -> None:
+    """
+    배치(최대 50개) 안의 행만 stats_map과 맞춰 보고, 값이 실제로 바뀐 행만 한 번의 UPDATE로 기록 (commit 포함)
+    배치의 모든 행은 조회수 증가 속도와 우선순위를 다시 계산해 다음 갱신 시각을 정하고 임대를 풂
+    snippet이면(제목/태그까지 조회한 배치) 제목/설명/태그의 해시와 조회 시각을 저장해 다음 스니펫 조회 시점을 정함
+    - 이 워커의 임대가 아직 유효한 행만 기록 (임대가 만료돼 다른 워커가 가져간 행은 건드리지 않고 lost로 셈)
+    - shorts는 임대할 때 읽은 조회수/좋아요 수/해시태그가 그대로일 때만 기록 (그 사이 API가 즉시 갱신했으면 건너뜀)
+    - 해시태그 집계 증감분과 시계열은 실제로 기록된 행만으로 계산
+    counts의 changed(변경), unchanged(변경 없음), missing(YouTube에서 찾지 못함), lost(임대 만료) 값을 누적
+    """
+    if not rows:
+        return
+    by_id = {row.id: row for row in rows}
+    # 행별 결과: "missing", "unchanged" 또는 기록할 값
+    outcomes: Dict[int, object] = {}
+    state_updates = []
+    for row in rows:
+        data = stats_map.get(row.video_id)
+        if not data:
+            outcomes[row.id] = "missing"
+            # 삭제/비공개 영상일 수 있으므로 가장 낮은 우선순위로 미룸
+            state_updates.append({
+                "shorts_id": row.id,
+                "priority": refresh_policy.PRIORITY_COLD,
+                "next_due_at": refresh_policy.next_due_at(refresh_policy.PRIORITY_COLD, now),
+                "last_refreshed_at": now,
+                "view_velocity": row.view_velocity,
+                "snippet_etag": row.snippet_etag,
+                "snippet_refreshed_at": row.snippet_refreshed_at,
+            })
+            continue
+        # 조회수 갱신 (값이 없으면 기존 값 유지)
+        view_count = int(data.get("view_count", row.view_count or 0))
+        like_count = int(data.get("like_count", row.like_count or 0))
+        # 제목/해시태그는 None이면 변경하지 않음 (조회수만 조회한 배치, snippet 해시가 같아 해시태그를 다시 추출하지 않은 영상)
+        # YouTube API에서 가져온 해시태그를 그대로 사용 (실제 영상에 달린 해시태그)
+        title = data.get("title")
+        if title is None:
+            title = row.title
+        hashtags = data.get("hashtags")
+        if hashtags is None:
+            hashtags = row.hashtags
+
+        velocity = refresh_policy.update_velocity(
+            row.view_velocity, row.view_count, view_count, row.last_refreshed_at, now,
+        )
+        priority = refresh_policy.classify(
+            row.created_at, velocity, services.split_hashtags(hashtags), battle_tags, now,
+        )
+        state_updates.append({
+            "shorts_id": row.id,
+            "priority": priority,
+            "next_due_at": refresh_policy.next_due_at(priority, now),
+            "last_refreshed_at": now,
+            "view_velocity": velocity,
+            "snippet_etag": data.get("etag") if snippet else row.snippet_etag,
+            "snippet_refreshed_at": now if snippet else row.snippet_refreshed_at,
+        })
+
+        # 바뀐 값이 없으면 쓰지 않음 (불필요한 WAL, 인덱스 갱신, dead tuple 방지)
+        if (view_count, like_count, title, hashtags) == (row.view_count, row.like_count, row.title, row.hashtags):
+            outcomes[row.id] = "unchanged"
+            continue
+        outcomes[row.id] = {
+            "id": row.id,
+            "old_view_count": row.view_count,
+            "old_like_count": row.like_count,
+            "old_hashtags": row.hashtags,
+            "view_count": view_count,
+            "like_count": like_count,
+            "title": title,
+            "hashtags": hashtags,
+        }
+
+    # 스케줄 상태 갱신 겸 임대 확인 - 이 워커의 임대가 유효한 행만 갱신되고, 커밋할 때까지 행 잠금이 유지됨
+    state = ShortsRefreshState
+    state_values, s = _batch_values("state_values", {
+        "shorts_id": state.shorts_id.type,
+        "priority": state.priority.type,
+        "next_due_at": state.next_due_at.type,
+        "last_refreshed_at": state.last_refreshed_at.type,
+        "view_velocity": state.view_velocity.type,
+        "snippet_etag": state.snippet_etag.type,
+        "snippet_refreshed_at": state.snippet_refreshed_at.type,
+    }, state_updates)
+    owned = set(db.execute(
+        update(state.__table__)
+        .where(state.shorts_id == s["shorts_id"])
+        .where(state.leased_by == worker_id)
+        .where(state.lease_expires_at > func.now())
+        .values(
+            priority=s["priority"], next_due_at=s["next_due_at"], last_refreshed_at=s["last_refreshed_at"],
+            view_velocity=s["view_velocity"], snippet_etag=s["snippet_etag"],
+            snippet_refreshed_at=s["snippet_refreshed_at"], leased_by=None, lease_expires_at=None,
+        )
+        .returning(state.shorts_id)
+    ).scalars())
+    counts["lost"] += len(rows) - len(owned)
+
+    updates = [outcome for shorts_id, outcome in outcomes.items() if shorts_id in owned and isinstance(outcome, dict)]
+    written: Set[int] = set()
+    if updates:
+        # 임대할 때 읽은 값이 그대로인 행만 기록 (기본키 + 이전 값 조건, 한 문장)
+        shorts_values, v = _batch_values("shorts_values", {
+            "id": Shorts.id.type,
+            "old_view_count": Shorts.view_count.type,
+            "old_like_count": Shorts.like_count.type,
+            "old_hashtags": Shorts.hashtags.type,
+            "view_count": Shorts.view_count.type,
+            "like_count": Shorts.like_count.type,
+            "title": Shorts.title.type,
+            "hashtags": Shorts.hashtags.type,
+        }, updates)
+        written = set(db.execute(
+            update(Shorts.__table__)
+            .where(Shorts.id == v["id"])
+            .where(Shorts.view_count.is_not_distinct_from(v["old_view_count"]))
+            .where(Shorts.like_count.is_not_distinct_from(v["old_like_count"]))
+            .where(Shorts.hashtags.is_not_distinct_from(v["old_hashtags"]))
+            .values(view_count=v["view_count"], like_count=v["like_count"], title=v["title"], hashtags=v["hashtags"])
+            .returning(Shorts.id)
+        ).scalars())
 
+    samples = []
+    deltas = {}
+    for shorts_id in owned:
+        outcome = outcomes[shorts_id]
+        if outcome == "missing":
+            counts["missing"] += 1
+            continue
+        if outcome == "unchanged" or shorts_id not in written:
+            counts["unchanged"] += 1
+            continue
+        row = by_id[shorts_id]
+        if outcome["hashtags"] != row.hashtags:
+            crud.sync_shorts_hashtags(db, row.id, row.hashtags, outcome["hashtags"], outcome["view_count"])
+        crud.hashtag_stats_delta(
+            row.hashtags, row.view_count, row.like_count,
+            outcome["hashtags"], outcome["view_count"], outcome["like_count"],
+            deltas=deltas,
+        )
+        if (outcome["view_count"], outcome["like_count"]) != (row.view_count, row.like_count):
+            samples.append({"shorts_id": row.id, "view_count": outcome["view_count"], "like_count": outcome["like_count"]})
+        counts["changed"] += 1
+
+    if written:
+        # 해시태그별 목록 인덱스의 조회수 사본도 같은 트랜잭션에서 맞춤
+        crud.sync_hashtag_view_counts(db, written)
+        crud.apply_hashtag_stats_deltas(db, deltas)
+        # 값이 바뀐 영상/해시태그만 시계열에 기록
+        crud.record_stats_history(db, samples, deltas.keys(), now)
+    db.commit()
+
+
+def _record_run(elapsed: float, counts: Dict[str, int]) -> None:
+    """실행 시간/처리 행 수를 지표에 반영하고, 설정된 경우 파일로 저장 (YouTube 호출/SQL 지표 포함)"""
+    _run_seconds.labels().observe(elapsed)
+    for result, count in counts.items():
+        _rows.labels(result).inc(count)
+    if SCHEDULER_METRICS_FILE:
+        try:
+            metrics.write_textfile(SCHEDULER_METRICS_FILE)
+        except OSError as e:
+            print(f"스케줄러: 지표 파일 저장 실패 - {e}")
+
+
+def _peak_memory_mb() -> float:
+    # Linux의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def prepare_schema() -> None:
+    """테이블이 없으면 만들고 빠진 컬럼을 추가 (한 번 실행하는 경우 매번, 데몬은 시작할 때 한 번)"""
     # 안전하게 테이블이 없으면 생성
     Base.metadata.create_all(bind=engine, checkfirst=True)
 
-    # 스케줄러에서도 DB 스키마 업데이트 (like_count 컬럼 추가)
+    # 스케줄러에서도 DB 스키마 업데이트 (like_count, 투표 시각, 임대/스니펫 컬럼, 해시태그 목록 조회수 추가)
     from sqlalchemy import text
     with engine.connect() as conn:
         try:
             conn.execute(text("ALTER TABLE shorts ADD COLUMN IF NOT EXISTS like_count BIGINT DEFAULT 0"))
+            conn.execute(text("ALTER TABLE hastag_votes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now()"))
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS leased_by VARCHAR"))
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ"))
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS snippet_etag VARCHAR"))
+            conn.execute(text("ALTER TABLE shorts_refresh_state ADD COLUMN IF NOT EXISTS snippet_refreshed_at TIMESTAMPTZ"))
+            crud.add_hashtag_view_count_column(conn)
             conn.commit()
         except Exception as e:
             print(f"스케줄러: DB 스키마 업데이트 실패 (이미 존재할 수 있음): {e}")
 
+
+def update_views(
+    chunk_size: int = CHUNK_SIZE,
+    concurrency: int = FETCH_CONCURRENCY,
+    budget_calls: Optional[int] = None,
+    prepare: bool = True,
+    stop: Optional[threading.Event] = None,
+) -> Dict[str, float]:
+    """
+    갱신 시각이 지난 Shorts 레코드를 우선순위(hot → warm → cold) 순으로 chunk_size개씩 임대해
+    YouTube API로 조회수/좋아요 수/태그를 가져와 view_count, hashtags를 갱신
+    50개씩 배치로 호출하되 1회 실행의 호출 수는 시간당 할당량에서 계산한 budget_calls를 넘지 않고,
+    배치 호출은 최대 concurrency개까지 동시에 진행
+    평소에는 조회수/좋아요 수(statistics)만 조회하고, 제목/태그(snippet)는 REFRESH_SNIPPET_INTERVAL마다 함께 조회하며
+    제목/설명/태그의 해시가 저장된 값과 같으면 해시태그를 다시 추출하지 않음
+    (호출 수는 오늘 남은 공용 할당량도 넘지 않고, 각 호출은 공용 토큰 버킷에서 예약)
+    여러 워커(노드)에서 동시에 실행하면 임대로 대상 행을 나눠 가지므로 한 주기에 각 영상은 한 번만 갱신됨
+    stop이 설정되면 새 배치를 시작하지 않고, 진행 중인 배치까지만 반영한 뒤 남은 임대를 풀고 끝냄
+    YouTube를 호출할 수 없으면(할당량 소진/호출 제한/차단기 열림/재시도 실패) 실패로 끝내지 않고
+    같은 방식으로 멈춰 나머지 영상의 갱신을 다음 주기로 미룸
+    값이 바뀐 행만 기록하며, 반환값은
+    {"processed": 읽은 행 수, "changed": 변경, "unchanged": 변경 없음, "missing": YouTube에서 찾지 못함,
+     "deferred": 조회하지 못해 미룬 행 수, "lost": 임대가 만료돼 기록하지 않은 행 수, "snippet": 제목/태그까지 조회한 행 수,
+     "calls": videos.list 호출 수, "elapsed": 소요 시간(초)}
+    """
+    print("스케줄러: 'update_views' 작업 시작..")
+    started = time.perf_counter()
+    if prepare:
+        prepare_schema()
+    if budget_calls is None:
+        budget_calls = refresh_policy.run_budget_calls()
+    # 오늘 남은 공용 할당량보다 많이 임대하지 않음 (API 몫은 남김)
+    remaining_units = quota_ledger.remaining_units(BACKGROUND)
+    budget_calls = remaining_units if budget_calls is None else min(budget_calls, remaining_units)
+
     db = SessionLocal()
-    try:
-        # 업데이트 대상(Shorts 테이블의 모든 행)을 불러옴
-        rows: List[Shorts] = db.query(Shorts).all()
-        if not rows:
-            print("스케줄러: 업데이트 대상이 없습니다.")
+    processed = 0
+    snippet_rows = 0
+    calls = 0
+    counts = {"changed": 0, "unchanged": 0, "missing": 0, "deferred": 0, "lost": 0}
+    # YouTube를 호출할 수 없게 된 이유 (설정되면 새 배치를 시작하지 않음)
+    unavailable: Optional[YouTubeUnavailable] = None
+    # 조회 중인 배치의 행 (video_id → 행), 진행 중인 배치 수만큼만 메모리에 유지
+    in_flight: Dict[str, Row] = {}
+    now = datetime.now(timezone.utc)
+    # 마지막으로 조회수 세대 번호를 올린 시각과 그때까지 반영한 변경 수
+    bumped_at = time.monotonic()
+    bumped_changes = 0
+
+    def bump_generation(force: bool = False) -> None:
+        """API 워커의 캐시가 바뀐 값을 다시 읽도록 세대 번호를 올림 (GENERATION_BUMP_SECONDS에 한 번까지)"""
+        nonlocal bumped_at, bumped_changes
+        if counts["changed"] == bumped_changes:
+            return
+        if not force and time.monotonic() - bumped_at < GENERATION_BUMP_SECONDS:
             return
+        crud.bump_views_generation(db)
+        bumped_at = time.monotonic()
+        bumped_changes = counts["changed"]
 
-        # 유효한 video_id만 추출
-        video_ids = [r.video_id for r in rows if r.video_id]
-        total_updated = 0
+    def batches() -> Iterator[StatsBatch]:
+        nonlocal processed, snippet_rows, calls
+        for chunk in _iter_leased_chunks(db, chunk_size, now, lambda: budget_calls - calls):
+            # 유효한 video_id만 대상으로 함
+            rows = [r for r in chunk if r.video_id]
+            # 스니펫을 확인할 차례인 영상과 조회수만 갱신할 영상을 따로 묶음 (호출 수는 같고 응답만 작아짐)
+            full, stats_only = [], []
+            for r in rows:
+                (full if refresh_policy.snippet_due(r.snippet_refreshed_at, now) else stats_only).append(r)
+            planned = [
+                (part, batch)
+                for part, group in ((FULL_PART, full), (STATISTICS_PART, stats_only))
+                for batch in _chunks(group, YOUTUBE_BATCH_SIZE)
+            ]
+            for i, (part, batch) in enumerate(planned):
+                # 두 묶음으로 나누면 임대한 행 수보다 호출이 하나 더 필요할 수 있으므로 호출 전마다 예산을 확인
+                if (stop is not None and stop.is_set()) or unavailable is not None or calls >= budget_calls:
+                    # 조회하지 않은 행은 호출하지 않고 바로 임대를 풀어 다음 주기(또는 다른 워커)로 미룸
+                    left = [r.id for _, rest in planned[i:] for r in rest]
+                    _release_leases(db, shorts_ids=left)
+                    counts["deferred"] += len(left)
+                    return
+                calls += 1
+                processed += len(batch)
+                for r in batch:
+                    in_flight[r.video_id] = r
+                if part == FULL_PART:
+                    snippet_rows += len(batch)
+                    etags = {r.video_id: r.snippet_etag for r in batch if r.snippet_etag}
+                    yield StatsBatch([r.video_id for r in batch], part, etags)
+                else:
+                    yield StatsBatch([r.video_id for r in batch], part)
 
-        for batch_ids in _chunks(video_ids, 50):
-            stats_map = fetch_video_stats(batch_ids)
+    try:
+        with _maintenance_lock():
+            # shorts_hashtags 테이블이 새로 생긴 경우 기존 행의 해시태그를 채워 넣음
+            if crud.needs_hashtag_backfill(db):
+                backfilled = crud.backfill_shorts_hashtags(db)
+                print(f"스케줄러: 해시태그 인덱스 백필 완료 ({backfilled}개).")
+            # hashtag_stats 집계 테이블이 비어 있으면 처음 한 번 전체 계산
+            if crud.needs_hashtag_stats_rebuild(db):
+                rebuilt = crud.rebuild_hashtag_stats(db)
+                print(f"스케줄러: 해시태그 집계 테이블 생성 완료 ({rebuilt}개 태그).")
+            # 새로 등록된 영상의 갱신 스케줄 상태 추가
+            crud.ensure_refresh_states(db, due_at=now)
+        battle_tags = crud.get_battle_hashtags(
+            db, now - timedelta(hours=refresh_policy.BATTLE_WINDOW_HOURS)
+        )
 
-            for r in rows:
-                data = stats_map.get(r.video_id)
-                if not data:
-                    continue
-                # 조회수 갱신 (값이 없으면 기존 값 유지)
-                r.view_count = int(data.get("view_count", r.view_count or 0))
-                r.like_count = int(data.get("like_count", r.like_count or 0))
-                # 제목 갱신 (None이면 변경하지 않음)
-                title = data.get("title")
-                if title is not None:
-                    r.title = title
-                # 해시태그 문자열 갱신 (None이면 변경하지 않음)
-                # YouTube API에서 가져온 해시태그를 그대로 사용 (실제 영상에 달린 해시태그)
-                hashtags = data.get("hashtags")
-                if hashtags is not None:
-                    r.hashtags = hashtags
-                total_updated += 1
-
-            db.commit()
-
-        print(f"스케줄러: {total_updated}개 항목 업데이트 완료.")
+        results = iter_video_stats(batches(), max_workers=concurrency, caller=BACKGROUND, return_exceptions=True)
+        for batch, stats_map in results:
+            rows = [in_flight.pop(vid) for vid in batch.video_ids]
+            if isinstance(stats_map, YouTubeUnavailable):
+                # 이 배치의 행은 임대만 풀어 두고(아래 finally) 다음 주기에 다시 갱신
+                if unavailable is None:
+                    unavailable = stats_map
+                    print(f"스케줄러: YouTube 조회 중단, 남은 갱신은 다음 주기로 미룹니다 - {stats_map}")
+                counts["deferred"] += len(rows)
+                continue
+            if isinstance(stats_map, Exception):
+                raise stats_map
+            _apply_batch(db, rows, stats_map, counts, now, battle_tags, snippet=batch.part == FULL_PART)
+            bump_generation()
+
+        if processed == 0:
+            if budget_calls <= 0:
+                print("스케줄러: 오늘 YouTube API 할당량을 모두 사용해 갱신하지 않습니다.")
+            else:
+                print("스케줄러: 갱신 시각이 된 영상이 없습니다.")
+
+        # 우선순위별 대기열 상태 (할당량이 부족하면 due/지연 시간이 늘어남)
+        for tier in crud.get_refresh_queue_stats(db):
+            print(
+                f"스케줄러: [{tier.tier}] 전체 {tier.total}개, 대기 {tier.due}개, "
+                f"임대 중 {tier.leased}개, 최대 지연 {tier.max_lag_seconds:.0f}초"
+            )
     except Exception as e:
         db.rollback()
         print(f"스케줄러: 작업 중 오류 발생 - {e}")
+        _runs.labels("error").inc()
+        _record_run(time.perf_counter() - started, counts)
         raise
     finally:
+        # 이미 커밋한 변경이 있으면 (오류로 멈춘 경우도) 끝날 때 한 번 더 올림
+        try:
+            bump_generation(force=True)
+        except Exception as e:
+            print(f"스케줄러: 조회수 세대 번호 갱신 실패 - {e}")
+        # 오류로 멈춘 경우 아직 갱신하지 못한 임대 행을 다른 워커가 바로 가져갈 수 있게 함
+        try:
+            _release_leases(db)
+        except Exception as e:
+            print(f"스케줄러: 임대 해제 실패 ({LEASE_SECONDS}초 뒤 만료됨) - {e}")
         db.close()
 
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"스케줄러: {counts['changed']}개 항목 업데이트 완료. "
+        f"(변경 없음 {counts['unchanged']}개, YouTube 조회 실패 {counts['missing']}개, 미룸 {counts['deferred']}개, "
+        f"임대 만료 {counts['lost']}개)"
+    )
+    print(
+        f"스케줄러: {processed}개 조회 (제목/태그 포함 {snippet_rows}개, API 호출 {calls}/{budget_calls}회), {elapsed:.1f}초, "
+        f"{rate:.0f} rows/s, 최대 메모리 {_peak_memory_mb():.1f}MB"
+    )
+    _runs.labels("deferred" if unavailable is not None else "ok").inc()
+    _last_success.labels().set(time.time())
+    _record_run(elapsed, counts)
+    return {"processed": processed, **counts, "snippet": snippet_rows, "calls": calls, "elapsed": elapsed}
+
 
 if __name__ == "__main__":
     update_views()
@@ -1,86 +1,343 @@
+import hashlib
+import json
 import os
-from typing import Dict, List, Optional
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
 
+import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from app import metrics
+from scheduler.youtube_quota import (
+    BACKGROUND,
+    INTERACTIVE,
+    QuotaExhausted,
+    QuotaThrottled,
+    YouTubeUnavailable,
+    circuit_breaker,
+    quota_ledger,
+)
 
-def _get_client():
+# 동시에 진행할 videos.list 배치 호출 수 (iter_video_stats 기본값)
+FETCH_CONCURRENCY = int(os.getenv("YOUTUBE_FETCH_CONCURRENCY", "4"))
+# 응답을 기다리는 최대 시간(초) - 넘으면 일시적 오류로 보고 재시도
+HTTP_TIMEOUT_SECONDS = float(os.getenv("YOUTUBE_HTTP_TIMEOUT_SECONDS", "10"))
+# 일시적 오류(5xx, 429, 호출 제한, 네트워크 오류)의 재시도 횟수와 지수 백오프(전체 지터) 기준/최대 대기 시간(초)
+RETRY_ATTEMPTS = int(os.getenv("YOUTUBE_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("YOUTUBE_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("YOUTUBE_RETRY_MAX_SECONDS", "8"))
+# 토큰 버킷이 비었을 때 기다릴 수 있는 최대 시간(초) - 사용자 요청은 짧게, 스케줄러는 길게
+API_MAX_WAIT_SECONDS = float(os.getenv("YOUTUBE_API_MAX_WAIT_SECONDS", "2"))
+SCHEDULER_MAX_WAIT_SECONDS = float(os.getenv("YOUTUBE_SCHEDULER_MAX_WAIT_SECONDS", "30"))
+
+# videos.list는 part/ID 수와 관계없이 호출당 1 unit (실패한 호출도 할당량을 씀)
+QUOTA_UNITS_PER_CALL = 1
+
+# 조회 범위 - 조회수만(자주 갱신) / 조회수 + 제목·설명·태그(등록 검증, 느린 주기의 스니펫 갱신)
+STATISTICS_PART = "statistics"
+FULL_PART = "statistics,snippet"
+# 필요한 필드만 응답받도록 하는 fields 마스크 (응답 크기와 JSON 파싱 시간을 줄임)
+_FIELDS = {
+    STATISTICS_PART: "items(id,statistics(viewCount,likeCount))",
+    FULL_PART: "items(id,statistics(viewCount,likeCount),snippet(title,description,tags))",
+}
+_HASHTAG_RE = re.compile(r"#\S+")
+
+# 오늘 할당량을 다 썼다는 응답 (재시도하지 않음)
+_QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+# 잠시 뒤 다시 시도하면 되는 응답
+_RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "RATE_LIMIT_EXCEEDED", "backendError"}
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_fetch_calls = metrics.counter("youtube_fetch_calls_total", "videos.list calls", ["outcome"])
+_fetch_seconds = metrics.histogram("youtube_fetch_duration_seconds", "videos.list call latency")
+_fetch_videos = metrics.counter("youtube_fetch_videos_total", "Video ids requested from videos.list", ["part"])
+_quota_units = metrics.counter("youtube_quota_units_total", "Estimated YouTube Data API quota units spent")
+_fetch_retries = metrics.counter("youtube_fetch_retries_total", "videos.list calls retried after a transient error")
+
+# googleapiclient(httplib2) 클라이언트는 스레드 안전하지 않으므로 스레드마다 하나씩 만들어 재사용
+_thread_local = threading.local()
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _build_client():
     api_key = os.getenv("YOUTUBE_API_KEY")
     if not api_key:
         raise RuntimeError("YOUTUBE_API_KEY 환경변수가 설정되어 있지 않습니다")
-    return build("youtube", "v3", developerKey=api_key, cache_discovery=False)
+    # YOUTUBE_API_ENDPOINT: 로컬 가짜 서버 등 다른 엔드포인트로 요청을 보낼 때 사용 (예: http://127.0.0.1:8081/)
+    api_endpoint = os.getenv("YOUTUBE_API_ENDPOINT")
+    client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+    return build(
+        "youtube", "v3", developerKey=api_key, cache_discovery=False, client_options=client_options,
+        http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS),
+    )
 
 
-def fetch_video_stats(video_ids: List[str]) -> Dict[str, Dict[str, Optional[object]]]:
+def _get_client():
+    """현재 스레드의 YouTube 클라이언트 (처음 호출할 때 한 번만 생성)"""
+    client = getattr(_thread_local, "client", None)
+    if client is None:
+        client = _build_client()
+        _thread_local.client = client
+    return client
+
+
+def fetch_video_stats(
+    video_ids: List[str],
+    caller: str = INTERACTIVE,
+    part: str = FULL_PART,
+    etags: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Dict[str, Optional[object]]]:
     """
     최대 50개의 비디오 ID에 대해 조회수(statistics.viewCount), 제목(snippet.title), 태그(snippet.tags)를 가져옴
-    반환 형식: { 비디오ID: {"view_count": int, "title": Optional[str], "hashtags": Optional[str]} }
+    반환 형식: { 비디오ID: {"view_count": int, "like_count": int, "title": Optional[str], "hashtags": Optional[str], "etag": str} }
+    - part=STATISTICS_PART면 조회수/좋아요 수만 가져옴 (title/hashtags/etag 없음, fields 마스크로 응답도 최소화)
+    - etag는 제목/설명/태그로 계산한 해시 (항목 ETag는 조회수가 바뀔 때도 바뀌므로 쓰지 않음)
+    - etags({비디오ID: 저장된 해시})와 해시가 같은 영상은 title/hashtags를 빼고 반환 (변경 없음)
+    - 호출마다 공용 일일 할당량/토큰 버킷에서 1 unit을 예약 (caller: INTERACTIVE(사용자 요청) 또는 BACKGROUND(스케줄러))
+    - 일시적 오류는 지수 백오프로 재시도하고, 재시도까지 계속 실패하면 차단기를 엶
+    - 할당량 소진, 호출 제한, 차단기 열림, 재시도 실패는 YouTubeUnavailable(하위 클래스)로 알림
+    호출 수, 지연 시간, 예상 할당량을 지표로 기록
     """
-    result: Dict[str, Dict[str, Optional[object]]] = {}
     if not video_ids:
-        return result
+        return {}
 
     client = _get_client()
+    circuit_breaker.before_call()
+    try:
+        result = _fetch_with_retries(client, video_ids, caller, part, etags)
+    except (QuotaExhausted, QuotaThrottled):
+        circuit_breaker.release()
+        raise
+    except YouTubeUnavailable:
+        circuit_breaker.record_failure()
+        raise
+    except BaseException:
+        # 잘못된 요청 등 - YouTube는 응답했으므로 차단기에 반영하지 않음
+        circuit_breaker.release()
+        raise
+    circuit_breaker.record_success()
+    return result
+
+
+def _error_reasons(e: HttpError) -> Set[str]:
+    """오류 응답 본문의 error.errors[].reason / error.details[].reason"""
+    try:
+        error = json.loads(e.content.decode("utf-8")).get("error", {})
+    except (ValueError, AttributeError):
+        return set()
+    if not isinstance(error, dict):
+        return set()
+    items = (error.get("errors") or []) + (error.get("details") or [])
+    return {item["reason"] for item in items if isinstance(item, dict) and item.get("reason")}
+
+
+def _backoff_seconds(attempt: int, retry_after: Optional[str] = None) -> float:
+    """전체 지터 지수 백오프 (여러 워커가 같은 시각에 다시 몰리지 않도록), Retry-After가 있으면 그 이상 기다림"""
+    delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+    try:
+        delay = max(delay, min(float(retry_after), RETRY_MAX_SECONDS)) if retry_after else delay
+    except ValueError:
+        pass
+    return delay
+
+
+def _fetch_with_retries(
+    client, video_ids: List[str], caller: str, part: str, etags: Optional[Mapping[str, str]],
+) -> Dict[str, Dict[str, Optional[object]]]:
+    max_wait = API_MAX_WAIT_SECONDS if caller == INTERACTIVE else SCHEDULER_MAX_WAIT_SECONDS
+    attempt = 0
+    while True:
+        # 재시도도 할당량을 쓰므로 매번 예약
+        quota_ledger.acquire(QUOTA_UNITS_PER_CALL, caller, max_wait)
+        retry_after = None
+        try:
+            return _timed_fetch(client, video_ids, part, etags)
+        except HttpError as e:
+            reasons = _error_reasons(e)
+            if reasons & _QUOTA_REASONS:
+                # 다른 곳에서 같은 키를 써서 먼저 소진된 경우 - 모든 워커가 오늘은 더 호출하지 않도록 기록
+                quota_ledger.mark_exhausted()
+                raise QuotaExhausted(f"YouTube API 할당량이 소진되었습니다: {e.reason}") from e
+            if e.resp.status not in _RETRY_STATUSES and not reasons & _RATE_LIMIT_REASONS:
+                raise
+            error: Exception = e
+            retry_after = e.resp.get("retry-after")
+        except (OSError, httplib2.HttpLib2Error) as e:
+            # 연결 실패, 시간 초과 등
+            error = e
+        if attempt >= RETRY_ATTEMPTS:
+            raise YouTubeUnavailable(f"YouTube API 호출 실패 ({attempt + 1}회 시도): {error}") from error
+        _fetch_retries.labels().inc()
+        time.sleep(_backoff_seconds(attempt, retry_after))
+        attempt += 1
+
+
+def _timed_fetch(client, video_ids: List[str], part: str, etags: Optional[Mapping[str, str]]) -> Dict[str, Dict[str, Optional[object]]]:
+    """videos.list 한 번 호출 (호출 수, 지연 시간, 예상 할당량을 지표로 기록)"""
+    started = time.perf_counter()
+    try:
+        result = _fetch_video_stats(client, video_ids, part, etags)
+    except Exception:
+        _fetch_calls.labels("error").inc()
+        raise
+    else:
+        _fetch_calls.labels("ok").inc()
+    finally:
+        _fetch_seconds.labels().observe(time.perf_counter() - started)
+        _fetch_videos.labels(part).inc(len(video_ids))
+        _quota_units.labels().inc(QUOTA_UNITS_PER_CALL)
+    return result
+
+
+def _parse_hashtags(snippet: Dict) -> Optional[str]:
+    """snippet의 태그와 제목/설명 속 해시태그를 합쳐 공백으로 구분한 문자열로 (예: "#tag1 #tag2"), 없으면 None"""
+    title = snippet.get("title") or ""
+    description = snippet.get("description") or ""
+
+    all_tags = set()
+    # 기존 태그 처리
+    for t in snippet.get("tags") or []:
+        t = (t or "").strip()
+        if not t:
+            continue
+        if not t.startswith("#"):
+            t = f"#{t}"
+        all_tags.add(t)
+    # 제목과 설명에서 추출한 해시태그 처리
+    all_tags.update(_HASHTAG_RE.findall(title + " " + description))
+
+    if not all_tags:
+        return None
+    return " ".join(sorted(all_tags))
+
+
+def _count(value) -> int:
     try:
-        request = client.videos().list(
-            part="statistics,snippet",
-            id=",".join(video_ids),
-            maxResults=50,
-        )
-        response = request.execute()
-
-        for item in response.get("items", []):
-            vid = item.get("id")
-            stats = item.get("statistics", {})
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _snippet_etag(snippet: Dict) -> str:
+    """해시태그 추출에 쓰는 snippet 필드(제목, 설명, 태그)만으로 계산한 해시"""
+    content = [snippet.get("title") or "", snippet.get("description") or "", snippet.get("tags") or []]
+    return hashlib.sha1(json.dumps(content, ensure_ascii=False).encode()).hexdigest()
+
+
+def _fetch_video_stats(
+    client, video_ids: List[str], part: str, etags: Optional[Mapping[str, str]],
+) -> Dict[str, Dict[str, Optional[object]]]:
+    result: Dict[str, Dict[str, Optional[object]]] = {}
+    request = client.videos().list(
+        part=part,
+        id=",".join(video_ids),
+        maxResults=50,
+        fields=_FIELDS[part],
+    )
+    response = request.execute()
+
+    for item in response.get("items", []):
+        vid = item.get("id")
+        if not vid:
+            continue
+        stats = item.get("statistics", {})
+        data: Dict[str, Optional[object]] = {
+            "view_count": _count(stats.get("viewCount", "0")),
+            "like_count": _count(stats.get("likeCount", "0")),
+        }
+        if part == FULL_PART:
             snippet = item.get("snippet", {})
-            view_count_str = stats.get("viewCount", "0")
-            like_count_str = stats.get("likeCount", "0")
-            try:
-                view_count = int(view_count_str)
-            except Exception:
-                view_count = 0
-            try:
-                like_count = int(like_count_str)
-            except Exception:
-                like_count = 0
-
-            # 영상 제목 가져오기
-            title = snippet.get("title") or ""
-            description = snippet.get("description") or ""
-
-            tags = snippet.get("tags") or []
-            
-            # 제목과 설명에서 해시태그 추출
-            import re
-            text_hashtags = re.findall(r"#\S+", title + " " + description)
-            
-            all_tags = set()
-            
-            # 기존 태그 처리
-            for t in tags:
-                t = (t or "").strip()
-                if not t:
-                    continue
-                if not t.startswith("#"):
-                    t = f"#{t}"
-                all_tags.add(t)
-                
-            # 텍스트에서 추출한 해시태그 처리
-            for t in text_hashtags:
-                all_tags.add(t)
-
-            hashtags: Optional[str] = None
-            if all_tags:
-                # 공백으로 구분된 하나의 문자열로 저장(예: "#tag1 #tag2")
-                hashtags = " ".join(sorted(list(all_tags)))
-
-            if vid:
-                result[vid] = {"view_count": view_count,
-                               "like_count": like_count,
-                               "title": title, 
-                               "hashtags": hashtags}
-    except HttpError as e:
-        raise e
+            etag = _snippet_etag(snippet)
+            data["etag"] = etag
+            # 제목/설명/태그가 저장된 값과 같으면 해시태그를 다시 추출하지 않음 (title/hashtags 없음 = 변경 없음)
+            if etags is None or etags.get(vid) != etag:
+                data["title"] = snippet.get("title") or ""
+                data["hashtags"] = _parse_hashtags(snippet)
+        result[vid] = data
 
     return result
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    조회용 스레드 풀 (동시 호출 수별로 하나, 프로세스가 끝날 때까지 재사용)
+    스케줄러 데몬이 여러 번 실행해도 스레드와 스레드별 YouTube 클라이언트(HTTP 연결)를 다시 만들지 않음
+    """
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="youtube-fetch")
+            _executors[max_workers] = executor
+        return executor
+
+
+class StatsBatch(NamedTuple):
+    """iter_video_stats에 넘기는 배치 - ID 목록과 함께 조회 범위(part)와 저장된 snippet 해시를 지정"""
+    video_ids: List[str]
+    part: str = FULL_PART
+    etags: Optional[Mapping[str, str]] = None
+
+
+def _fetch_batch(batch: Union[List[str], StatsBatch], caller: str) -> Dict[str, Dict[str, Optional[object]]]:
+    if isinstance(batch, StatsBatch):
+        return fetch_video_stats(batch.video_ids, caller, batch.part, batch.etags)
+    return fetch_video_stats(batch, caller)
+
+
+def iter_video_stats(
+    batches: Iterable[Union[List[str], StatsBatch]],
+    max_workers: int = FETCH_CONCURRENCY,
+    caller: str = BACKGROUND,
+    return_exceptions: bool = False,
+) -> Iterator[Tuple[Union[List[str], StatsBatch], Union[Dict[str, Dict[str, Optional[object]]], Exception]]]:
+    """
+    여러 배치(각 최대 50개 ID, 또는 조회 범위를 지정한 StatsBatch)를 최대 max_workers개까지 동시에 조회하고,
+    끝나는 순서대로 (배치, 결과)를 반환
+    batches는 필요할 때마다 하나씩만 꺼내므로 진행 중인 배치 수는 max_workers를 넘지 않음
+    호출 측은 결과를 받는 동안 DB 쓰기를 하면 되고, 그 사이 나머지 배치의 네트워크 대기가 겹쳐서 진행됨
+    return_exceptions이면 실패한 배치의 결과로 예외를 돌려주고 나머지 배치는 계속 진행 (아니면 그대로 발생)
+    """
+    if max_workers <= 1:
+        for batch in batches:
+            try:
+                stats_map = _fetch_batch(batch, caller)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                stats_map = e
+            yield batch, stats_map
+        return
+
+    batch_iter = iter(batches)
+    executor = _get_executor(max_workers)
+    pending = {}
+
+    def submit_next() -> None:
+        batch = next(batch_iter, None)
+        if batch is not None:
+            pending[executor.submit(_fetch_batch, batch, caller)] = batch
+
+    try:
+        for _ in range(max_workers):
+            submit_next()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                error = future.exception()
+                if error is not None and not return_exceptions:
+                    raise error
+                stats_map = error if error is not None else future.result()
+                submit_next()
+                yield batch, stats_map
+    finally:
+        # 중간에 멈춘 경우 진행 중인 호출이 끝날 때까지 기다림 (결과는 버림)
+        wait(pending)
@@ -0,0 +1,273 @@
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import metrics
+from app.database import engine
+from app.models import YouTubeQuotaUsage
+
+# 하루에 쓸 수 있는 YouTube Data API 할당량 (Google Cloud 프로젝트 기본값 10,000 units)
+DAILY_QUOTA_UNITS = int(os.getenv("YOUTUBE_DAILY_QUOTA_UNITS", "10000"))
+# 할당량이 초기화되는 시간대 (YouTube는 태평양 시간 자정에 초기화)
+QUOTA_TIMEZONE = os.getenv("YOUTUBE_QUOTA_TIMEZONE", "America/Los_Angeles")
+# 사용자 등록(API)용으로 남겨 두는 일일 할당량 - 초기화 시각이 가까워질수록 줄어들어 남은 몫은 스케줄러가 씀
+API_RESERVE_UNITS = int(os.getenv("YOUTUBE_API_RESERVE_UNITS", "500"))
+# 토큰 버킷 크기 (한 번에 몰아 쓸 수 있는 호출 수) - 남은 일일 할당량을 남은 시간에 나눈 속도로 채워짐
+BUCKET_CAPACITY = float(os.getenv("YOUTUBE_BUCKET_CAPACITY", "100"))
+# 스케줄러가 버킷에 남겨 두는 토큰 수 (사용자 등록이 기다리지 않도록)
+API_RESERVE_TOKENS = float(os.getenv("YOUTUBE_API_RESERVE_TOKENS", "5"))
+# 재시도까지 실패한 호출이 연속으로 이만큼 쌓이면 차단기를 열고, 이 시간(초) 뒤에 시험 호출
+CIRCUIT_FAILURES = int(os.getenv("YOUTUBE_CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("YOUTUBE_CIRCUIT_RESET_SECONDS", "60"))
+
+# 호출 측 구분 - 사용자 요청(API)은 남겨 둔 몫까지 쓰고, 스케줄러는 API 몫을 남김
+INTERACTIVE = "api"
+BACKGROUND = "scheduler"
+
+_rejections = metrics.counter(
+    "youtube_quota_rejections_total", "YouTube calls refused before sending", ["caller", "reason"],
+)
+_wait_seconds = metrics.counter(
+    "youtube_quota_wait_seconds_total", "Time spent waiting for YouTube token bucket tokens", ["caller"],
+)
+_circuit_state = metrics.gauge("youtube_circuit_state", "YouTube circuit breaker state (0 closed, 1 half-open, 2 open)")
+_circuit_opens = metrics.counter("youtube_circuit_opens_total", "Times the YouTube circuit breaker opened")
+
+
+class YouTubeUnavailable(Exception):
+    """
+    YouTube를 지금은 호출할 수 없음 (할당량 소진, 호출 제한, 일시적 장애)
+    호출 측은 실패로 처리하지 말고 캐시된 값을 쓰거나 갱신을 다음으로 미룸
+    retry_after: 다시 시도해 볼 만한 시간(초)
+    """
+
+    def __init__(self, message: str, retry_after: float = 60):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaExhausted(YouTubeUnavailable):
+    """오늘 할당량을 다 씀 (초기화 시각까지 호출하지 않음)"""
+
+
+class QuotaThrottled(YouTubeUnavailable):
+    """토큰 버킷이 비어 있고 기다릴 수 있는 시간 안에 채워지지 않음"""
+
+
+class CircuitOpen(YouTubeUnavailable):
+    """연속된 호출 실패로 차단기가 열려 있음 (잠시 호출하지 않음)"""
+
+
+def _quota_timezone():
+    try:
+        return ZoneInfo(QUOTA_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        # 시간대 데이터가 없는 환경 - 태평양 표준시로 계산 (서머타임 기간에는 1시간 차이)
+        return timezone(timedelta(hours=-8))
+
+
+_QUOTA_TZ = _quota_timezone()
+
+
+def quota_day(now: Optional[datetime] = None) -> Tuple[date, float]:
+    """할당량 기준 날짜와 다음 초기화까지 남은 시간(초)"""
+    local = (now or datetime.now(timezone.utc)).astimezone(_QUOTA_TZ)
+    midnight = datetime.combine(local.date() + timedelta(days=1), datetime.min.time(), tzinfo=_QUOTA_TZ)
+    return local.date(), max((midnight - local).total_seconds(), 1.0)
+
+
+class QuotaLedger:
+    """
+    YouTube 할당량 사용량을 DB(youtube_quota_usage)에 기록하고, 호출 전에 예약해 일일 한도를 넘지 않게 함
+    - API 워커와 스케줄러(여러 프로세스/노드)가 같은 행을 원자적으로 갱신하므로 합계가 한도를 넘지 않음
+    - 같은 행의 토큰 버킷은 (남은 일일 할당량 / 초기화까지 남은 시간) 속도로 채워져
+      하루 동안 고르게 쓰되, 덜 쓴 몫은 남은 시간에 나눠 쓰게 되어 할당량을 끝까지 씀
+    - 실패한 호출도 할당량을 쓰므로 예약한 단위는 돌려주지 않음
+    """
+
+    def __init__(
+        self,
+        daily_units: int = DAILY_QUOTA_UNITS,
+        api_reserve_units: int = API_RESERVE_UNITS,
+        capacity: float = BUCKET_CAPACITY,
+        api_reserve_tokens: float = API_RESERVE_TOKENS,
+    ):
+        self.daily_units = daily_units
+        self.api_reserve_units = api_reserve_units
+        self.capacity = capacity
+        self.api_reserve_tokens = api_reserve_tokens
+
+    def limit_for(self, caller: str, seconds_left: float) -> int:
+        """호출 측이 오늘 쓸 수 있는 누적 한도 (스케줄러는 API 몫을 남기되, 남길 몫은 초기화 시각에 가까울수록 줄어듦)"""
+        if caller == INTERACTIVE:
+            return self.daily_units
+        return self.daily_units - int(self.api_reserve_units * min(seconds_left / 86400, 1.0))
+
+    def _try_acquire(self, units: int, caller: str) -> Optional[float]:
+        """units만큼 예약하면 None, 토큰이 모자라면 기다려야 할 시간(초), 한도에 도달했으면 QuotaExhausted"""
+        day, seconds_left = quota_day()
+        limit = self.limit_for(caller, seconds_left)
+        if units > limit:
+            raise QuotaExhausted("오늘 YouTube API 할당량을 모두 사용했습니다.", retry_after=seconds_left)
+        # 버킷이 작게 설정되어도 스케줄러가 영영 토큰을 못 받지 않도록 남길 토큰은 버킷의 절반까지만
+        reserve = min(self.api_reserve_tokens, self.capacity / 2) if caller == BACKGROUND else 0.0
+        q = YouTubeQuotaUsage.__table__
+        rate = func.greatest(self.daily_units - q.c.units_used, 0) / seconds_left
+        refilled = func.least(self.capacity, q.c.tokens + rate * func.extract("epoch", func.now() - q.c.refilled_at))
+        stmt = pg_insert(q).values(day=day, units_used=units, tokens=self.capacity - units, refilled_at=func.now())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[q.c.day],
+            set_={"units_used": q.c.units_used + units, "tokens": refilled - units, "refilled_at": func.now()},
+            where=(q.c.units_used + units <= limit) & (refilled - units >= reserve),
+        ).returning(q.c.units_used)
+        with engine.begin() as conn:
+            if conn.execute(stmt).first() is not None:
+                return None
+            row = conn.execute(
+                select(q.c.units_used, refilled.label("tokens")).where(q.c.day == day)
+            ).one()
+        if row.units_used + units > limit:
+            raise QuotaExhausted("오늘 YouTube API 할당량을 모두 사용했습니다.", retry_after=seconds_left)
+        rate = max(self.daily_units - row.units_used, 1) / seconds_left
+        return (units + reserve - row.tokens) / rate
+
+    def acquire(self, units: int, caller: str, max_wait: float) -> None:
+        """
+        units만큼 할당량을 예약 (토큰이 모자라면 최대 max_wait초까지 기다림)
+        한도에 도달하면 QuotaExhausted, 기다려도 토큰이 모자라면 QuotaThrottled
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            try:
+                wait = self._try_acquire(units, caller)
+            except QuotaExhausted:
+                _rejections.labels(caller, "exhausted").inc()
+                raise
+            if wait is None:
+                return
+            if wait > deadline - time.monotonic():
+                _rejections.labels(caller, "throttled").inc()
+                raise QuotaThrottled(f"YouTube API 호출이 많아 {wait:.0f}초 뒤에 다시 시도해야 합니다.", retry_after=wait)
+            # 동시에 기다리는 호출이 같은 시각에 몰리지 않도록 조금씩 흔듦
+            wait += random.uniform(0, 0.05)
+            _wait_seconds.labels(caller).inc(wait)
+            time.sleep(wait)
+
+    def mark_exhausted(self) -> None:
+        """YouTube가 quotaExceeded로 응답한 경우 (다른 곳에서 같은 키를 썼을 때 등) 오늘 남은 할당량을 0으로 기록"""
+        day, _ = quota_day()
+        q = YouTubeQuotaUsage.__table__
+        stmt = pg_insert(q).values(day=day, units_used=self.daily_units, tokens=0, refilled_at=func.now())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[q.c.day],
+            set_={"units_used": func.greatest(q.c.units_used, self.daily_units), "tokens": 0},
+        )
+        with engine.begin() as conn:
+            conn.execute(stmt)
+
+    @staticmethod
+    def _units_used(conn, day: date) -> int:
+        # ORM 매퍼 설정 없이 쓸 수 있도록 테이블로 조회 (youtube_client만 단독으로 임포트하는 경우)
+        q = YouTubeQuotaUsage.__table__
+        return conn.scalar(select(q.c.units_used).where(q.c.day == day)) or 0
+
+    def remaining_units(self, caller: str) -> int:
+        """호출 측이 오늘 더 쓸 수 있는 할당량"""
+        day, seconds_left = quota_day()
+        with engine.connect() as conn:
+            used = self._units_used(conn, day)
+        return max(self.limit_for(caller, seconds_left) - used, 0)
+
+    def usage(self) -> Dict:
+        """오늘 사용량 (/internal/stats)"""
+        day, seconds_left = quota_day()
+        with engine.connect() as conn:
+            used = self._units_used(conn, day)
+        return {
+            "day": day.isoformat(),
+            "units_used": used,
+            "daily_units": self.daily_units,
+            "remaining": max(self.daily_units - used, 0),
+            "resets_in_seconds": round(seconds_left),
+        }
+
+
+class CircuitBreaker:
+    """
+    YouTube 호출이 연속으로 failure_threshold번 실패하면(재시도 후) 차단기를 열어 reset_seconds 동안 바로 CircuitOpen을 냄
+    (할당량/시간을 쓰지 않고 호출 측이 캐시된 값이나 다음 주기로 넘어가게 함)
+    시간이 지나면 한 번의 시험 호출만 보내고(half-open), 성공하면 닫고 실패하면 다시 엶
+    프로세스마다 따로 동작
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> None:
+        # 호출자가 self._lock을 잡고 있어야 함
+        self.state = state
+        _circuit_state.labels().set(self._STATE_VALUES[state])
+
+    def before_call(self) -> None:
+        """호출해도 되면 그대로 반환, 아니면 CircuitOpen"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_seconds - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpen("YouTube API 호출이 계속 실패해 잠시 중단했습니다.", retry_after=remaining)
+                self._set_state(self.HALF_OPEN)
+            if self._probing:
+                raise CircuitOpen("YouTube API 연결을 확인하는 중입니다.", retry_after=1)
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opens += 1
+                    _circuit_opens.labels().inc()
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def release(self) -> None:
+        """성공/실패로 볼 수 없는 결과(할당량 부족, 잘못된 요청 등) - 시험 호출 자리만 돌려줌"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "opens": self.opens}
+
+
+quota_ledger = QuotaLedger()
+circuit_breaker = CircuitBreaker(CIRCUIT_FAILURES, CIRCUIT_RESET_SECONDS)
@@ -7,14 +7,9 @@ echo "Starting Gunicorn API server in background..."
 # 1. Gunicorn 서버를 "백그라운드"에서 실행 (&)
 gunicorn -w 4 -k uvicorn.workers.UvicornWorker app.main:app --bind 0.0.0.0:3000 &
 
-echo "Starting Scheduler loop in foreground..."
-# 2. DB가 준비될 때까지 10초 대기
-sleep 10
-
+echo "Starting Scheduler daemon in foreground..."
+# 2. 스케줄러 데몬을 "포그라운드"에서 실행 (DB가 준비될 때까지 첫 주기 전 10초 대기, 이후 10분 간격)
+#    exec로 셸을 대체해 SIGTERM이 데몬에 바로 전달됨 (진행 중인 배치까지 반영하고 종료)
 #    (이 프로세스가 살아있는 한, Render는 Web Service를 "Running"으로 인식)
-while true; do
-    echo "Scheduler: 'update_views' 작업 실행..."
-    python -m scheduler.update_views
-    echo "Scheduler: 작업 완료. 10분(600초)간 대기..."
-    sleep 600
-done
\ No newline at end of file
+export SCHEDULER_STARTUP_DELAY_SECONDS="${SCHEDULER_STARTUP_DELAY_SECONDS:-10}"
+exec python -m scheduler.daemon
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import exc
+
+from app.database import Base, SessionLocal, engine
+from app.user import models as user_models  # noqa: F401 (Shorts.owner 관계 매핑용)
+
+
+@pytest.fixture(scope="session")
+def _schema():
+    """DATABASE_URL의 DB에 테이블을 만듦 - 연결할 수 없으면 DB가 필요한 테스트는 건너뜀"""
+    try:
+        Base.metadata.create_all(bind=engine)
+    except exc.OperationalError as e:
+        pytest.skip(f"DB에 연결할 수 없음: {e}")
+
+
+@pytest.fixture
+def db(_schema):
+    """
+    테스트마다 연결 하나의 바깥 트랜잭션 안에서 실행하고 끝나면 롤백
+    (테스트 대상 코드의 commit/rollback은 SAVEPOINT에만 적용되므로 DB에 흔적이 남지 않음)
+    """
+    connection = engine.connect()
+    outer = connection.begin()
+    session = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        outer.rollback()
+        connection.close()
@@ -0,0 +1,46 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app import observability
+from scheduler.daemon import SchedulerDaemon, _serve_health
+
+
+@pytest.fixture
+def server():
+    server = _serve_health(SchedulerDaemon(), 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(server, path, token=None):
+    host, port = server.server_address[:2]
+    request = urllib.request.Request(f"http://{host}:{port}{path}")
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_binds_loopback_by_default(server):
+    assert server.server_address[0] == "127.0.0.1"
+
+
+def test_health_open_metrics_require_token(server, monkeypatch):
+    monkeypatch.setattr(observability, "INTERNAL_API_TOKEN", "secret")
+
+    assert _get(server, "/health") == 200
+    assert _get(server, "/metrics") == 401
+    assert _get(server, "/metrics", "wrong") == 401
+    assert _get(server, "/metrics", "secret") == 200
+
+
+def test_metrics_hidden_without_token(server, monkeypatch):
+    monkeypatch.setattr(observability, "INTERNAL_API_TOKEN", None)
+
+    assert _get(server, "/metrics", "anything") == 404
@@ -0,0 +1,38 @@
+from sqlalchemy import exc, text
+
+from app.database import _asyncpg_url
+
+
+def test_asyncpg_url_translates_libpq_params():
+    url, connect_args = _asyncpg_url(
+        "postgresql://user:pw@db:5432/app?sslmode=require&connect_timeout=5"
+        "&application_name=api&options=-c%20statement_timeout%3D5000&keepalives=1"
+    )
+
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {}
+    assert connect_args == {
+        "ssl": "require",
+        "timeout": 5.0,
+        "server_settings": {"application_name": "api", "statement_timeout": "5000"},
+    }
+
+
+def test_asyncpg_url_keeps_supported_params():
+    url, connect_args = _asyncpg_url("postgresql://user@/app?host=/tmp/pg&sslmode=disable")
+
+    assert dict(url.query) == {"host": "/tmp/pg"}
+    assert connect_args == {"ssl": False}
+
+
+def test_failed_statement_does_not_leak_timing_state(db):
+    conn = db.connection()
+    for _ in range(3):
+        savepoint = conn.begin_nested()
+        try:
+            conn.execute(text("SELECT 1 / 0"))
+        except exc.DBAPIError:
+            savepoint.rollback()
+    conn.execute(text("SELECT 1"))
+
+    assert conn.info["query_started"] == []
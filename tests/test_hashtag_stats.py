@@ -0,0 +1,56 @@
+from sqlalchemy import update
+
+from app import crud, models
+
+TAGS = "#filmchain #testrollup"
+
+
+def _stored(db, tag: str):
+    row = db.get(models.HashtagStats, tag)
+    return [row.total_views, row.total_likes, row.shorts_count] if row else [0, 0, 0]
+
+
+def _assert_rollup_matches(db, *tags: str) -> None:
+    """hashtag_stats의 값이 shorts에서 직접 계산한 값과 같은지"""
+    expected = crud.compute_hashtag_stats(db, list(tags))
+    for tag in tags:
+        assert _stored(db, tag) == expected.get(tag, [0, 0, 0]), tag
+
+
+def _insert(db, video_id: str, views: int, likes: int = 0, hashtags: str = TAGS) -> models.Shorts:
+    return crud.insert_shorts(db, video_id, f"https://youtu.be/{video_id}", views, likes, "title", hashtags)
+
+
+def test_insert_and_refresh_keep_rollup_in_sync(db, monkeypatch):
+    base = _stored(db, "testrollup")
+    _insert(db, "test-roll-01", 100, 10)
+    _insert(db, "test-roll-02", 50, 5)
+    assert _stored(db, "testrollup") == [base[0] + 150, base[1] + 15, base[2] + 2]
+
+    # 조회수가 바뀌고 #filmchain이 빠지면 집계에서 제외
+    monkeypatch.setattr(crud, "fetch_video_stats", lambda ids: {
+        "test-roll-01": {"view_count": 120, "like_count": 12, "title": "title", "hashtags": TAGS},
+        "test-roll-02": {"view_count": 70, "like_count": 5, "title": "title", "hashtags": "#testrollup"},
+    })
+    crud.update_shorts_views(db, "test-roll-01")
+    crud.update_shorts_views(db, "test-roll-02")
+
+    assert _stored(db, "testrollup") == [base[0] + 120, base[1] + 12, base[2] + 1]
+    _assert_rollup_matches(db, "testrollup", "filmchain")
+
+
+def test_refresh_uses_values_committed_while_fetching(db, monkeypatch):
+    """YouTube를 조회하는 동안 다른 갱신이 먼저 반영돼도 그 값을 기준으로 증감분을 계산"""
+    db_shorts = _insert(db, "test-roll-03", 100)
+
+    def concurrent_refresh_then_fetch(ids):
+        # 다른 요청/스케줄러의 갱신 (이 세션의 영상 객체는 이전 값 100을 그대로 가지고 있음)
+        db.execute(update(models.Shorts.__table__).where(models.Shorts.id == db_shorts.id).values(view_count=150))
+        crud.apply_hashtag_stats_deltas(db, crud.hashtag_stats_delta(TAGS, 100, 0, TAGS, 150, 0))
+        return {"test-roll-03": {"view_count": 200, "like_count": 0, "title": "title", "hashtags": TAGS}}
+
+    monkeypatch.setattr(crud, "fetch_video_stats", concurrent_refresh_then_fetch)
+    refreshed = crud.update_shorts_views(db, "test-roll-03")
+
+    assert refreshed.view_count == 200
+    _assert_rollup_matches(db, "testrollup", "filmchain")
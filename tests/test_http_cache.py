@@ -0,0 +1,41 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app import http_cache
+from app.generations import generation_tracker
+
+app = FastAPI()
+
+
+@app.get("/views", dependencies=[http_cache.conditional(http_cache.VIEWS)])
+def views():
+    return {"ok": True}
+
+
+client = TestClient(app)
+
+
+def test_not_modified_when_etag_matches(monkeypatch):
+    async def current():
+        return 7, 3
+    monkeypatch.setattr(generation_tracker, "current", current)
+
+    first = client.get("/views")
+    again = client.get("/views", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200 and first.headers["ETag"] == 'W/"v7"'
+    assert again.status_code == 304
+
+
+def test_generation_read_error_serves_uncached(monkeypatch):
+    async def current():
+        raise OperationalError("SELECT nextval", {}, Exception("connection refused"))
+    monkeypatch.setattr(generation_tracker, "current", current)
+    errors = http_cache.stats()[http_cache.VIEWS]["errors"]
+
+    response = client.get("/views", headers={"If-None-Match": 'W/"v7"'})
+
+    assert response.status_code == 200 and response.json() == {"ok": True}
+    assert "ETag" not in response.headers and "Cache-Control" not in response.headers
+    assert http_cache.stats()[http_cache.VIEWS]["errors"] == errors + 1
@@ -0,0 +1,44 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import observability
+from app.observability import require_internal
+
+# app.main은 import 시 DB 스키마를 만들므로 의존성만 붙인 작은 앱으로 확인
+app = FastAPI()
+
+
+@app.get("/metrics", dependencies=[Depends(require_internal)])
+def metrics():
+    return "ok"
+
+
+client = TestClient(app)
+
+
+def test_hidden_without_token(monkeypatch):
+    monkeypatch.setattr(observability, "INTERNAL_API_TOKEN", None)
+
+    assert client.get("/metrics", headers={"Authorization": "Bearer anything"}).status_code == 404
+
+
+def test_requires_matching_token(monkeypatch):
+    monkeypatch.setattr(observability, "INTERNAL_API_TOKEN", "secret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/internal/stats"])
+def test_api_routes_use_require_internal(path):
+    """실제 API 서버의 두 엔드포인트에 의존성이 붙어 있는지 (DB에 연결할 수 없으면 건너뜀)"""
+    from sqlalchemy import exc
+
+    try:
+        from app.main import app as api
+    except exc.OperationalError as e:
+        pytest.skip(f"DB에 연결할 수 없음: {e}")
+    route = next(r for r in api.routes if getattr(r, "path", None) == path)
+    assert any(dep.call is require_internal for dep in route.dependant.dependencies)
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Callable, List, Optional
+
+import pytest
+
+from app.generations import VIEWS, VOTES, GenerationTracker
+from app.live import ChangeFeed, GenerationFeed, LiveHub
+
+
+class _SharedFeed(ChangeFeed):
+    """여러 워커(LiveHub)가 같은 채널을 구독하는 브로커 흉내 (Redis pub/sub 등의 자리)"""
+
+    def __init__(self, channel: List[Callable[[str, Optional[List[str]]], None]]):
+        self.channel = channel
+
+    def start(self, on_change):
+        self.channel.append(on_change)
+
+    def publish(self, kind, tags=None):
+        for on_change in self.channel:
+            on_change(kind, tags)
+
+
+def test_custom_feed_reaches_other_workers():
+    async def run():
+        channel = []
+        first, second = LiveHub(feed=_SharedFeed(channel)), LiveHub(feed=_SharedFeed(channel))
+        first.start()
+        second.start()
+        try:
+            first.notify(VOTES, ["#a"])
+            return second._dirty_votes, second._wake.is_set()
+        finally:
+            await first.stop()
+            await second.stop()
+
+    dirty, woken = asyncio.run(run())
+    assert dirty == {"#a"}
+    assert woken
+
+
+def test_incomplete_feed_fails_at_construction():
+    class _SubscribeOnly(ChangeFeed):
+        def start(self, on_change):
+            pass
+
+    with pytest.raises(TypeError):
+        _SubscribeOnly()
+
+
+def test_generation_feed_forwards_local_and_tracked_changes():
+    async def run():
+        tracker = GenerationTracker()
+        hub = LiveHub(feed=GenerationFeed(tracker))
+        hub.start()
+        try:
+            hub.notify(VOTES, ["#a"])
+            local = set(hub._dirty_votes)
+            # 다른 워커/스케줄러의 변경은 세대 번호 변화로만 알게 됨 (어느 해시태그인지 모름)
+            for listener in tracker._listeners:
+                listener(VOTES)
+                listener(VIEWS)
+            return local, hub._dirty_votes, hub._dirty_views, len(tracker._listeners)
+        finally:
+            await hub.stop()
+
+    local, dirty_votes, dirty_views, listeners = asyncio.run(run())
+    assert local == {"#a"}
+    assert dirty_votes is None
+    assert dirty_views
+    assert listeners == 1
@@ -0,0 +1,75 @@
+from sqlalchemy import func
+
+from app import crud, models
+
+TAGS = "#filmchain #testbulk"
+
+
+def _url(video_id: str) -> str:
+    return f"https://youtu.be/{video_id}"
+
+
+def _video(views: int, hashtags: str = TAGS):
+    return {"view_count": views, "like_count": views // 10, "title": "title", "hashtags": hashtags}
+
+
+def _history(db, video_id: str) -> int:
+    return db.query(func.count()).select_from(models.ShortsStatsHistory)\
+        .join(models.Shorts, models.Shorts.id == models.ShortsStatsHistory.shorts_id)\
+        .filter(models.Shorts.video_id == video_id)\
+        .scalar()
+
+
+def test_bulk_create_writes_rows_index_rollup_and_history(db, monkeypatch):
+    crud.insert_shorts(db, "test-bulk-0", _url("test-bulk-0"), 10, 1, "title", TAGS)
+    videos = {
+        "test-bulk-1": _video(100),
+        "test-bulk-2": _video(50),
+        "test-bulk-3": _video(70, "#testbulk"),
+    }
+    lookups = []
+
+    def get_many(ids):
+        lookups.append(list(ids))
+        return {vid: videos[vid] for vid in ids if vid in videos}
+    monkeypatch.setattr(crud.video_lookup, "get_many", get_many)
+
+    response = crud.create_shorts_bulk(db, [
+        _url("test-bulk-1"), _url("test-bulk-2"), _url("test-bulk-1"),
+        _url("test-bulk-0"), _url("test-bulk-3"), _url("test-bulk-9"), "https://example.com/x",
+    ], hashtags="#testbulk")
+
+    assert [r.status for r in response.results] == [
+        "created", "created", "duplicate", "exists", "rejected", "rejected", "invalid_url",
+    ]
+    assert response.created == 2
+    # 이미 등록된 영상과 요청 안의 중복은 YouTube에 묻지 않음
+    assert lookups == [["test-bulk-1", "test-bulk-2", "test-bulk-3", "test-bulk-9"]]
+
+    stored = {s.video_id: s for s in db.query(models.Shorts).filter(models.Shorts.video_id.like("test-bulk-%"))}
+    assert set(stored) == {"test-bulk-0", "test-bulk-1", "test-bulk-2"}
+    assert (stored["test-bulk-1"].view_count, stored["test-bulk-1"].like_count) == (100, 10)
+    pairs = db.query(models.ShortsHashtag.hashtag, models.ShortsHashtag.view_count)\
+        .filter(models.ShortsHashtag.shorts_id == stored["test-bulk-2"].id)\
+        .all()
+    assert sorted(pairs) == [("filmchain", 50), ("testbulk", 50)]
+    row = db.get(models.HashtagStats, "testbulk")
+    assert [row.total_views, row.total_likes, row.shorts_count] == [160, 16, 3]
+    assert [row.total_views, row.total_likes, row.shorts_count] == crud.compute_hashtag_stats(db, ["testbulk"])["testbulk"]
+    assert _history(db, "test-bulk-1") == _history(db, "test-bulk-2") == 1
+
+
+def test_insert_bulk_skips_conflicting_video_ids(db):
+    crud.insert_shorts(db, "test-bulk-10", _url("test-bulk-10"), 10, 0, "title", TAGS)
+
+    inserted = crud.insert_shorts_bulk(db, [
+        {"video_id": vid, "url": _url(vid), "user_id": None, **_video(views)}
+        for vid, views in [("test-bulk-10", 999), ("test-bulk-11", 20)]
+    ])
+
+    assert set(inserted) == {"test-bulk-11"}
+    existing = db.query(models.Shorts).filter(models.Shorts.video_id == "test-bulk-10").one()
+    assert existing.view_count == 10
+    row = db.get(models.HashtagStats, "testbulk")
+    assert [row.total_views, row.shorts_count] == [30, 2]
+    assert _history(db, "test-bulk-10") == _history(db, "test-bulk-11") == 1
@@ -0,0 +1,77 @@
+import json
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app import crud, models
+
+
+def _insert(db, video_id: str, views: int, hashtags: str) -> models.Shorts:
+    return crud.insert_shorts(db, video_id, f"https://youtu.be/{video_id}", views, 0, "title", hashtags)
+
+
+def _pages(db, tag: str, limit: int):
+    """X-Next-Cursor와 같은 방식으로 (view_count, id) 커서를 넘기며 끝까지 조회"""
+    pages, after = [], None
+    while True:
+        page = crud.get_shorts_by_hashtag(db, tag, limit=limit, after=after)
+        pages.append([s.video_id for s in page])
+        if len(page) < limit:
+            return pages
+        after = (page[-1].view_count, page[-1].id)
+
+
+def test_keyset_pages_cover_filmchain_rows_once(db):
+    # 같은 조회수(30)가 여럿 있어도 id로 순서가 정해짐, #filmchain이 없는 영상은 제외
+    for n, views in enumerate([50, 30, 30, 30, 10, 90, 30]):
+        _insert(db, f"test-page-{n}", views, "#filmchain #testpage")
+    _insert(db, "test-page-x", 70, "#testpage")
+
+    pages = _pages(db, "#testpage", limit=2)
+
+    assert pages == [
+        ["test-page-5", "test-page-0"],
+        ["test-page-6", "test-page-3"],
+        ["test-page-2", "test-page-1"],
+        ["test-page-4"],
+    ]
+
+
+def test_refresh_reorders_list(db, monkeypatch):
+    _insert(db, "test-page-a", 100, "#filmchain #testreorder")
+    _insert(db, "test-page-b", 50, "#filmchain #testreorder")
+    monkeypatch.setattr(crud, "fetch_video_stats", lambda ids: {
+        "test-page-b": {"view_count": 200, "like_count": 0, "title": "title", "hashtags": "#filmchain #testreorder #testadded"},
+    })
+
+    crud.update_shorts_views(db, "test-page-b")
+
+    assert [s.video_id for s in crud.get_shorts_by_hashtag(db, "testreorder")] == ["test-page-b", "test-page-a"]
+    assert [s.video_id for s in crud.get_shorts_by_hashtag(db, "testadded")] == ["test-page-b"]
+    copies = db.query(models.ShortsHashtag.view_count)\
+        .join(models.Shorts, models.Shorts.id == models.ShortsHashtag.shorts_id)\
+        .filter(models.Shorts.video_id == "test-page-b")\
+        .all()
+    assert [views for views, in copies] == [200, 200, 200]
+
+
+def test_page_reads_only_limit_rows_of_tag_index(db):
+    for n in range(30):
+        _insert(db, f"test-scan-{n}", n, "#filmchain #testscan")
+    query = crud._shorts_by_hashtag_query("testscan", 5, None)
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    # 작은 테스트 테이블에서는 순차 스캔이 더 싸게 계산되므로 끔
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = db.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    def nodes(node):
+        yield node
+        for child in node.get("Plans", []):
+            yield from nodes(child)
+
+    scans = [n for n in nodes(plan[0]["Plan"]) if n.get("Index Name") == "ix_shorts_hashtags_tag_views"]
+    assert scans and scans[0]["Actual Rows"] <= 5
+    assert not any(n["Node Type"] == "Sort" for n in nodes(plan[0]["Plan"]))
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+from app import crud, models
+from scheduler import rollup_history
+
+
+def _shorts(db, view_count: int) -> models.Shorts:
+    db_shorts = models.Shorts(video_id="test-history-0001", url="https://youtu.be/test-history-0001", view_count=view_count, like_count=0)
+    db.add(db_shorts)
+    db.flush()
+    return db_shorts
+
+
+def _sample(db, shorts_id: int, ts: datetime, view_count: int, resolution: int = rollup_history.RESOLUTION_RAW) -> None:
+    db.add(models.ShortsStatsHistory(shorts_id=shorts_id, resolution=resolution, ts=ts, view_count=view_count, like_count=0))
+    db.flush()
+
+
+def test_gain_counts_from_value_in_effect_at_start(db):
+    """구간 시작 전 마지막 값(100)을 기준으로 증가량을 계산 - 구간 안의 점만 보면 0이 됨"""
+    now = datetime.now(timezone.utc)
+    db_shorts = _shorts(db, 200)
+    _sample(db, db_shorts.id, now - timedelta(hours=30), 100)
+    _sample(db, db_shorts.id, now - timedelta(hours=10), 200)
+
+    start = now - timedelta(hours=24)
+    series = crud.get_shorts_history(db, db_shorts, start, now + timedelta(minutes=1))
+
+    assert series.resolution == "raw"
+    assert series.gained_views == 100
+    assert series.points[0].ts == start
+    assert series.points[0].view_count == 100
+    assert [p.view_count for p in series.points] == [100, 200, 200]
+
+
+def test_baseline_falls_back_to_finer_resolution(db):
+    """고른 해상도(시간 단위)에 start 이전 점이 없으면 아직 요약되지 않은 원본에서 기준값을 찾음"""
+    now = datetime.now(timezone.utc)
+    db_shorts = _shorts(db, 500)
+    start = now - rollup_history.RAW_RETENTION - timedelta(hours=5)
+    _sample(db, db_shorts.id, start - timedelta(hours=1), 300)
+
+    series = crud.get_shorts_history(db, db_shorts, start, now + timedelta(minutes=1))
+
+    assert series.resolution == "hourly"
+    assert series.gained_views == 200
+
+
+def test_no_baseline_before_first_sample(db):
+    """start 이전 기록이 없으면 (구간 중간에 등록된 영상) 첫 점부터 계산"""
+    now = datetime.now(timezone.utc)
+    db_shorts = _shorts(db, 250)
+    _sample(db, db_shorts.id, now - timedelta(hours=5), 150)
+
+    series = crud.get_shorts_history(db, db_shorts, now - timedelta(hours=24), now + timedelta(minutes=1))
+
+    assert series.gained_views == 100
+    assert series.points[0].view_count == 150
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, update
+
+from app import crud, models
+from scheduler import update_views
+
+TAGS = "#filmchain #testlease"
+# 다른 데이터가 있는 DB에서도 이 테스트의 영상만 임대하도록 아주 오래된 갱신 예정 시각을 사용
+DUE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+NOW = DUE + timedelta(minutes=1)
+
+
+def _counts():
+    return {"changed": 0, "unchanged": 0, "missing": 0, "deferred": 0, "lost": 0}
+
+
+def _insert_due(db, video_id: str, views: int) -> models.Shorts:
+    db_shorts = crud.insert_shorts(db, video_id, f"https://youtu.be/{video_id}", views, 0, "title", TAGS)
+    crud.ensure_refresh_states(db, due_at=DUE)
+    db.execute(
+        update(models.ShortsRefreshState)
+        .where(models.ShortsRefreshState.shorts_id == db_shorts.id)
+        .values(next_due_at=DUE)
+    )
+    return db_shorts
+
+
+def _stats(view_count: int):
+    return {"view_count": view_count, "like_count": 0}
+
+
+def _samples(db, shorts_id: int) -> int:
+    return db.query(func.count()).select_from(models.ShortsStatsHistory)\
+        .filter(models.ShortsStatsHistory.shorts_id == shorts_id).scalar()
+
+
+def test_workers_lease_disjoint_rows(db):
+    ids = {_insert_due(db, f"test-lease-{n:02d}", 100).id for n in range(4)}
+
+    first = update_views._lease_chunk(db, 2, NOW, worker_id="worker-a")
+    second = update_views._lease_chunk(db, 10, NOW, worker_id="worker-b")
+
+    assert len(first) == 2
+    assert {r.id for r in first} | {r.id for r in second} == ids
+    assert not {r.id for r in first} & {r.id for r in second}
+
+
+def test_expired_lease_taken_over_is_not_written_twice(db):
+    db_shorts = _insert_due(db, "test-lease-10", 100)
+    stale = update_views._lease_chunk(db, 10, NOW, worker_id="worker-a")
+    # worker-a가 백오프 등으로 오래 멈춰 임대가 만료됨 → worker-b가 가져가 먼저 갱신
+    db.execute(
+        update(models.ShortsRefreshState)
+        .where(models.ShortsRefreshState.shorts_id == db_shorts.id)
+        .values(lease_expires_at=func.now() - timedelta(seconds=1))
+    )
+    fresh = update_views._lease_chunk(db, 10, NOW, worker_id="worker-b")
+    assert [r.id for r in fresh] == [r.id for r in stale] == [db_shorts.id]
+
+    counts_b = _counts()
+    update_views._apply_batch(db, fresh, {"test-lease-10": _stats(150)}, counts_b, NOW, set(), snippet=False, worker_id="worker-b")
+    counts_a = _counts()
+    update_views._apply_batch(db, stale, {"test-lease-10": _stats(140)}, counts_a, NOW, set(), snippet=False, worker_id="worker-a")
+
+    assert counts_b["changed"] == 1
+    assert counts_a["lost"] == 1 and counts_a["changed"] == 0
+    db.refresh(db_shorts)
+    assert db_shorts.view_count == 150
+    # 등록 시점 + worker-b의 갱신, 두 개만
+    assert _samples(db, db_shorts.id) == 2
+    expected = crud.compute_hashtag_stats(db, ["testlease"])["testlease"]
+    row = db.get(models.HashtagStats, "testlease")
+    assert [row.total_views, row.total_likes, row.shorts_count] == expected == [150, 0, 1]
+
+
+def test_row_refreshed_by_api_during_lease_is_not_overwritten(db):
+    """임대 후 API가 즉시 갱신한 영상은 임대 시점의 이전 값으로 증감분을 다시 반영하지 않음"""
+    db_shorts = _insert_due(db, "test-lease-20", 100)
+    leased = update_views._lease_chunk(db, 10, NOW, worker_id="worker-a")
+    db.execute(update(models.Shorts.__table__).where(models.Shorts.id == db_shorts.id).values(view_count=130))
+    crud.apply_hashtag_stats_deltas(db, crud.hashtag_stats_delta(TAGS, 100, 0, TAGS, 130, 0))
+
+    counts = _counts()
+    update_views._apply_batch(db, leased, {"test-lease-20": _stats(140)}, counts, NOW, set(), snippet=False, worker_id="worker-a")
+
+    assert counts["changed"] == 0 and counts["unchanged"] == 1
+    db.refresh(db_shorts)
+    assert db_shorts.view_count == 130
+    row = db.get(models.HashtagStats, "testlease")
+    assert [row.total_views, row.total_likes, row.shorts_count] == crud.compute_hashtag_stats(db, ["testlease"])["testlease"]
+    # 임대는 풀리고 다음 갱신 시각이 정해짐
+    state = db.get(models.ShortsRefreshState, db_shorts.id)
+    assert state.leased_by is None and state.next_due_at > DUE
+
+
+def test_unchanged_snippet_keeps_hashtags_and_stores_hash(db):
+    """snippet 해시가 같아 title/hashtags 없이 온 응답은 조회수만 반영하고 해시는 다음 비교용으로 저장"""
+    db_shorts = _insert_due(db, "test-lease-30", 100)
+    leased = update_views._lease_chunk(db, 10, NOW, worker_id="worker-a")
+
+    counts = _counts()
+    data = {"view_count": 180, "like_count": 0, "etag": "snippet-hash"}
+    update_views._apply_batch(db, leased, {"test-lease-30": data}, counts, NOW, set(), snippet=True, worker_id="worker-a")
+
+    assert counts["changed"] == 1
+    db.refresh(db_shorts)
+    assert (db_shorts.view_count, db_shorts.title, db_shorts.hashtags) == (180, "title", TAGS)
+    state = db.get(models.ShortsRefreshState, db_shorts.id)
+    assert state.snippet_etag == "snippet-hash" and state.snippet_refreshed_at is not None
+    assert {tag for tag, in db.query(models.ShortsHashtag.hashtag).filter(models.ShortsHashtag.shorts_id == db_shorts.id)} \
+        == {"filmchain", "testlease"}
@@ -0,0 +1,231 @@
+import os
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.video_lookup import VideoLookup
+from bench.catalog import Catalog, video_id
+from bench.fake_youtube import FakeYouTube
+from scheduler import youtube_client
+from scheduler.youtube_client import FULL_PART, STATISTICS_PART, StatsBatch
+from scheduler.youtube_quota import CircuitBreaker, QuotaExhausted, YouTubeUnavailable
+
+
+class _Ledger:
+    """호출마다 예약한 unit 수만 세는 할당량 장부 (테스트가 공용 DB 장부를 쓰지 않도록)"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.exhausted = False
+
+    def acquire(self, units: int, caller: str, max_wait: float) -> None:
+        self.acquired += units
+
+    def mark_exhausted(self) -> None:
+        self.exhausted = True
+
+
+@pytest.fixture(scope="session")
+def fake_youtube():
+    """
+    세션 전체에서 가짜 videos.list 서버 하나를 씀
+    (스레드별 클라이언트가 처음 만든 엔드포인트를 계속 쓰므로 테스트마다 서버를 바꾸지 않음)
+    """
+    fake = FakeYouTube(Catalog(), latency_ms=0, jitter_ms=0, record_requests=True).start()
+    saved = {key: os.environ.get(key) for key in ("YOUTUBE_API_KEY", "YOUTUBE_API_ENDPOINT")}
+    os.environ["YOUTUBE_API_KEY"] = "test"
+    os.environ["YOUTUBE_API_ENDPOINT"] = fake.url
+    yield fake
+    fake.stop()
+    for key, value in saved.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+
+@pytest.fixture
+def fake(fake_youtube, monkeypatch):
+    fake_youtube.reset()
+    monkeypatch.setattr(youtube_client, "quota_ledger", _Ledger())
+    monkeypatch.setattr(youtube_client, "circuit_breaker", CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    return fake_youtube
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """재시도 전 대기 시간 계산에 넘긴 attempt 값 (실제로는 기다리지 않음)"""
+    attempts = []
+
+    def record(attempt, retry_after=None):
+        attempts.append(attempt)
+        return 0
+
+    monkeypatch.setattr(youtube_client, "_backoff_seconds", record)
+    return attempts
+
+
+def test_lookup_batches_ids_by_50(fake):
+    ids = [video_id(n) for n in range(120)]
+    result = VideoLookup(ttl_seconds=60).get_many(ids)
+
+    assert [len(r["id"].split(",")) for r in fake.requests] == [50, 50, 20]
+    assert all(r["maxResults"] == "50" for r in fake.requests)
+    assert set(result) == set(ids)
+    assert youtube_client.quota_ledger.acquired == 3
+
+
+def test_fields_mask_matches_part(fake):
+    stats_only = youtube_client.fetch_video_stats([video_id(1)], part=STATISTICS_PART)
+    full = youtube_client.fetch_video_stats([video_id(1)], part=FULL_PART)
+
+    assert [(r["part"], r["fields"]) for r in fake.requests] == [
+        (STATISTICS_PART, "items(id,statistics(viewCount,likeCount))"),
+        (FULL_PART, "items(id,statistics(viewCount,likeCount),snippet(title,description,tags))"),
+    ]
+    assert set(stats_only[video_id(1)]) == {"view_count", "like_count"}
+    assert {"etag", "title", "hashtags"} <= set(full[video_id(1)])
+
+
+def test_unchanged_etag_skips_snippet(fake):
+    first = youtube_client.fetch_video_stats([video_id(2)])[video_id(2)]
+    again = youtube_client.fetch_video_stats([video_id(2)], etags={video_id(2): first["etag"]})[video_id(2)]
+
+    assert "title" not in again and "hashtags" not in again
+    assert again["etag"] == first["etag"]
+
+
+class _Client:
+    """videos().list(...).execute()가 정해진 항목을 돌려주는 클라이언트"""
+
+    def __init__(self, *items):
+        self.response = {"items": list(items)}
+
+    def videos(self):
+        return self
+
+    def list(self, **kwargs):
+        return self
+
+    def execute(self):
+        return self.response
+
+
+def _item(views: int, title: str = "제목", tags=("filmchain", "movie1")):
+    return {
+        "id": "v1",
+        "etag": f"item-etag-{views}-{title}",
+        "statistics": {"viewCount": str(views), "likeCount": "0"},
+        "snippet": {"title": title, "description": "", "tags": list(tags)},
+    }
+
+
+def test_snippet_skip_ignores_statistics_changes():
+    first = youtube_client._fetch_video_stats(_Client(_item(100)), ["v1"], FULL_PART, None)["v1"]
+    # 조회수만 바뀜 (YouTube 항목 ETag는 바뀜) → 해시태그를 다시 추출하지 않음
+    again = youtube_client._fetch_video_stats(_Client(_item(250)), ["v1"], FULL_PART, {"v1": first["etag"]})["v1"]
+
+    assert first["hashtags"] == "#filmchain #movie1"
+    assert again == {"view_count": 250, "like_count": 0, "etag": first["etag"]}
+
+
+def test_snippet_change_is_parsed_again():
+    first = youtube_client._fetch_video_stats(_Client(_item(100)), ["v1"], FULL_PART, None)["v1"]
+    renamed = youtube_client._fetch_video_stats(
+        _Client(_item(100, tags=("filmchain", "movie2"))), ["v1"], FULL_PART, {"v1": first["etag"]},
+    )["v1"]
+
+    assert renamed["etag"] != first["etag"]
+    assert renamed["hashtags"] == "#filmchain #movie2"
+
+
+def test_missing_ids_are_left_out(fake):
+    result = youtube_client.fetch_video_stats([video_id(3), "missing0001"])
+
+    assert set(result) == {video_id(3)}
+    assert VideoLookup(ttl_seconds=60).get("missing0002") is None
+
+
+def test_retries_5xx_with_backoff(fake, backoffs):
+    fake.fail_next(503, count=2)
+    result = youtube_client.fetch_video_stats([video_id(4)])
+
+    assert video_id(4) in result
+    assert fake.calls == 3
+    assert backoffs == [0, 1]
+    # 재시도도 할당량을 씀
+    assert youtube_client.quota_ledger.acquired == 3
+    assert youtube_client.circuit_breaker.failures == 0
+
+
+def test_gives_up_after_retry_attempts(fake, backoffs, monkeypatch):
+    monkeypatch.setattr(youtube_client, "RETRY_ATTEMPTS", 2)
+    fake.fail_next(500, count=3)
+    with pytest.raises(YouTubeUnavailable):
+        youtube_client.fetch_video_stats([video_id(5)])
+
+    assert fake.calls == 3
+    assert backoffs == [0, 1]
+    assert youtube_client.circuit_breaker.failures == 1
+
+
+def test_quota_exceeded_is_not_retried(fake, backoffs):
+    fake.fail_next(403, "quotaExceeded")
+    with pytest.raises(QuotaExhausted):
+        youtube_client.fetch_video_stats([video_id(6)])
+
+    assert fake.calls == 1
+    assert backoffs == []
+    assert youtube_client.quota_ledger.exhausted
+    # 할당량 소진은 YouTube 장애가 아니므로 차단기에 반영하지 않음
+    assert youtube_client.circuit_breaker.failures == 0
+
+
+def test_bad_request_is_not_retried(fake, backoffs):
+    fake.fail_next(400, "badRequest")
+    with pytest.raises(HttpError):
+        youtube_client.fetch_video_stats([video_id(7)])
+
+    assert fake.calls == 1
+    assert backoffs == []
+
+
+def test_backoff_is_capped_and_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(youtube_client, "RETRY_BASE_SECONDS", 0.5)
+    monkeypatch.setattr(youtube_client, "RETRY_MAX_SECONDS", 8)
+
+    assert all(0 <= youtube_client._backoff_seconds(0) <= 0.5 for _ in range(100))
+    assert all(0 <= youtube_client._backoff_seconds(10) <= 8 for _ in range(100))
+    assert youtube_client._backoff_seconds(0, "3") >= 3
+    assert youtube_client._backoff_seconds(0, "60") <= 8
+
+
+def test_iter_video_stats_reuses_executor_and_clients(fake, monkeypatch):
+    built = []
+    build_client = youtube_client._build_client
+    monkeypatch.setattr(youtube_client, "_build_client", lambda: built.append(1) or build_client())
+    batches = [StatsBatch([video_id(n) for n in range(i, i + 50)], STATISTICS_PART) for i in range(0, 300, 50)]
+
+    first = [stats for _, stats in youtube_client.iter_video_stats(iter(batches), max_workers=3)]
+    executor = youtube_client._get_executor(3)
+    builds_after_first = len(built)
+    second = [stats for _, stats in youtube_client.iter_video_stats(iter(batches), max_workers=3)]
+
+    assert len(first) == len(second) == 6
+    assert sum(len(stats) for stats in second) == 300
+    assert youtube_client._get_executor(3) is executor
+    # 두 번째 실행은 첫 실행의 스레드와 스레드별 클라이언트를 그대로 씀
+    assert builds_after_first <= 3
+    assert len(built) == builds_after_first
+    assert fake.calls == 12
+
+
+def test_iter_video_stats_returns_failed_batches(fake, backoffs, monkeypatch):
+    monkeypatch.setattr(youtube_client, "RETRY_ATTEMPTS", 0)
+    fake.fail_next(503)
+    batches = [[video_id(n)] for n in range(3)]
+
+    results = list(youtube_client.iter_video_stats(batches, max_workers=1, return_exceptions=True))
+
+    assert isinstance(results[0][1], YouTubeUnavailable)
+    assert [set(stats) for _, stats in results[1:]] == [{video_id(1)}, {video_id(2)}]